@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.core.schedule_cache import schedule_cache
+from app.core.intervals import (
+    SlotSweeper,
+    business_window,
+    has_conflict,
+    lock_barber_schedule,
+    merge_intervals,
+)
+
+
+async def validate_slot(session: AsyncSession, service: Service, start_time: datetime) -> None:
+    """
+    Validação de uma reserva: expediente, almoço, bloqueios e conflito com
+    outros agendamentos. Levanta HTTPException 400 se o horário não serve
+    (fechado, fora do expediente, almoço ou bloqueio) e 409 se já foi
+    reservado por outro agendamento.
+
+    Expediente e bloqueios vêm do cache de agenda, antes do lock; dentro do
+    lock só se consulta o banco por agendamentos.
+
+    Trava a agenda do barbeiro até o fim da transação: quem chama deve criar
+    o agendamento e fazer commit na mesma transação.
+    """
+    barber_id = service.barber_id
+    end_time = start_time + timedelta(minutes=service.duration_minutes)
+
+    hours_by_weekday = await schedule_cache.get_business_hours(session, barber_id)
+    window = business_window(start_time.date(), hours_by_weekday.get(start_time.weekday()))
+    if not window:
+        raise HTTPException(status_code=400, detail="Barbearia fechada nesse dia")
+
+    day_start, day_end, fixed_busy = window
+
+    if start_time < day_start or end_time > day_end:
+        raise HTTPException(status_code=400, detail="Fora do horário de funcionamento")
+
+    blocks = await schedule_cache.get_time_blocks(session, barber_id, day_start, day_end)
+
+    if not SlotSweeper(merge_intervals(fixed_busy + blocks)).is_free(start_time, end_time):
+        raise HTTPException(status_code=400, detail="Horário indisponível")
+
+    # reservas concorrentes do mesmo barbeiro esperam aqui até o commit
+    await lock_barber_schedule(session, barber_id)
+
+    if await has_conflict(session, barber_id, start_time, end_time, not_before=day_start):
+        raise HTTPException(status_code=409, detail="Horário já reservado")
+
+
+OVERLAP_CONSTRAINT = "appointment_no_overlap"
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    """A violação veio da constraint de exclusão (corrida de reserva), não de FK etc."""
+    return OVERLAP_CONSTRAINT in str(exc.orig)
+
+
+def new_appointment(client_id: int, service: Service, start_time: datetime) -> Appointment:
+    return Appointment(
+        # 🔥 Dados forçados
+        client_id=client_id,
+        barber_id=service.barber_id,
+        service_id=service.id,
+        appointment_time=start_time,
+        status="pending",
+        # 🔥 Snapshot financeiro
+        service_name_snapshot=service.name,
+        service_price_snapshot=service.price,
+        service_duration_snapshot=service.duration_minutes,
+        payment_status="unpaid",
+    )
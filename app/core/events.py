@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import asyncpg
+import orjson
+from sqlalchemy import Text, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import DATABASE_URL
+from app.models.appointment import Appointment
+from app.models.waitlist import WaitlistEntry
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# eventos pendentes por conexão SSE; cheia, o cliente recebe "resync"
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_RECONNECT_SECONDS = float(os.getenv("EVENTS_RECONNECT_SECONDS", "2"))
+
+CHANNEL = "schedule_events"
+
+RESYNC = {"type": "resync"}
+
+# ("barber", id): agenda do barbeiro; ("client", id): lista de espera do cliente
+Topic = Tuple[str, int]
+
+
+# =========================
+# PUBLICAÇÃO
+# =========================
+
+def appointment_event(kind: str, appt: Appointment) -> dict:
+    """
+    Evento compacto: o suficiente para a tela atualizar a linha sem refazer a
+    listagem. Aceita também linhas (RETURNING) com as mesmas colunas.
+    """
+    return {
+        "type": f"appointment.{kind}",
+        "barber_id": appt.barber_id,
+        "id": appt.id,
+        "appointment_time": appt.appointment_time.isoformat(),
+        "duration_minutes": appt.service_duration_snapshot,
+        "status": appt.status,
+        "payment_status": appt.payment_status,
+    }
+
+
+def waitlist_event(kind: str, entry: WaitlistEntry) -> dict:
+    """Vai só para o cliente da entrada (oferta de vaga, reserva automática)."""
+    return {
+        "type": f"waitlist.{kind}",
+        "client_id": entry.client_id,
+        "id": entry.id,
+        "status": entry.status,
+        "offered_time": entry.offered_time.isoformat() if entry.offered_time else None,
+        "offer_expires_at": entry.offer_expires_at.isoformat() if entry.offer_expires_at else None,
+        "appointment_id": entry.appointment_id,
+    }
+
+
+def _topics(event: dict) -> Iterator[Topic]:
+    if event.get("barber_id") is not None:
+        yield ("barber", event["barber_id"])
+    if event.get("client_id") is not None:
+        yield ("client", event["client_id"])
+
+
+def _notify_statement(events: List[dict]):
+    payloads = [orjson.dumps(event).decode() for event in events]
+    return select(func.pg_notify(CHANNEL, func.unnest(
+        bindparam("payloads", payloads, type_=ARRAY(Text))
+    )))
+
+
+async def publish(session: AsyncSession, *events: dict) -> None:
+    """
+    Enfileira os eventos na transação da sessão (NOTIFY só é entregue no
+    commit; rollback descarta). Chame antes do commit, com os ids já gerados
+    (flush). Todos os workers recebem via LISTEN, inclusive este.
+    """
+    if events:
+        await session.exec(_notify_statement(list(events)))
+
+
+def publish_sync(session: Session, *events: dict) -> None:
+    """publish() para os routers sync."""
+    if events:
+        session.exec(_notify_statement(list(events)))
+
+
+# =========================
+# BROKER EM PROCESSO
+# =========================
+
+class EventBroker:
+    """
+    Distribui os eventos do canal schedule_events para as conexões SSE deste
+    processo, por tópico: barbeiro (barber_id do evento) ou cliente
+    (client_id do evento).
+
+    Uma conexão dedicada (fora do pool) faz LISTEN; cada NOTIFY é repassado
+    às filas dos assinantes dos tópicos do evento. Fila cheia (cliente lento)
+    ou conexão com o banco perdida viram um evento "resync": a tela recarrega
+    a listagem em vez de receber uma sequência com buracos.
+    """
+
+    def __init__(self, queue_size: int = EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Topic, Set[asyncio.Queue]] = defaultdict(set)
+        self.listening = False
+        self.received = 0
+        self.delivered = 0
+        self.overflows = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+
+    def subscribe(self, topic: Topic) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[topic].add(queue)
+        return queue
+
+    def unsubscribe(self, topic: Topic, queue: asyncio.Queue) -> None:
+        subscribers = self._subscribers.get(topic)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[topic]
+
+    def _put(self, queue: asyncio.Queue, event: dict) -> None:
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # descarta o atrasado; o cliente recarrega tudo
+            self.overflows += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+            return
+        self.delivered += 1
+
+    def dispatch(self, event: dict) -> None:
+        self.received += 1
+        for topic in _topics(event):
+            for queue in tuple(self._subscribers.get(topic, ())):
+                self._put(queue, event)
+
+    def resync_all(self) -> None:
+        for subscribers in self._subscribers.values():
+            for queue in tuple(subscribers):
+                self._put(queue, RESYNC)
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            event = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            logger.warning("Evento inválido no canal %s: %.200s", channel, payload)
+            return
+        self.dispatch(event)
+
+    async def run_forever(self, stop: asyncio.Event) -> None:
+        """LISTEN até stop; reconecta (com resync) se a conexão cair."""
+        first = True
+        while not stop.is_set():
+            lost = asyncio.Event()
+            conn = None
+            try:
+                conn = await asyncpg.connect(DATABASE_URL)
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                self.listening = True
+                if not first:
+                    self.reconnects += 1
+                first = False
+                # eventos do período sem LISTEN se perderam
+                self.resync_all()
+
+                waiters = [asyncio.ensure_future(stop.wait()), asyncio.ensure_future(lost.wait())]
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in waiters:
+                    waiter.cancel()
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                self.last_error = repr(exc)
+                logger.warning("LISTEN %s falhou: %r", CHANNEL, exc)
+            finally:
+                self.listening = False
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+            if not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=EVENTS_RECONNECT_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": EVENTS_ENABLED,
+            "listening": self.listening,
+            "topics": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "received": self.received,
+            "delivered": self.delivered,
+            "overflows": self.overflows,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+broker = EventBroker()
@@ -0,0 +1,219 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+WEEKDAY_CODES = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+
+class ICalEvent(NamedTuple):
+    start: datetime
+    end: datetime
+    summary: Optional[str]
+    all_day: bool
+    rrule: Optional[Dict[str, str]]
+    # fuso do DTSTART (start/end já convertidos para UTC)
+    tzid: Optional[str] = None
+    # a série tem exceções (EXDATE), que RecurringTimeBlock não representa
+    has_exdate: bool = False
+
+
+class ICalError(ValueError):
+    pass
+
+
+def _unfold(text: str) -> List[str]:
+    # RFC 5545: linhas continuadas começam com espaço ou tab
+    lines: List[str] = []
+    for raw in text.replace("\r\n", "\n").split("\n"):
+        if raw[:1] in (" ", "\t") and lines:
+            lines[-1] += raw[1:]
+        elif raw:
+            lines.append(raw)
+    return lines
+
+
+def _split_property(line: str) -> Tuple[str, Dict[str, str], str]:
+    head, _, value = line.partition(":")
+    name, *raw_params = head.split(";")
+    params = {}
+    for param in raw_params:
+        key, _, val = param.partition("=")
+        params[key.upper()] = val
+    return name.upper(), params, value
+
+
+def _zone(tzid: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(tzid.strip('"'))
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ICalError(f"TZID desconhecido: {tzid}")
+
+
+def _parse_value(value: str, params: Dict[str, str]) -> Tuple[datetime, bool]:
+    """
+    (datetime, dia_inteiro). Horários com Z ou TZID voltam em UTC (sem
+    tzinfo, como o resto do banco); horários flutuantes (sem Z nem TZID)
+    ficam como estão.
+    """
+    value = value.strip()
+
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d"), True
+
+    moment = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+
+    if "TZID" in params and not value.endswith("Z"):
+        moment = (
+            moment.replace(tzinfo=_zone(params["TZID"]))
+            .astimezone(timezone.utc)
+            .replace(tzinfo=None)
+        )
+
+    return moment, False
+
+
+def parse_events(text: str) -> List[ICalEvent]:
+    """
+    Eventos (VEVENT) de um arquivo iCalendar.
+
+    Suporta o que exportadores de agenda geram para férias e compromissos:
+    DTSTART/DTEND (data ou data-hora, com Z, TZID ou flutuante), SUMMARY,
+    RRULE e a presença de EXDATE. Sem DTEND, evento de dia inteiro dura um
+    dia e evento com hora fica sem duração.
+    """
+    events: List[ICalEvent] = []
+    current: Optional[Dict[str, Tuple[Dict[str, str], str]]] = None
+
+    for line in _unfold(text):
+        name, params, value = _split_property(line)
+
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            current = {}
+        elif name == "END" and value.upper() == "VEVENT":
+            if current is None:
+                raise ICalError("END:VEVENT sem BEGIN")
+            events.append(_build_event(current))
+            current = None
+        elif current is not None:
+            current.setdefault(name, (params, value))
+
+    if current is not None:
+        raise ICalError("VEVENT sem END")
+
+    return events
+
+
+def _build_event(props: Dict[str, Tuple[Dict[str, str], str]]) -> ICalEvent:
+    if "DTSTART" not in props:
+        raise ICalError("VEVENT sem DTSTART")
+
+    try:
+        start, all_day = _parse_value(props["DTSTART"][1], props["DTSTART"][0])
+
+        if "DTEND" in props:
+            end, _ = _parse_value(props["DTEND"][1], props["DTEND"][0])
+        else:
+            end = start + timedelta(days=1) if all_day else start
+    except ValueError as exc:
+        raise ICalError(f"Data inválida: {exc}") from exc
+
+    rrule = None
+    if "RRULE" in props:
+        rrule = {}
+        for part in props["RRULE"][1].split(";"):
+            key, _, val = part.partition("=")
+            rrule[key.upper()] = val.upper()
+
+    summary = props.get("SUMMARY", ({}, None))[1]
+    if summary:
+        summary = summary.replace("\\,", ",").replace("\\;", ";").replace("\\n", " ")
+
+    tzid = props["DTSTART"][0].get("TZID")
+    if all_day or props["DTSTART"][1].strip().endswith("Z"):
+        tzid = None
+
+    return ICalEvent(
+        start=start,
+        end=end,
+        summary=summary,
+        all_day=all_day,
+        rrule=rrule,
+        tzid=tzid,
+        has_exdate="EXDATE" in props,
+    )
+
+
+def weekly_rule(event: ICalEvent) -> Optional[Dict[str, object]]:
+    """
+    Campos de RecurringTimeBlock para um evento com RRULE semanal de um dia só,
+    ou None se a regra não puder ser representada (FREQ diferente, BYDAY
+    com vários dias, evento atravessando a meia-noite, fuso que muda de
+    offset durante a série).
+    """
+    rule = event.rrule or {}
+    if rule.get("FREQ") != "WEEKLY" or event.all_day:
+        return None
+    if event.end.date() != event.start.date() or event.end <= event.start:
+        return None
+
+    weekday = event.start.weekday()
+    byday = rule.get("BYDAY")
+    if byday:
+        if byday not in WEEKDAY_CODES:
+            return None
+        weekday = WEEKDAY_CODES[byday]
+        if event.tzid and _local(event.start, event.tzid).date() != event.start.date():
+            # BYDAY é o dia no fuso do arquivo; em UTC a ocorrência cai em outro dia
+            return None
+
+    starts_on = event.start.date()
+    starts_on += timedelta(days=(weekday - starts_on.weekday()) % 7)
+
+    try:
+        interval_weeks = int(rule.get("INTERVAL") or 1)
+
+        ends_on: Optional[date] = None
+        if "UNTIL" in rule:
+            ends_on = _parse_value(rule["UNTIL"], {})[0].date()
+        elif "COUNT" in rule:
+            ends_on = starts_on + timedelta(weeks=interval_weeks * (int(rule["COUNT"]) - 1))
+    except ValueError:
+        return None
+
+    if event.tzid and not _fixed_offset(event, starts_on, ends_on):
+        return None
+
+    return {
+        "weekday": weekday,
+        "start_time": event.start.time(),
+        "end_time": event.end.time(),
+        "interval_weeks": interval_weeks,
+        "starts_on": starts_on,
+        "ends_on": ends_on,
+    }
+
+
+def _local(moment: datetime, tzid: str) -> datetime:
+    return moment.replace(tzinfo=timezone.utc).astimezone(_zone(tzid))
+
+
+def _fixed_offset(event: ICalEvent, starts_on: date, ends_on: Optional[date]) -> bool:
+    """
+    A regra guarda o horário em UTC: só vale se o fuso mantém o offset em
+    todas as semanas da série (até um ano; quem muda de offset muda nele).
+    """
+    zone = _zone(event.tzid)
+    at = event.start.time()
+    first_offset = zone.utcoffset(datetime.combine(starts_on, at))
+
+    last = starts_on + timedelta(days=366)
+    if ends_on and ends_on < last:
+        last = ends_on
+
+    day = starts_on
+    while day <= last:
+        if zone.utcoffset(datetime.combine(day, at)) != first_offset:
+            return False
+        day += timedelta(weeks=1)
+    return True
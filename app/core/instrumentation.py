@@ -0,0 +1,213 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import metrics
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # opcional: sem pyinstrument o perfil sai do cProfile
+    Profiler = None
+
+
+logger = logging.getLogger(__name__)
+
+# a mesma consulta (texto SQL, sem parâmetros) repetida N vezes numa requisição
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# header X-Profile só é atendido com PROFILING_ENABLED=true (nunca em produção aberta)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+PROFILE_HEADER = b"x-profile"
+
+
+class RequestStats:
+    """Consultas SQL feitas durante uma requisição."""
+
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+# mutável de propósito: endpoints sync rodam no threadpool com cópia do contexto,
+# e é o mesmo objeto que o middleware lê no fim
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+# =========================
+# EVENTOS DO SQLALCHEMY
+# =========================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    if stats is None:
+        return
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    stats.queries += 1
+    stats.db_seconds += time.perf_counter() - started.pop()
+    stats.statements[statement] += 1
+
+
+def install_sql_instrumentation(engines: Iterable[Engine]):
+    """
+    Liga a contagem de consultas nos engines (para os async, passe
+    async_engine.sync_engine). Fora de requisição (worker, scripts) não conta.
+    """
+    for engine in set(engines):
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+
+class InstrumentationMiddleware:
+    """
+    Latência por rota, consultas SQL por requisição e alerta de N+1.
+
+    Middleware ASGI puro (não BaseHTTPMiddleware) para não bufferizar as
+    respostas em streaming das exportações. A rota é o template
+    (/appointments/{appointment_id}), não o caminho, para não explodir o
+    número de séries no Prometheus.
+
+    A resposta ganha X-DB-Queries e Server-Timing (db;dur=ms). Com
+    PROFILING_ENABLED=true e o header X-Profile: 1 (ou html), o corpo da
+    resposta é trocado pelo perfil da requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        profile = PROFILING_ENABLED and dict(scope["headers"]).get(PROFILE_HEADER)
+
+        async def send_with_stats(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                headers.append((b"server-timing", f"db;dur={stats.db_seconds * 1000:.1f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            if profile:
+                status_code = await self._profiled(scope, receive, send, stats, profile)
+            else:
+                await self.app(scope, receive, send_with_stats)
+        finally:
+            _request_stats.reset(token)
+            self._record(scope, status_code, time.perf_counter() - started, stats)
+
+    def _record(self, scope, status_code: int, seconds: float, stats: RequestStats):
+        route = scope.get("route")
+        route_path = getattr(route, "path", None) or "unmatched"
+        method = scope["method"]
+
+        repeated = stats.repeated()
+        for sql, count in repeated:
+            logger.warning(
+                "Possível N+1 em %s %s: consulta repetida %d vezes: %s",
+                method, route_path, count, " ".join(sql.split())[:200],
+            )
+
+        metrics.record_request(
+            method=method,
+            route=route_path,
+            status=status_code,
+            seconds=seconds,
+            queries=stats.queries,
+            db_seconds=stats.db_seconds,
+            n_plus_one=bool(repeated),
+        )
+
+    async def _profiled(self, scope, receive, send, stats: RequestStats, mode: bytes) -> int:
+        original_status = 0
+
+        async def discard(message):
+            # a resposta original é descartada; o perfil vai no lugar dela
+            nonlocal original_status
+            if message["type"] == "http.response.start":
+                original_status = message["status"]
+
+        html = False
+        if Profiler is not None:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.stop()
+            html = mode.strip().lower() == b"html"
+            report = profiler.output_html() if html else profiler.output_text(unicode=True)
+        else:
+            # cProfile mede só a thread do event loop (endpoints sync rodam no
+            # threadpool) e inclui outras requisições concorrentes: use em teste
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profiler.disable()
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(40)
+            report = buffer.getvalue()
+
+        if html:
+            body = report.encode()
+            media_type = b"text/html; charset=utf-8"
+        else:
+            summary = [
+                f"status original: {original_status}",
+                f"consultas SQL: {stats.queries} ({stats.db_seconds * 1000:.1f} ms)",
+            ]
+            for sql, count in stats.statements.most_common(10):
+                summary.append(f"  {count:>4}x {' '.join(sql.split())[:160]}")
+            body = ("\n".join(summary) + "\n\n" + report).encode()
+            media_type = b"text/plain; charset=utf-8"
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", media_type),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-db-queries", str(stats.queries).encode()),
+                (b"x-original-status", str(original_status).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+        return original_status
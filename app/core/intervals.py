@@ -0,0 +1,296 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Interval as SQLInterval, func, literal_column, or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.appointment import Appointment
+from app.models.business_hours import BusinessHours
+from app.models.time_block import RecurringTimeBlock, TimeBlock
+
+
+Interval = Tuple[datetime, datetime]
+
+
+# =========================
+# JANELA DE FUNCIONAMENTO
+# =========================
+
+def business_window(
+    day: date,
+    hours: Optional[BusinessHours],
+) -> Optional[Tuple[datetime, datetime, List[Interval]]]:
+    """
+    Retorna (abertura, fechamento, intervalos_fixos) do dia,
+    ou None se o barbeiro não atende nesse dia.
+    O almoço entra como intervalo ocupado.
+    """
+    if not hours or hours.is_closed or not hours.open_time or not hours.close_time:
+        return None
+
+    open_dt = datetime.combine(day, hours.open_time)
+    close_dt = datetime.combine(day, hours.close_time)
+
+    fixed: List[Interval] = []
+    if hours.lunch_start and hours.lunch_end:
+        fixed.append(
+            (datetime.combine(day, hours.lunch_start), datetime.combine(day, hours.lunch_end))
+        )
+
+    return open_dt, close_dt, fixed
+
+
+def capacity_minutes(window: Tuple[datetime, datetime, List[Interval]]) -> int:
+    """Minutos atendíveis da janela, descontando os intervalos fixos (almoço)."""
+    open_dt, close_dt, fixed = window
+    total = _minutes(open_dt, close_dt)
+
+    for start, end in merge_intervals(fixed):
+        start, end = max(start, open_dt), min(end, close_dt)
+        if end > start:
+            total -= _minutes(start, end)
+
+    return total
+
+
+def _minutes(start: datetime, end: datetime) -> int:
+    return int((end - start).total_seconds() // 60)
+
+
+# =========================
+# OPERAÇÕES COM INTERVALOS
+# =========================
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Ordena e une intervalos sobrepostos ou encostados."""
+    merged: List[Interval] = []
+
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+class SlotSweeper:
+    """
+    Varre intervalos ocupados já unidos e ordenados.
+
+    As consultas precisam chegar em ordem crescente de início; o ponteiro
+    só anda para frente, então gerar todos os slots de um período custa
+    O(slots + ocupados) em vez de O(slots × ocupados).
+    """
+
+    def __init__(self, busy: List[Interval]):
+        self.busy = busy
+        self.idx = 0
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        busy = self.busy
+
+        while self.idx < len(busy) and busy[self.idx][1] <= start:
+            self.idx += 1
+
+        return self.idx >= len(busy) or busy[self.idx][0] >= end
+
+    def free_slots(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        duration: timedelta,
+        step: timedelta,
+    ) -> List[datetime]:
+        slots: List[datetime] = []
+        current = window_start
+
+        while current + duration <= window_end:
+            if self.is_free(current, current + duration):
+                slots.append(current)
+            current += step
+
+        return slots
+
+
+# =========================
+# CONFLITOS NO BANCO
+# =========================
+
+# literal em vez de parâmetro: com prepared statements (asyncpg) o planner
+# só usa o índice parcial ix_appointment_barber_time_active se enxergar o valor
+ACTIVE_APPOINTMENT = Appointment.status != literal_column("'canceled'")
+
+# namespace dos advisory locks de agenda (primeiro argumento do lock de duas chaves)
+SCHEDULE_LOCK_NAMESPACE = 7301
+
+
+def schedule_lock_query(barber_id: int):
+    """
+    SELECT que trava a agenda do barbeiro até o fim da transação.
+
+    Reservas de barbeiros diferentes continuam em paralelo; o lock é
+    liberado automaticamente no commit/rollback.
+    """
+    return select(func.pg_advisory_xact_lock(SCHEDULE_LOCK_NAMESPACE, barber_id))
+
+
+def appointment_end_expr():
+    """Fim do agendamento calculado no banco (início + duração do snapshot)."""
+    return Appointment.appointment_time + func.make_interval(
+        0, 0, 0, 0, 0, Appointment.service_duration_snapshot, type_=SQLInterval
+    )
+
+
+def busy_appointments_query(
+    barber_ids: Sequence[int],
+    range_start: datetime,
+    range_end: datetime,
+):
+    """(barber_id, início, duração) dos agendamentos ativos que começam no período."""
+    return select(
+        Appointment.barber_id,
+        Appointment.appointment_time,
+        Appointment.service_duration_snapshot,
+    ).where(
+        Appointment.barber_id.in_(barber_ids),
+        ACTIVE_APPOINTMENT,
+        Appointment.appointment_time >= range_start,
+        Appointment.appointment_time < range_end,
+    )
+
+
+def blocks_query(
+    barber_ids: Sequence[int],
+    range_start: datetime,
+    range_end: datetime,
+):
+    """(barber_id, início, fim) dos bloqueios que tocam o período."""
+    return select(
+        TimeBlock.barber_id,
+        TimeBlock.start_time,
+        TimeBlock.end_time,
+    ).where(
+        TimeBlock.barber_id.in_(barber_ids),
+        TimeBlock.end_time > range_start,
+        TimeBlock.start_time < range_end,
+    )
+
+
+# =========================
+# BLOQUEIOS RECORRENTES
+# =========================
+
+def recurring_blocks_query(
+    barber_ids: Sequence[int],
+    range_start: datetime,
+    range_end: datetime,
+):
+    """Regras de bloqueio recorrente vigentes em algum dia do período."""
+    return select(RecurringTimeBlock).where(
+        RecurringTimeBlock.barber_id.in_(barber_ids),
+        RecurringTimeBlock.starts_on <= range_end.date(),
+        or_(
+            RecurringTimeBlock.ends_on.is_(None),
+            RecurringTimeBlock.ends_on >= range_start.date(),
+        ),
+    )
+
+
+def expand_recurring_blocks(
+    rules: Iterable[RecurringTimeBlock],
+    range_start: datetime,
+    range_end: datetime,
+) -> Iterator[Tuple[int, datetime, datetime]]:
+    """(barber_id, início, fim) das ocorrências das regras que tocam o período."""
+    for rule in rules:
+        period = 7 * rule.interval_weeks
+
+        # primeira ocorrência a partir do início do período
+        day = max(rule.starts_on, range_start.date())
+        behind = (day - rule.starts_on).days % period
+        if behind:
+            day += timedelta(days=period - behind)
+
+        last = range_end.date()
+        if rule.ends_on and rule.ends_on < last:
+            last = rule.ends_on
+
+        while day <= last:
+            start = datetime.combine(day, rule.start_time)
+            end = datetime.combine(day, rule.end_time)
+            if end > range_start and start < range_end:
+                yield rule.barber_id, start, end
+            day += timedelta(days=period)
+
+
+async def load_blocks(
+    session: AsyncSession,
+    barber_ids: Sequence[int],
+    range_start: datetime,
+    range_end: datetime,
+) -> Dict[int, List[Interval]]:
+    """Bloqueios avulsos e ocorrências de bloqueios recorrentes, por barbeiro."""
+    blocks: Dict[int, List[Interval]] = defaultdict(list)
+
+    for barber_id, b_start, b_end in (await session.exec(
+        blocks_query(barber_ids, range_start, range_end)
+    )).all():
+        blocks[barber_id].append((b_start, b_end))
+
+    rules = (await session.exec(
+        recurring_blocks_query(barber_ids, range_start, range_end)
+    )).all()
+
+    for barber_id, b_start, b_end in expand_recurring_blocks(rules, range_start, range_end):
+        blocks[barber_id].append((b_start, b_end))
+
+    return blocks
+
+
+# =========================
+# CHECAGEM DE CONFLITO
+# =========================
+
+def conflict_query(
+    barber_id: int,
+    start: datetime,
+    end: datetime,
+    not_before: datetime,
+):
+    """
+    SELECT booleano: algum agendamento ativo do barbeiro sobrepõe [start, end)?
+
+    Só agendamentos: bloqueios e expediente já foram checados antes do lock
+    (400); aqui sobra a corrida com outra reserva (409). O EXISTS para na
+    primeira linha encontrada; `not_before` limita a busca pelo índice
+    (agendamentos do mesmo dia de trabalho).
+    """
+    return select(select(Appointment.id).where(
+        Appointment.barber_id == barber_id,
+        ACTIVE_APPOINTMENT,
+        Appointment.appointment_time >= not_before,
+        Appointment.appointment_time < end,
+        appointment_end_expr() > start,
+    ).exists())
+
+
+async def lock_barber_schedule(session: AsyncSession, barber_id: int) -> None:
+    (await session.exec(schedule_lock_query(barber_id))).one()
+
+
+async def has_conflict(
+    session: AsyncSession,
+    barber_id: int,
+    start: datetime,
+    end: datetime,
+    not_before: datetime,
+) -> bool:
+    result = await session.exec(conflict_query(barber_id, start, end, not_before))
+    return bool(result.one())
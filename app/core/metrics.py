@@ -0,0 +1,141 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+
+# limites dos buckets em segundos (latência) e em número de consultas por requisição
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[Labels, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str):
+        self._values[_labels(labels)] += amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus (_bucket, _sum, _count)."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # por label: contagem por bucket (não cumulativa) + overflow, soma
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: str):
+        key = _labels(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}"
+                )
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(self._sums[labels])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Métricas em memória do processo, expostas em /metrics.
+
+    Sem dependência do prometheus_client: só contadores e histogramas, que é
+    o que o middleware precisa. Com vários processos uvicorn cada um tem o
+    seu registro; o Prometheus soma as séries de cada alvo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: List[object] = []
+
+        self.requests = self._add(Counter("http_requests_total", "Requisições HTTP por rota e status."))
+        self.latency = self._add(Histogram(
+            "http_request_duration_seconds", "Latência das requisições HTTP por rota.", LATENCY_BUCKETS
+        ))
+        self.db_queries = self._add(Histogram(
+            "http_request_db_queries", "Consultas SQL por requisição.", QUERY_COUNT_BUCKETS
+        ))
+        self.db_time = self._add(Histogram(
+            "http_request_db_duration_seconds", "Tempo total no banco por requisição.", LATENCY_BUCKETS
+        ))
+        self.n_plus_one = self._add(Counter(
+            "http_n_plus_one_total", "Requisições em que a mesma consulta se repetiu além do limite."
+        ))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def record_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        queries: int,
+        db_seconds: float,
+        n_plus_one: bool,
+    ):
+        with self._lock:
+            self.requests.inc(method=method, route=route, status=str(status))
+            self.latency.observe(seconds, method=method, route=route)
+            self.db_queries.observe(queries, method=method, route=route)
+            self.db_time.observe(db_seconds, method=method, route=route)
+            if n_plus_one:
+                self.n_plus_one.inc(method=method, route=route)
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+            for metric in self._metrics:
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
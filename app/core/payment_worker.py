@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import async_engine
+from app.models.payment import Payment, PaymentEvent
+from app.core.payments import confirm_payments, fail_payments, refund_payments
+
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_WORKER_ENABLED = os.getenv("PAYMENT_WORKER_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+PAYMENT_WORKER_BATCH_SIZE = int(os.getenv("PAYMENT_WORKER_BATCH_SIZE", "200"))
+PAYMENT_WORKER_POLL_SECONDS = float(os.getenv("PAYMENT_WORKER_POLL_SECONDS", "1"))
+# depois disso o evento fica na fila só para inspeção (last_error)
+PAYMENT_WORKER_MAX_ATTEMPTS = int(os.getenv("PAYMENT_WORKER_MAX_ATTEMPTS", "5"))
+
+
+class PaymentEventWorker:
+    """
+    Consome a fila payment_event em lotes.
+
+    Cada lote é uma transação: SELECT ... FOR UPDATE SKIP LOCKED (vários
+    workers/processos podem rodar juntos sem pegar o mesmo evento), um
+    UPDATE por tipo de evento via app.core.payments e um UPDATE marcando os
+    eventos como processados. Se o lote falhar, os eventos são refeitos um
+    a um, para que só o evento problemático acumule tentativas.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = PAYMENT_WORKER_BATCH_SIZE,
+        poll_seconds: float = PAYMENT_WORKER_POLL_SECONDS,
+        max_attempts: int = PAYMENT_WORKER_MAX_ATTEMPTS,
+    ):
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+
+    # =========================
+    # LOTE
+    # =========================
+
+    async def run_once(self) -> int:
+        """Processa um lote. Retorna quantos eventos saíram da fila."""
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            events = (await session.exec(
+                select(PaymentEvent)
+                .where(PaymentEvent.processed_at.is_(None), PaymentEvent.attempts < self.max_attempts)
+                .order_by(PaymentEvent.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+
+            if not events:
+                return 0
+
+            # o rollback expira os objetos: ids guardados antes
+            event_ids = [event.id for event in events]
+
+            try:
+                await self._apply(session, events)
+                await session.commit()
+            except Exception as exc:
+                await session.rollback()
+                if len(events) == 1:
+                    # lote de um só: já é a tentativa individual
+                    await self._record_failure(session, event_ids[0], exc)
+                    return 0
+                logger.exception("Lote de %d eventos falhou; refazendo um a um", len(events))
+            else:
+                self.batches += 1
+                self.processed += len(events)
+                return len(events)
+
+        done = 0
+        for event_id in event_ids:
+            done += await self._run_single(event_id)
+        return done
+
+    async def _run_single(self, event_id: int) -> int:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            event = (await session.exec(
+                select(PaymentEvent)
+                .where(PaymentEvent.id == event_id, PaymentEvent.processed_at.is_(None))
+                .with_for_update(skip_locked=True)
+            )).first()
+            if not event:
+                return 0
+
+            try:
+                await self._apply(session, [event])
+                await session.commit()
+            except Exception as exc:
+                await session.rollback()
+                await self._record_failure(session, event_id, exc)
+                return 0
+
+        self.processed += 1
+        return 1
+
+    async def _record_failure(self, session: AsyncSession, event_id: int, exc: Exception) -> None:
+        """Conta a tentativa; com PAYMENT_WORKER_MAX_ATTEMPTS o evento sai da fila."""
+        self.failed += 1
+        logger.error("Evento de pagamento %s falhou", event_id, exc_info=exc)
+        await session.exec(
+            update(PaymentEvent)
+            .where(PaymentEvent.id == event_id)
+            .values(attempts=PaymentEvent.attempts + 1, last_error=repr(exc)[:1000])
+        )
+        await session.commit()
+
+    async def _apply(self, session: AsyncSession, events: Sequence[PaymentEvent]) -> None:
+        payment_ids = await _resolve_payment_ids(session, events)
+
+        by_type: Dict[str, List[int]] = defaultdict(list)
+        external_ids: Dict[int, Tuple[str, str]] = {}
+        for event in events:
+            payment_id = payment_ids.get(event.id)
+            if payment_id is None:
+                continue
+            by_type[event.event_type].append(payment_id)
+            external_id = (event.payload.get("data") or {}).get("external_id")
+            if external_id:
+                external_ids[payment_id] = (event.provider, str(external_id))
+
+        # ordem importa quando o mesmo lote traz confirmação e estorno
+        if by_type["payment.succeeded"]:
+            await confirm_payments(session, by_type["payment.succeeded"], external_ids=external_ids)
+        if by_type["payment.failed"]:
+            await fail_payments(session, by_type["payment.failed"])
+        if by_type["payment.refunded"]:
+            await refund_payments(session, by_type["payment.refunded"])
+
+        unknown = [event.id for event in events if event.id not in payment_ids]
+        now = datetime.utcnow()
+        await session.exec(
+            update(PaymentEvent)
+            .where(PaymentEvent.id.in_([event.id for event in events]))
+            .values(processed_at=now, attempts=PaymentEvent.attempts + 1)
+        )
+        if unknown:
+            await session.exec(
+                update(PaymentEvent)
+                .where(PaymentEvent.id.in_(unknown))
+                .values(last_error="Pagamento não encontrado")
+            )
+
+    # =========================
+    # LOOP
+    # =========================
+
+    async def run_forever(self, stop: Optional[asyncio.Event] = None) -> None:
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                done = await self.run_once()
+            except Exception:
+                logger.exception("Falha no worker de pagamentos")
+                done = 0
+
+            # lote cheio: provavelmente tem mais na fila, não espera
+            if done < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PAYMENT_WORKER_ENABLED,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+async def _resolve_payment_ids(session: AsyncSession, events: Sequence[PaymentEvent]) -> Dict[int, int]:
+    """
+    evento -> id do pagamento. Usa data.payment_id quando vem no evento;
+    senão procura por (provider, data.external_id) numa única consulta.
+
+    data.payment_id só vale para pagamento do mesmo provedor do webhook ou
+    ainda não vinculado a nenhum (sem external_id, vinculado na confirmação):
+    um provedor não mexe em pagamento de outro.
+    """
+    resolved: Dict[int, int] = {}
+    by_external: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+    candidates: Dict[int, Tuple[str, int]] = {}
+
+    for event in events:
+        data = event.payload.get("data") or {}
+        try:
+            if data.get("payment_id") is not None:
+                candidates[event.id] = (event.provider, int(data["payment_id"]))
+                continue
+        except (TypeError, ValueError):
+            continue
+        if data.get("external_id"):
+            by_external[(event.provider, str(data["external_id"]))].append(event.id)
+
+    if candidates:
+        owners = {
+            payment_id: (provider, external_id)
+            for payment_id, provider, external_id in (await session.exec(
+                select(Payment.id, Payment.provider, Payment.external_id)
+                .where(Payment.id.in_({pid for _, pid in candidates.values()}))
+            )).all()
+        }
+        for event_id, (provider, payment_id) in candidates.items():
+            if payment_id not in owners:
+                continue
+            owner, external_id = owners[payment_id]
+            if owner == provider or external_id is None:
+                resolved[event_id] = payment_id
+
+    if by_external:
+        rows = (await session.exec(
+            select(Payment.provider, Payment.external_id, Payment.id)
+            .where(tuple_(Payment.provider, Payment.external_id).in_(list(by_external)))
+        )).all()
+        for provider, external_id, payment_id in rows:
+            for event_id in by_external[(provider, external_id)]:
+                resolved[event_id] = payment_id
+
+    return resolved
+
+
+payment_worker = PaymentEventWorker()
@@ -0,0 +1,155 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Integer, String, column, update, values
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.appointment import Appointment
+from app.models.payment import Payment
+from app.core.stats import AppointmentSnapshot, apply_stats_changes
+from app.core.events import appointment_event, publish
+
+
+# colunas do agendamento que alimentam o rollup e os eventos (RETURNING dos UPDATEs)
+_RETURNING_COLUMNS = (
+    Appointment.id,
+    Appointment.payment_status,
+    Appointment.barber_id,
+    Appointment.appointment_time,
+    Appointment.status,
+    Appointment.service_price_snapshot,
+    Appointment.service_duration_snapshot,
+    Appointment.service_name_snapshot,
+)
+
+
+def _snapshot(row, payment_status: str) -> AppointmentSnapshot:
+    return AppointmentSnapshot(
+        barber_id=row.barber_id,
+        day=row.appointment_time.date(),
+        status=row.status,
+        payment_status=payment_status,
+        price=float(row.service_price_snapshot or 0),
+        duration=int(row.service_duration_snapshot or 0),
+        service_name=row.service_name_snapshot,
+    )
+
+
+async def _set_appointment_payment_status(
+    session: AsyncSession,
+    appointment_ids: Sequence[int],
+    from_status: Optional[str],
+    to_status: str,
+) -> None:
+    """
+    Atualiza payment_status dos agendamentos, aplica o delta no rollup e
+    publica appointment.<to_status> para as telas dos barbeiros.
+
+    from_status=None: qualquer status diferente de to_status. O rollup só
+    distingue pago de não pago, então o estado anterior é reconstruído a
+    partir do filtro usado no UPDATE.
+    """
+    if from_status is None:
+        status_filter = Appointment.payment_status != to_status
+        before_status = "unpaid" if to_status == "paid" else "paid"
+    else:
+        status_filter = Appointment.payment_status == from_status
+        before_status = from_status
+
+    changed = (await session.exec(
+        update(Appointment)
+        .where(Appointment.id.in_(appointment_ids), status_filter)
+        .values(payment_status=to_status)
+        .returning(*_RETURNING_COLUMNS)
+    )).all()
+
+    await apply_stats_changes(
+        session,
+        [(_snapshot(row, before_status), _snapshot(row, to_status)) for row in changed],
+    )
+    await publish(session, *(appointment_event(to_status, row) for row in changed))
+
+
+def _owned_by(barber_id: Optional[int]):
+    if barber_id is None:
+        return ()
+    return (Payment.appointment_id == Appointment.id, Appointment.barber_id == barber_id)
+
+
+async def confirm_payments(
+    session: AsyncSession,
+    payment_ids: Sequence[int],
+    barber_id: Optional[int] = None,
+    external_ids: Optional[Dict[int, Tuple[str, str]]] = None,
+) -> List[int]:
+    """
+    Confirma os pagamentos pendentes (do barbeiro, se informado) em duas
+    instruções UPDATE e atualiza os agendamentos e o rollup.
+
+    O filtro status = 'pending' torna a operação idempotente e segura sob
+    concorrência: um pagamento só é confirmado (e só entra no rollup) uma vez.
+    external_ids: pagamento -> (provedor, id no provedor) vindos do webhook;
+    gravados só em pagamentos que ainda não tinham external_id.
+    Retorna os ids efetivamente confirmados agora. Não faz commit.
+    """
+    confirmed = (await session.exec(
+        update(Payment)
+        .where(Payment.id.in_(payment_ids), Payment.status == "pending", *_owned_by(barber_id))
+        .values(status="paid", paid_at=datetime.utcnow())
+        .returning(Payment.id, Payment.appointment_id)
+    )).all()
+
+    if not confirmed:
+        return []
+
+    # id do provedor recebido no webhook, quando o pagamento ainda não tinha
+    known = [
+        (payment_id, *external_ids[payment_id])
+        for payment_id, _ in confirmed
+        if external_ids and payment_id in external_ids
+    ]
+    if known:
+        incoming = values(
+            column("id", Integer), column("provider", String), column("external_id", String), name="incoming"
+        ).data(known)
+        await session.exec(
+            update(Payment)
+            .where(Payment.id == incoming.c.id, Payment.external_id.is_(None))
+            .values(provider=incoming.c.provider, external_id=incoming.c.external_id)
+        )
+
+    await _set_appointment_payment_status(
+        session, sorted({appointment_id for _, appointment_id in confirmed}), None, "paid"
+    )
+
+    return [payment_id for payment_id, _ in confirmed]
+
+
+async def fail_payments(session: AsyncSession, payment_ids: Sequence[int]) -> List[int]:
+    """Marca como failed os pagamentos ainda pendentes. Não faz commit."""
+    failed = (await session.exec(
+        update(Payment)
+        .where(Payment.id.in_(payment_ids), Payment.status == "pending")
+        .values(status="failed")
+        .returning(Payment.id)
+    )).all()
+    return list(failed)
+
+
+async def refund_payments(session: AsyncSession, payment_ids: Sequence[int]) -> List[int]:
+    """Estorna pagamentos confirmados e tira a receita paga do rollup. Não faz commit."""
+    refunded = (await session.exec(
+        update(Payment)
+        .where(Payment.id.in_(payment_ids), Payment.status == "paid")
+        .values(status="refunded")
+        .returning(Payment.id, Payment.appointment_id)
+    )).all()
+
+    if not refunded:
+        return []
+
+    await _set_appointment_payment_status(
+        session, sorted({appointment_id for _, appointment_id in refunded}), "paid", "refunded"
+    )
+
+    return [payment_id for payment_id, _ in refunded]
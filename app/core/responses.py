@@ -0,0 +1,42 @@
+import json
+from typing import Any, Iterable, List, Sequence, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import SQLModel
+
+try:
+    import orjson
+except ImportError:  # sem orjson, cai no json da stdlib
+    orjson = None
+
+
+def dump_json(content: Any) -> bytes:
+    """JSON compacto em bytes; datetime/date/time viram strings ISO."""
+    if orjson is None:
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serializado com orjson.
+
+    orjson entende datetime/date/time nativamente e gera o mesmo formato
+    ISO do jsonable_encoder, então endpoints de listagem podem devolver
+    dicts crus (de consultas com projeção) sem passar pelo encoder do FastAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def projection(schema: Type[SQLModel], model: Type[SQLModel]) -> List[Any]:
+    """Colunas de `model` com os nomes dos campos de `schema`, na mesma ordem."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_to_dicts(names: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    """Linhas de uma consulta com projeção -> dicts prontos para FastJSONResponse."""
+    names = tuple(names)
+    return [dict(zip(names, row)) for row in rows]
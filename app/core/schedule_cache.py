@@ -0,0 +1,211 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.intervals import Interval, expand_recurring_blocks, load_blocks
+from app.models.business_hours import BusinessHours
+from app.models.time_block import RecurringTimeBlock, TimeBlock
+
+try:
+    import redis
+    import redis.asyncio as redis_async
+except ImportError:  # backend compartilhado é opcional
+    redis = None
+    redis_async = None
+
+
+# com REDIS_URL (e o pacote redis instalado) os workers compartilham a
+# geração de cada barbeiro: uma invalidação em um worker vale para todos
+REDIS_URL = os.getenv("REDIS_URL")
+
+SCHEDULE_CACHE_MAXSIZE = int(os.getenv("SCHEDULE_CACHE_MAXSIZE", "4096"))
+SCHEDULE_CACHE_TTL_SECONDS = float(os.getenv("SCHEDULE_CACHE_TTL_SECONDS", "300"))
+
+
+def _detached_hours(bh: BusinessHours) -> BusinessHours:
+    # cópia fora de qualquer sessão, compartilhada entre requisições (não alterar)
+    return BusinessHours(**bh.model_dump())
+
+
+def _detached_rule(rule: RecurringTimeBlock) -> RecurringTimeBlock:
+    return RecurringTimeBlock(**rule.model_dump())
+
+
+class ScheduleCache:
+    """
+    Horário de funcionamento e bloqueios por barbeiro, em memória.
+
+    Cada barbeiro tem uma geração; toda escrita na agenda fixa chama
+    invalidate(), que incrementa a geração. Entradas de geração antiga são
+    ignoradas e recarregadas do banco. Sem Redis a geração é local ao
+    processo e os outros workers só enxergam a mudança quando o TTL vence.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, redis_url: Optional[str] = None):
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+        self._redis = None
+        self._redis_async = None
+        if redis_url and redis is not None:
+            self._redis = redis.Redis.from_url(redis_url)
+            self._redis_async = redis_async.Redis.from_url(redis_url)
+
+    @staticmethod
+    def _generation_key(barber_id: int) -> str:
+        return f"schedule:gen:{barber_id}"
+
+    async def _generation(self, barber_id: int) -> Optional[int]:
+        """Geração atual do barbeiro; None = backend fora do ar (não usar cache)."""
+        if self._redis_async is None:
+            with self._lock:
+                return self._generations.get(barber_id, 0)
+
+        try:
+            value = await self._redis_async.get(self._generation_key(barber_id))
+        except redis.RedisError:
+            return None
+        return int(value or 0)
+
+    def invalidate(self, barber_id: int) -> None:
+        """Chamar depois do commit de qualquer alteração em horários ou bloqueios."""
+        with self._lock:
+            self._generations[barber_id] = self._generations.get(barber_id, 0) + 1
+
+        self._local.delete(("hours", barber_id))
+        self._local.delete(("blocks", barber_id))
+
+        if self._redis is not None:
+            try:
+                self._redis.incr(self._generation_key(barber_id))
+            except redis.RedisError:
+                # os outros workers recarregam quando o TTL vencer
+                pass
+
+    def _cached(self, key, generation: Optional[int]):
+        entry = self._local.get(key)
+        if entry is None or generation is None or entry[0] != generation:
+            return None
+        return entry[1]
+
+    def _store(self, key, generation: Optional[int], value) -> None:
+        # a geração foi lida antes da consulta: se houve invalidação no meio,
+        # a entrada já nasce velha e é recarregada na próxima leitura
+        if generation is not None:
+            self._local.set(key, (generation, value))
+
+    # =========================
+    # HORÁRIO DE FUNCIONAMENTO
+    # =========================
+
+    async def get_business_hours(
+        self,
+        session: AsyncSession,
+        barber_id: int,
+    ) -> Dict[int, BusinessHours]:
+        """weekday -> BusinessHours do barbeiro."""
+        key = ("hours", barber_id)
+        generation = await self._generation(barber_id)
+
+        hours = self._cached(key, generation)
+        if hours is not None:
+            return hours
+
+        rows = (await session.exec(
+            select(BusinessHours).where(BusinessHours.barber_id == barber_id)
+        )).all()
+
+        hours = {bh.weekday: _detached_hours(bh) for bh in rows}
+        self._store(key, generation, hours)
+        return hours
+
+    # =========================
+    # BLOQUEIOS
+    # =========================
+
+    @staticmethod
+    def _blocks_horizon() -> datetime:
+        # só bloqueios a partir de ontem ficam em memória; consultas mais
+        # antigas (raras) vão direto ao banco
+        yesterday = datetime.utcnow().date() - timedelta(days=1)
+        return datetime.combine(yesterday, datetime.min.time())
+
+    async def get_time_blocks(
+        self,
+        session: AsyncSession,
+        barber_id: int,
+        range_start: datetime,
+        range_end: datetime,
+    ) -> List[Interval]:
+        """
+        (início, fim) dos bloqueios do barbeiro que tocam [range_start, range_end),
+        incluindo as ocorrências dos bloqueios recorrentes.
+        """
+        key = ("blocks", barber_id)
+        generation = await self._generation(barber_id)
+
+        entry = self._cached(key, generation)
+        if entry is None or range_start < entry[0]:
+            horizon = self._blocks_horizon()
+
+            if range_start < horizon:
+                blocks = await load_blocks(session, [barber_id], range_start, range_end)
+                return blocks[barber_id]
+
+            rows = (await session.exec(
+                select(TimeBlock.start_time, TimeBlock.end_time)
+                .where(TimeBlock.barber_id == barber_id, TimeBlock.end_time > horizon)
+                .order_by(TimeBlock.start_time)
+            )).all()
+
+            # regras ficam em memória e são expandidas a cada leitura,
+            # só dentro do período pedido
+            rules = (await session.exec(
+                select(RecurringTimeBlock).where(
+                    RecurringTimeBlock.barber_id == barber_id,
+                    or_(
+                        RecurringTimeBlock.ends_on.is_(None),
+                        RecurringTimeBlock.ends_on >= horizon.date(),
+                    ),
+                )
+            )).all()
+
+            entry = (
+                horizon,
+                [(start, end) for start, end in rows],
+                [_detached_rule(rule) for rule in rules],
+            )
+            self._store(key, generation, entry)
+
+        _, intervals, rules = entry
+
+        blocks = [
+            (start, end)
+            for start, end in intervals
+            if end > range_start and start < range_end
+        ]
+        blocks.extend(
+            (start, end)
+            for _, start, end in expand_recurring_blocks(rules, range_start, range_end)
+        )
+        return blocks
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self._redis is not None else "local",
+            **self._local.stats(),
+        }
+
+
+schedule_cache = ScheduleCache(
+    maxsize=SCHEDULE_CACHE_MAXSIZE,
+    ttl=SCHEDULE_CACHE_TTL_SECONDS,
+    redis_url=REDIS_URL,
+)
@@ -1,13 +1,19 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.database import get_session
+from app.core.cache import TTLCache
+from app.database import get_async_session
 from app.models.user import User
 
 
@@ -24,7 +30,24 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 # HASH DE SENHA
 # =========================
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# custo do bcrypt (2^rounds); hashes com custo menor são refeitos no login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# pool dedicado: o bcrypt libera o GIL, então threads rodam em paralelo
+# sem ocupar o threadpool do FastAPI usado pelos endpoints sync
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
 
 
 def get_password_hash(password: str) -> str:
@@ -35,6 +58,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str,
+    hashed_password: str,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Retorna (senha_ok, novo_hash). novo_hash vem preenchido quando o hash
+    salvo está obsoleto (esquema ou custo antigo) e deve ser substituído.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
 # =========================
 # TOKEN JWT
 # =========================
@@ -55,13 +97,41 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# =========================
+# CACHE DE USUÁRIOS AUTENTICADOS
+# =========================
+
+# token -> cópia do usuário, para não consultar o banco a cada requisição.
+# A entrada nunca vive mais que o próprio token.
+principal_cache = TTLCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+)
+
+
+def _detached_copy(user: User) -> User:
+    # objeto fora de qualquer sessão: pode ser reutilizado entre requisições
+    return User(
+        id=user.id,
+        name=user.name,
+        email=user.email,
+        role=user.role,
+        password_hash=user.password_hash,
+    )
+
+
+def invalidate_user_cache(user_id: int) -> int:
+    """Descarta os tokens em cache do usuário. Chamar sempre que o usuário mudar."""
+    return principal_cache.delete_where(lambda _token, user: user.id == user_id)
+
+
 # =========================
 # USUÁRIO AUTENTICADO
 # =========================
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ) -> User:
 
     credentials_exception = HTTPException(
@@ -70,6 +140,10 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
@@ -80,14 +154,23 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = session.exec(
+    user = (await session.exec(
         select(User).where(User.email == email)
-    ).first()
+    )).first()
 
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = _detached_copy(user)
+
+    expires_in = payload["exp"] - time.time() if "exp" in payload else None
+    principal_cache.set(
+        token,
+        principal,
+        ttl=min(principal_cache.ttl, expires_in) if expires_in is not None else None,
+    )
+
+    return principal
 
 
 # =========================
@@ -0,0 +1,211 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.appointment import Appointment
+from app.models.daily_stats import BarberDailyServiceStats, BarberDailyStats
+
+
+STATUS_COLUMNS = ("pending", "confirmed", "completed", "canceled", "no_show")
+
+DAILY_COLUMNS = (
+    "total",
+    *STATUS_COLUMNS,
+    "revenue_completed",
+    "paid_revenue",
+    "unpaid_revenue",
+    "minutes_completed",
+)
+SERVICE_COLUMNS = ("total", "completed")
+
+
+class AppointmentSnapshot(NamedTuple):
+    barber_id: int
+    day: date
+    status: str
+    payment_status: str
+    price: float
+    duration: int
+    service_name: Optional[str]
+
+
+def appointment_snapshot(appt: Appointment) -> AppointmentSnapshot:
+    """Campos do agendamento que alimentam o rollup diário."""
+    return AppointmentSnapshot(
+        barber_id=appt.barber_id,
+        day=appt.appointment_time.date(),
+        status=appt.status,
+        payment_status=appt.payment_status,
+        price=float(appt.service_price_snapshot or 0),
+        duration=int(appt.service_duration_snapshot or 0),
+        service_name=appt.service_name_snapshot,
+    )
+
+
+def _add(
+    daily: Dict[Tuple[int, date], Dict[str, float]],
+    services: Dict[Tuple[int, date, str], Dict[str, int]],
+    snap: AppointmentSnapshot,
+    sign: int,
+):
+    row = daily[(snap.barber_id, snap.day)]
+    row["total"] += sign
+
+    if snap.status in STATUS_COLUMNS:
+        row[snap.status] += sign
+
+    if snap.status == "completed":
+        row["revenue_completed"] += sign * snap.price
+        row["minutes_completed"] += sign * snap.duration
+
+        if snap.payment_status == "paid":
+            row["paid_revenue"] += sign * snap.price
+        else:
+            row["unpaid_revenue"] += sign * snap.price
+
+    if snap.service_name:
+        svc = services[(snap.barber_id, snap.day, snap.service_name)]
+        svc["total"] += sign
+        if snap.status == "completed":
+            svc["completed"] += sign
+
+
+def stats_change_statements(
+    before: Optional[AppointmentSnapshot],
+    after: Optional[AppointmentSnapshot],
+) -> List[Insert]:
+    """
+    Upserts que aplicam no rollup a diferença entre dois estados de um agendamento.
+
+    Use before=None para agendamento novo. Os incrementos são feitos com
+    INSERT ... ON CONFLICT DO UPDATE, seguros sob concorrência.
+    """
+    statements: List[Insert] = []
+    if before == after:
+        return statements
+
+    daily: Dict[Tuple[int, date], Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    services: Dict[Tuple[int, date, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    if before:
+        _add(daily, services, before, -1)
+    if after:
+        _add(daily, services, after, 1)
+
+    for (barber_id, day), delta in daily.items():
+        delta = {k: v for k, v in delta.items() if v}
+        if not delta:
+            continue
+
+        values = {col: delta.get(col, 0) for col in DAILY_COLUMNS}
+        stmt = insert(BarberDailyStats).values(barber_id=barber_id, day=day, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["barber_id", "day"],
+            set_={
+                col: BarberDailyStats.__table__.c[col] + stmt.excluded[col]
+                for col in delta
+            },
+        )
+        statements.append(stmt)
+
+    for (barber_id, day, service_name), delta in services.items():
+        delta = {k: v for k, v in delta.items() if v}
+        if not delta:
+            continue
+
+        values = {col: delta.get(col, 0) for col in SERVICE_COLUMNS}
+        stmt = insert(BarberDailyServiceStats).values(
+            barber_id=barber_id, day=day, service_name=service_name, **values
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["barber_id", "day", "service_name"],
+            set_={
+                col: BarberDailyServiceStats.__table__.c[col] + stmt.excluded[col]
+                for col in delta
+            },
+        )
+        statements.append(stmt)
+
+    return statements
+
+
+def bulk_stats_statements(
+    changes: Iterable[Tuple[Optional[AppointmentSnapshot], Optional[AppointmentSnapshot]]],
+) -> List[Insert]:
+    """
+    Versão em lote de stats_change_statements: no máximo um upsert
+    multi-linha por tabela, com as diferenças já somadas por chave.
+    """
+    daily: Dict[Tuple[int, date], Dict[str, float]] = defaultdict(lambda: defaultdict(int))
+    services: Dict[Tuple[int, date, str], Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    for before, after in changes:
+        if before == after:
+            continue
+        if before:
+            _add(daily, services, before, -1)
+        if after:
+            _add(daily, services, after, 1)
+
+    statements: List[Insert] = []
+
+    daily_rows = [
+        {"barber_id": barber_id, "day": day, **{col: delta.get(col, 0) for col in DAILY_COLUMNS}}
+        for (barber_id, day), delta in daily.items()
+        if any(delta.values())
+    ]
+    if daily_rows:
+        stmt = insert(BarberDailyStats).values(daily_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["barber_id", "day"],
+            set_={
+                col: BarberDailyStats.__table__.c[col] + stmt.excluded[col]
+                for col in DAILY_COLUMNS
+            },
+        )
+        statements.append(stmt)
+
+    service_rows = [
+        {
+            "barber_id": barber_id,
+            "day": day,
+            "service_name": service_name,
+            **{col: delta.get(col, 0) for col in SERVICE_COLUMNS},
+        }
+        for (barber_id, day, service_name), delta in services.items()
+        if any(delta.values())
+    ]
+    if service_rows:
+        stmt = insert(BarberDailyServiceStats).values(service_rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["barber_id", "day", "service_name"],
+            set_={
+                col: BarberDailyServiceStats.__table__.c[col] + stmt.excluded[col]
+                for col in SERVICE_COLUMNS
+            },
+        )
+        statements.append(stmt)
+
+    return statements
+
+
+async def apply_stats_change(
+    session: AsyncSession,
+    before: Optional[AppointmentSnapshot],
+    after: Optional[AppointmentSnapshot],
+) -> None:
+    """Executa os upserts na transação da sessão (somem junto com um rollback)."""
+    for stmt in stats_change_statements(before, after):
+        await session.exec(stmt)
+
+
+async def apply_stats_changes(
+    session: AsyncSession,
+    changes: Iterable[Tuple[Optional[AppointmentSnapshot], Optional[AppointmentSnapshot]]],
+) -> None:
+    """Lote de mudanças (before, after) aplicado com no máximo dois upserts."""
+    for stmt in bulk_stats_statements(changes):
+        await session.exec(stmt)
@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, Interval as SQLInterval, func, literal, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import async_engine
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.waitlist import WaitlistEntry
+from app.core.booking import new_appointment, validate_slot
+from app.core.events import appointment_event, publish, waitlist_event
+from app.core.stats import appointment_snapshot, apply_stats_change
+
+
+# tempo que o cliente tem para aceitar uma vaga oferecida (auto_book=False)
+WAITLIST_OFFER_MINUTES = int(os.getenv("WAITLIST_OFFER_MINUTES", "15"))
+# entradas avaliadas por vaga liberada (as primeiras da fila)
+BACKFILL_MAX_CANDIDATES = 20
+# varredura das ofertas vencidas: a vaga de quem não aceitou vai para o próximo
+WAITLIST_SWEEPER_ENABLED = os.getenv("WAITLIST_SWEEPER_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+WAITLIST_SWEEP_SECONDS = float(os.getenv("WAITLIST_SWEEP_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+def waiting_for_slot_query(
+    barber_id: int,
+    slot_start: datetime,
+    exclude_client_id: Optional[int] = None,
+    exclude_entry_id: Optional[int] = None,
+):
+    """
+    Entradas em espera cuja janela comporta o serviço começando em slot_start,
+    por ordem de chegada, sem o cliente que liberou a vaga e sem a entrada
+    que acabou de perdê-la.
+
+    O filtro tsrange @> instante usa o índice GiST parcial
+    ix_waitlist_barber_window; o fim da janela (que depende da duração do
+    serviço de cada entrada) é conferido só nas poucas linhas encontradas.
+    """
+    duration = func.make_interval(0, 0, 0, 0, 0, Service.duration_minutes, type_=SQLInterval)
+    query = (
+        select(WaitlistEntry, Service)
+        .join(Service, Service.id == WaitlistEntry.service_id)
+        .where(
+            WaitlistEntry.barber_id == barber_id,
+            WaitlistEntry.status == "waiting",
+            func.tsrange(WaitlistEntry.window_start, WaitlistEntry.window_end).op("@>")(
+                literal(slot_start, DateTime)
+            ),
+            WaitlistEntry.window_end >= literal(slot_start, DateTime) + duration,
+            Service.active,
+        )
+    )
+    if exclude_client_id is not None:
+        query = query.where(WaitlistEntry.client_id != exclude_client_id)
+    if exclude_entry_id is not None:
+        query = query.where(WaitlistEntry.id != exclude_entry_id)
+
+    return (
+        query
+        .order_by(WaitlistEntry.created_at, WaitlistEntry.id)
+        .limit(BACKFILL_MAX_CANDIDATES)
+        .with_for_update(of=WaitlistEntry, skip_locked=True)
+    )
+
+
+async def expire_offers(
+    session: AsyncSession,
+    barber_id: Optional[int] = None,
+) -> List[Tuple[int, int, datetime]]:
+    """
+    Ofertas não aceitas no prazo voltam para a fila (de um barbeiro ou de
+    todos). Retorna (entrada, barbeiro, horário que estava oferecido), para
+    que a vaga seja repassada ao próximo da fila.
+
+    Ofertas travadas por um accept em andamento ficam de fora (SKIP LOCKED):
+    o accept resolve a própria oferta.
+    """
+    expired = (
+        select(WaitlistEntry.id, WaitlistEntry.offered_time)
+        .where(
+            WaitlistEntry.status == "offered",
+            WaitlistEntry.offer_expires_at < datetime.utcnow(),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    if barber_id is not None:
+        expired = expired.where(WaitlistEntry.barber_id == barber_id)
+    expired = expired.subquery()
+
+    rows = (await session.exec(
+        update(WaitlistEntry)
+        .where(WaitlistEntry.id == expired.c.id)
+        .values(status="waiting", offered_time=None, offer_expires_at=None)
+        .returning(WaitlistEntry.id, WaitlistEntry.barber_id, expired.c.offered_time)
+    )).all()
+    return [tuple(row) for row in rows]
+
+
+async def book_entry(
+    session: AsyncSession,
+    entry: WaitlistEntry,
+    service: Service,
+    start_time: datetime,
+) -> Appointment:
+    """
+    Cria o agendamento da entrada com a mesma validação de create_appointment.
+    Levanta HTTPException se o horário não serve mais. Não faz commit.
+    """
+    await validate_slot(session, service, start_time)
+
+    appointment = new_appointment(entry.client_id, service, start_time)
+    session.add(appointment)
+    await apply_stats_change(session, None, appointment_snapshot(appointment))
+    await session.flush()
+    await publish(session, appointment_event("created", appointment))
+
+    entry.status = "booked"
+    entry.appointment_id = appointment.id
+    entry.offered_time = None
+    entry.offer_expires_at = None
+    session.add(entry)
+    await publish(session, waitlist_event("booked", entry))
+    return appointment
+
+
+async def _fill_slot(
+    session: AsyncSession,
+    barber_id: int,
+    slot_start: datetime,
+    exclude_client_id: Optional[int] = None,
+    exclude_entry_id: Optional[int] = None,
+) -> Optional[WaitlistEntry]:
+    """
+    Passa a vaga para a primeira entrada da fila que couber nela. Cada
+    candidata roda num savepoint: horário recusado (HTTPException) ou
+    corrida com outra reserva (IntegrityError da constraint de sobreposição)
+    desfaz só aquela tentativa e segue para a próxima. Não faz commit.
+    """
+    if slot_start <= datetime.utcnow():
+        return None
+
+    candidates = (await session.exec(
+        waiting_for_slot_query(barber_id, slot_start, exclude_client_id, exclude_entry_id)
+    )).all()
+
+    for entry, service in candidates:
+        try:
+            async with session.begin_nested():
+                if entry.auto_book:
+                    await book_entry(session, entry, service, slot_start)
+                else:
+                    await validate_slot(session, service, slot_start)
+                    entry.status = "offered"
+                    entry.offered_time = slot_start
+                    entry.offer_expires_at = datetime.utcnow() + timedelta(minutes=WAITLIST_OFFER_MINUTES)
+                    session.add(entry)
+                    await session.flush()
+                    # o cliente fica sabendo pelo GET /events/waitlist
+                    await publish(session, waitlist_event("offered", entry))
+        except (HTTPException, IntegrityError):
+            continue
+        return entry
+
+    return None
+
+
+async def _refill_expired(session: AsyncSession, expired: List[Tuple[int, int, datetime]]) -> None:
+    # a vaga de quem deixou a oferta vencer vai para o próximo da fila
+    for entry_id, barber_id, offered_time in expired:
+        await _fill_slot(session, barber_id, offered_time, exclude_entry_id=entry_id)
+
+
+async def backfill_slot(
+    session: AsyncSession,
+    barber_id: int,
+    slot_start: datetime,
+    freed_by_client_id: Optional[int] = None,
+    exclude_entry_id: Optional[int] = None,
+) -> Optional[WaitlistEntry]:
+    """
+    Chamado quando um horário fica livre (agendamento cancelado, oferta
+    recusada ou vencida): passa a vaga para a primeira entrada da fila que
+    couber nela.
+
+    auto_book reserva na hora; senão a vaga é oferecida por
+    WAITLIST_OFFER_MINUTES (sem segurar o horário: quem reservar antes leva).
+    Entradas cujo serviço não cabe (ex.: mais longo que o buraco) são
+    puladas. Ofertas vencidas do barbeiro também são repassadas. Faz commit;
+    retorna a entrada atendida, se houver.
+    """
+    expired = await expire_offers(session, barber_id)
+
+    entry = await _fill_slot(session, barber_id, slot_start, freed_by_client_id, exclude_entry_id)
+    await _refill_expired(session, expired)
+
+    # grava e libera os locks das entradas avaliadas
+    await session.commit()
+    return entry
+
+
+async def backfill_after_commit(
+    barber_id: int,
+    slot_start: datetime,
+    freed_by_client_id: Optional[int] = None,
+    exclude_entry_id: Optional[int] = None,
+) -> None:
+    """
+    backfill_slot numa sessão própria, depois do commit da requisição: a
+    mudança que liberou a vaga já está gravada e uma falha aqui só vai para
+    o log (não vira 500 nem expira os objetos da requisição).
+    """
+    try:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await backfill_slot(session, barber_id, slot_start, freed_by_client_id, exclude_entry_id)
+    except Exception:
+        logger.exception("Falha ao repassar a vaga de %s (barbeiro %s) para a lista de espera", slot_start, barber_id)
+
+
+async def sweep_expired_offers() -> int:
+    """Repassa as vagas de todas as ofertas vencidas. Retorna quantas venceram."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        expired = await expire_offers(session)
+        await _refill_expired(session, expired)
+        await session.commit()
+    return len(expired)
+
+
+async def run_offer_sweeper(stop: asyncio.Event) -> None:
+    """Sem isso uma oferta vencida só voltaria a circular no próximo cancelamento."""
+    while not stop.is_set():
+        try:
+            await sweep_expired_offers()
+        except Exception:
+            logger.exception("Falha na varredura de ofertas vencidas da lista de espera")
+
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=WAITLIST_SWEEP_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,43 @@
+import hashlib
+import hmac
+import os
+import time
+from typing import Optional
+
+
+# tolerância do timestamp assinado (protege contra replay de requisições antigas)
+WEBHOOK_TOLERANCE_SECONDS = int(os.getenv("PAYMENT_WEBHOOK_TOLERANCE_SECONDS", "300"))
+
+
+def webhook_secret(provider: str) -> Optional[str]:
+    """PAYMENT_WEBHOOK_SECRET_<PROVIDER>, ou PAYMENT_WEBHOOK_SECRET para todos."""
+    return os.getenv(f"PAYMENT_WEBHOOK_SECRET_{provider.upper()}") or os.getenv("PAYMENT_WEBHOOK_SECRET")
+
+
+def sign_payload(secret: str, body: bytes, timestamp: Optional[int] = None) -> str:
+    """Valor do header X-Signature: t=<unix>,v1=<hmac-sha256 de "<t>.<corpo>">."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={digest}"
+
+
+def verify_signature(
+    secret: str,
+    body: bytes,
+    header: Optional[str],
+    tolerance: int = WEBHOOK_TOLERANCE_SECONDS,
+) -> bool:
+    if not header:
+        return False
+
+    parts = dict(item.split("=", 1) for item in header.split(",") if "=" in item)
+    try:
+        timestamp = int(parts.get("t", ""))
+    except ValueError:
+        return False
+
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+
+    expected = sign_payload(secret, body, timestamp).split("v1=", 1)[1]
+    return hmac.compare_digest(expected, parts.get("v1", ""))
@@ -1,6 +1,23 @@
+import asyncio
+
 from fastapi import FastAPI
-from app.database import create_db_and_tables
-from app.models import user, service, appointment
+from fastapi.responses import PlainTextResponse
+from app.database import (
+    async_engine,
+    async_read_engine,
+    check_schema_version,
+    engine,
+    get_pool_stats,
+    read_engine,
+)
+from app.core.instrumentation import InstrumentationMiddleware, install_sql_instrumentation
+from app.core.metrics import metrics
+from app.core.responses import FastJSONResponse
+from app.core.schedule_cache import schedule_cache
+from app.core.payment_worker import PAYMENT_WORKER_ENABLED, payment_worker
+from app.core.events import EVENTS_ENABLED, broker
+from app.core.waitlist import WAITLIST_SWEEPER_ENABLED, run_offer_sweeper
+from app.models import user, service, appointment, daily_stats
 from app.routers import users
 from app.routers import auth
 from app.routers import services
@@ -8,8 +25,18 @@ from app.routers import appointments
 from app.routers import business_hours, time_blocks
 from app.routers import dashboard
 from app.routers import payments
+from app.routers import schedule
+from app.routers import exports
+from app.routers import webhooks
+from app.routers import waitlist
+from app.routers import events
+
+app = FastAPI(default_response_class=FastJSONResponse)
+app.add_middleware(InstrumentationMiddleware)
+install_sql_instrumentation(
+    [engine, read_engine, async_engine.sync_engine, async_read_engine.sync_engine]
+)
 
-app = FastAPI()
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(services.router)
@@ -18,12 +45,96 @@ app.include_router(business_hours.router)
 app.include_router(time_blocks.router)
 app.include_router(dashboard.router)
 app.include_router(payments.router)
+app.include_router(schedule.router)
+app.include_router(exports.router)
+app.include_router(webhooks.router)
+app.include_router(waitlist.router)
+app.include_router(events.router)
+
+_payment_worker_stop = asyncio.Event()
+_payment_worker_task = None
+
+_events_stop = asyncio.Event()
+_events_task = None
+
+_waitlist_sweeper_stop = asyncio.Event()
+_waitlist_sweeper_task = None
 
 
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
+    check_schema_version()
+
+
+@app.on_event("startup")
+async def start_payment_worker():
+    global _payment_worker_task
+    if PAYMENT_WORKER_ENABLED:
+        _payment_worker_stop.clear()
+        _payment_worker_task = asyncio.create_task(payment_worker.run_forever(_payment_worker_stop))
+
+
+@app.on_event("shutdown")
+async def stop_payment_worker():
+    if _payment_worker_task:
+        _payment_worker_stop.set()
+        await _payment_worker_task
+
+
+@app.on_event("startup")
+async def start_event_listener():
+    global _events_task
+    if EVENTS_ENABLED:
+        _events_stop.clear()
+        _events_task = asyncio.create_task(broker.run_forever(_events_stop))
+
+
+@app.on_event("shutdown")
+async def stop_event_listener():
+    if _events_task:
+        _events_stop.set()
+        await _events_task
+
+
+@app.on_event("startup")
+async def start_waitlist_sweeper():
+    global _waitlist_sweeper_task
+    if WAITLIST_SWEEPER_ENABLED:
+        _waitlist_sweeper_stop.clear()
+        _waitlist_sweeper_task = asyncio.create_task(run_offer_sweeper(_waitlist_sweeper_stop))
+
+
+@app.on_event("shutdown")
+async def stop_waitlist_sweeper():
+    if _waitlist_sweeper_task:
+        _waitlist_sweeper_stop.set()
+        await _waitlist_sweeper_task
 
 @app.get("/")
 def root():
     return {"message": "API sistema_agendamento funcionando 🚀"}
+
+
+@app.get("/health/db-pool")
+def db_pool_health():
+    return get_pool_stats()
+
+
+@app.get("/health/schedule-cache")
+def schedule_cache_health():
+    return schedule_cache.stats()
+
+
+@app.get("/health/payment-worker")
+def payment_worker_health():
+    return payment_worker.stats()
+
+
+@app.get("/health/events")
+def events_health():
+    return broker.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,9 +1,39 @@
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
+from sqlalchemy import Index, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlmodel import SQLModel, Field
 
 
 class Appointment(SQLModel, table=True):
+    # o banco recusa dois agendamentos ativos sobrepostos do mesmo barbeiro
+    # (precisa da extensão btree_gist, criada na migration 0002)
+    __table_args__ = (
+        ExcludeConstraint(
+            ("barber_id", "="),
+            (
+                text(
+                    "tsrange(appointment_time, "
+                    "appointment_time + make_interval(mins => service_duration_snapshot))"
+                ),
+                "&&",
+            ),
+            name="appointment_no_overlap",
+            using="gist",
+            where=text("status <> 'canceled'"),
+        ),
+        # conflito de reserva, disponibilidade, grade: barbeiro + período, só ativos
+        Index(
+            "ix_appointment_barber_time_active",
+            "barber_id",
+            "appointment_time",
+            postgresql_where=text("status <> 'canceled'"),
+        ),
+        # listagem paginada (keyset em appointment_time, id)
+        Index("ix_appointment_barber_time_id", "barber_id", "appointment_time", "id"),
+        Index("ix_appointment_client_time_id", "client_id", "appointment_time", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     client_id: int = Field(foreign_key="user.id", index=True)
@@ -30,3 +60,35 @@ class Appointment(SQLModel, table=True):
     canceled_at: Optional[datetime] = Field(default=None, index=True)
     canceled_by: Optional[str] = None
     cancel_reason: Optional[str] = None
+
+
+class AppointmentRead(SQLModel):
+    # colunas padrão da listagem; as demais só com ?fields=
+    id: int
+    client_id: int
+    barber_id: int
+    service_id: int
+    appointment_time: datetime
+    status: str
+    payment_status: str
+    service_name_snapshot: str
+    service_price_snapshot: float
+    service_duration_snapshot: int
+
+
+class AppointmentCreate(SQLModel):
+    service_id: int
+    appointment_time: datetime
+
+
+class AppointmentSeriesCreate(SQLModel):
+    service_id: int
+    # primeira ocorrência; as demais repetem o mesmo horário
+    first_appointment_time: datetime
+    # weekly | biweekly
+    frequency: str = "weekly"
+    # informe count ou until (data da última ocorrência possível, inclusive)
+    count: Optional[int] = None
+    until: Optional[date] = None
+    # false: se alguma ocorrência conflitar, nada é criado
+    skip_conflicts: bool = True
@@ -1,9 +1,15 @@
 from typing import Optional
 from datetime import time
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class BusinessHours(SQLModel, table=True):
+    # uma configuração por barbeiro por dia da semana
+    __table_args__ = (
+        Index("uq_businesshours_barber_weekday", "barber_id", "weekday", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     barber_id: int = Field(foreign_key="user.id", index=True)
@@ -19,3 +25,13 @@ class BusinessHours(SQLModel, table=True):
     # opcional: intervalo de almoço
     lunch_start: Optional[time] = None
     lunch_end: Optional[time] = None
+
+
+class BusinessHoursRead(SQLModel):
+    id: int
+    weekday: int
+    is_closed: bool
+    open_time: Optional[time] = None
+    close_time: Optional[time] = None
+    lunch_start: Optional[time] = None
+    lunch_end: Optional[time] = None
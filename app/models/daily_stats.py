@@ -0,0 +1,34 @@
+from datetime import date
+from sqlmodel import SQLModel, Field
+
+
+class BarberDailyStats(SQLModel, table=True):
+    __tablename__ = "barber_daily_stats"
+
+    # uma linha por barbeiro por dia, mantida incrementalmente (app/core/stats.py)
+    barber_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+
+    total: int = 0
+    pending: int = 0
+    confirmed: int = 0
+    completed: int = 0
+    canceled: int = 0
+    no_show: int = 0
+
+    # somente agendamentos concluídos
+    revenue_completed: float = 0
+    paid_revenue: float = 0
+    unpaid_revenue: float = 0
+    minutes_completed: int = 0
+
+
+class BarberDailyServiceStats(SQLModel, table=True):
+    __tablename__ = "barber_daily_service_stats"
+
+    barber_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    service_name: str = Field(primary_key=True)
+
+    total: int = 0
+    completed: int = 0
@@ -1,16 +1,37 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from sqlalchemy import Column, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import SQLModel, Field
 
 
 class Payment(SQLModel, table=True):
+    __table_args__ = (
+        # retry do cliente com o mesmo Idempotency-Key devolve o mesmo pagamento;
+        # a chave vale por cliente (a de um não enxerga nem colide com a de outro)
+        Index("uq_payment_client_idempotency_key", "client_id", "idempotency_key", unique=True),
+        # no máximo um pagamento em aberto por agendamento
+        Index(
+            "uq_payment_appointment_pending",
+            "appointment_id",
+            unique=True,
+            postgresql_where=text("status = 'pending'"),
+        ),
+        # webhooks identificam o pagamento pelo id do provedor
+        Index("ix_payment_provider_external_id", "provider", "external_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     appointment_id: int = Field(foreign_key="appointment.id", index=True)
+    # dono do agendamento (escopo do Idempotency-Key)
+    client_id: int = Field(foreign_key="user.id")
 
     provider: str  # stripe | mercadopago | manual
     external_id: Optional[str] = None  # id do Stripe, por exemplo
 
+    idempotency_key: Optional[str] = Field(default=None, max_length=255)
+
     amount: float
 
     status: str = Field(default="pending", index=True)
@@ -18,3 +39,41 @@ class Payment(SQLModel, table=True):
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
     paid_at: Optional[datetime] = None
+
+
+class PaymentBatchConfirm(SQLModel):
+    payment_ids: List[int]
+
+
+class PaymentEvent(SQLModel, table=True):
+    """
+    Fila local de eventos de webhook do provedor de pagamento.
+
+    O webhook só grava aqui; o worker (app/core/payment_worker.py) consome
+    em lotes. (provider, event_id) único: retries do provedor viram no-op.
+    """
+    __tablename__ = "payment_event"
+    __table_args__ = (
+        UniqueConstraint("provider", "event_id", name="uq_payment_event_provider_event"),
+        # fila: só os ainda não processados, em ordem de chegada
+        Index(
+            "ix_payment_event_unprocessed",
+            "id",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    provider: str
+    event_id: str = Field(max_length=255)
+    event_type: str
+    # payment.succeeded | payment.failed | payment.refunded
+
+    payload: Dict[str, Any] = Field(sa_column=Column(JSONB, nullable=False))
+
+    received_at: datetime = Field(default_factory=datetime.utcnow)
+    processed_at: Optional[datetime] = None
+
+    attempts: int = 0
+    last_error: Optional[str] = None
@@ -1,8 +1,14 @@
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class Service(SQLModel, table=True):
+    # nome único por barbeiro: chave natural do provisionamento (ON CONFLICT)
+    __table_args__ = (
+        Index("uq_service_barber_name", "barber_id", "name", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     name: str
@@ -11,3 +17,11 @@ class Service(SQLModel, table=True):
     active: bool = True
 
     barber_id: int = Field(foreign_key="user.id")
+
+
+class ServiceRead(SQLModel):
+    id: int
+    name: str
+    duration_minutes: int
+    price: float
+    active: bool
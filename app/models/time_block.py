@@ -1,9 +1,15 @@
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime, time
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class TimeBlock(SQLModel, table=True):
+    # busca por sobreposição: barbeiro + end_time > início (start_time filtrado no índice)
+    __table_args__ = (
+        Index("ix_timeblock_barber_end_start", "barber_id", "end_time", "start_time"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     barber_id: int = Field(foreign_key="user.id", index=True)
@@ -12,3 +18,53 @@ class TimeBlock(SQLModel, table=True):
     end_time: datetime = Field(index=True)
 
     reason: str = "Bloqueio"
+
+
+class TimeBlockRead(SQLModel):
+    id: int
+    start_time: datetime
+    end_time: datetime
+    reason: str
+
+
+class RecurringTimeBlock(SQLModel, table=True):
+    # regra guardada uma vez; as ocorrências são geradas só para o período consultado
+    __table_args__ = (
+        Index("ix_recurringtimeblock_barber_weekday", "barber_id", "weekday"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    barber_id: int = Field(foreign_key="user.id")
+
+    # 0=segunda ... 6=domingo
+    weekday: int
+
+    start_time: time
+    end_time: time
+
+    # a cada N semanas, contando a partir de starts_on
+    interval_weeks: int = 1
+
+    # primeira ocorrência (sempre no weekday da regra) e última data possível
+    starts_on: date
+    ends_on: Optional[date] = None
+
+    reason: str = "Bloqueio"
+
+
+class TimeBlockCreate(SQLModel):
+    start_time: datetime
+    end_time: datetime
+    reason: str = "Bloqueio"
+
+
+class RecurringTimeBlockCreate(SQLModel):
+    weekday: int
+    start_time: time
+    end_time: time
+    interval_weeks: int = 1
+    # padrão: hoje
+    starts_on: Optional[date] = None
+    ends_on: Optional[date] = None
+    reason: str = "Bloqueio"
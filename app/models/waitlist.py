@@ -0,0 +1,58 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import Index, text
+from sqlmodel import SQLModel, Field
+
+
+class WaitlistEntry(SQLModel, table=True):
+    """
+    Cliente esperando vaga com um barbeiro/serviço dentro de uma janela.
+
+    Uma janela por linha; para várias janelas, várias entradas.
+    waiting → booked (auto_book) ou offered → booked | waiting; canceled pelo cliente.
+    """
+    __tablename__ = "waitlist_entry"
+    __table_args__ = (
+        # vaga liberada às HH:MM: quais janelas em espera contêm esse instante?
+        # GiST em (barbeiro, tsrange) precisa do btree_gist (migration 0002)
+        Index(
+            "ix_waitlist_barber_window",
+            "barber_id",
+            text("tsrange(window_start, window_end)"),
+            postgresql_using="gist",
+            postgresql_where=text("status = 'waiting'"),
+        ),
+        Index("ix_waitlist_client_created", "client_id", "created_at"),
+        # ofertas vencidas voltam para a fila (poucas linhas por barbeiro)
+        Index("ix_waitlist_barber_offered", "barber_id", postgresql_where=text("status = 'offered'")),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    client_id: int = Field(foreign_key="user.id")
+    barber_id: int = Field(foreign_key="user.id")
+    service_id: int = Field(foreign_key="service.id")
+
+    # o atendimento inteiro precisa caber em [window_start, window_end)
+    window_start: datetime
+    window_end: datetime
+
+    # True: reserva sozinho quando vagar; False: só oferece e o cliente aceita
+    auto_book: bool = True
+
+    status: str = Field(default="waiting")
+    # waiting | offered | booked | canceled
+
+    offered_time: Optional[datetime] = None
+    offer_expires_at: Optional[datetime] = None
+
+    appointment_id: Optional[int] = Field(default=None, foreign_key="appointment.id")
+
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class WaitlistCreate(SQLModel):
+    service_id: int
+    window_start: datetime
+    window_end: datetime
+    auto_book: bool = True
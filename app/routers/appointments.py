@@ -1,76 +1,135 @@
+import base64
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Tuple
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-
-from app.database import get_session
-from app.models.appointment import Appointment
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session
+from app.models.appointment import (
+    Appointment,
+    AppointmentCreate,
+    AppointmentRead,
+    AppointmentSeriesCreate,
+)
 from app.models.service import Service
 from app.models.user import User
-from app.models.business_hours import BusinessHours
-from app.models.time_block import TimeBlock
+from app.core.responses import FastJSONResponse, rows_to_dicts
 from app.core.security import get_current_user
+from app.core.schedule_cache import schedule_cache
+from app.core.booking import is_overlap_violation, new_appointment, validate_slot
+from app.core.events import appointment_event, publish
+from app.core.waitlist import backfill_after_commit
+from app.core.stats import appointment_snapshot, apply_stats_change, apply_stats_changes
+from app.core.intervals import (
+    Interval,
+    SlotSweeper,
+    busy_appointments_query,
+    business_window,
+    load_blocks,
+    lock_barber_schedule,
+    merge_intervals,
+)
 
 
 router = APIRouter(prefix="/appointments", tags=["appointments"])
 
 SLOT_STEP = timedelta(minutes=15)
 CANCEL_MIN_HOURS_BEFORE = 2
+AVAILABILITY_MAX_DAYS = 42
 
+RECURRENCE_DAYS = {"weekly": 7, "biweekly": 14}
+RECURRENCE_MAX_OCCURRENCES = 52
 
-# =========================
-# HELPERS
-# =========================
+LIST_DEFAULT_LIMIT = 50
+LIST_MAX_LIMIT = 200
+LIST_FIELDS = tuple(Appointment.__table__.columns.keys())
 
-def _overlaps(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime) -> bool:
-    return a_start < b_end and a_end > b_start
 
+# =========================
+# DISPONIBILIDADE
+# =========================
 
-def _build_busy_intervals_for_day(
-    session: Session,
+@router.get("/availability")
+async def get_availability(
     barber_id: int,
-    day_start: datetime,
-    day_end: datetime,
-) -> List[Tuple[datetime, datetime]]:
-
-    busy: List[Tuple[datetime, datetime]] = []
-
-    appointments = session.exec(
-        select(Appointment).where(
-            Appointment.barber_id == barber_id,
-            Appointment.appointment_time >= day_start,
-            Appointment.appointment_time < day_end,
-            Appointment.status != "canceled",
-        )
-    ).all()
-
-    for appt in appointments:
-        start = appt.appointment_time
-        end = start + timedelta(minutes=appt.service_duration_snapshot or 0)
-        busy.append((start, end))
-
-    blocks = session.exec(
-        select(TimeBlock).where(
-            TimeBlock.barber_id == barber_id,
-            TimeBlock.start_time < day_end,
-            TimeBlock.end_time > day_start,
+    service_id: int,
+    start_date: date,
+    end_date: date,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Horários livres (passo de 15 min) para o serviço entre start_date e end_date (inclusive).
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date deve ser maior ou igual a start_date")
+
+    total_days = (end_date - start_date).days + 1
+    if total_days > AVAILABILITY_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Período máximo de {AVAILABILITY_MAX_DAYS} dias",
         )
-    ).all()
 
-    for b in blocks:
-        busy.append((b.start_time, b.end_time))
+    service = await session.get(Service, service_id)
+    if not service or not service.active or service.barber_id != barber_id:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
 
-    return busy
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
 
+    # horários e bloqueios vêm do cache; agendamentos, uma consulta para o período inteiro
+    hours_by_weekday = await schedule_cache.get_business_hours(session, barber_id)
 
-def _get_business_hours_for_day(session: Session, barber_id: int, day: date):
-    return session.exec(
-        select(BusinessHours).where(
-            BusinessHours.barber_id == barber_id,
-            BusinessHours.weekday == day.weekday(),
-        )
-    ).first()
+    busy: List[Interval] = []
+
+    appointment_rows = (await session.exec(
+        busy_appointments_query([barber_id], range_start, range_end)
+    )).all()
+
+    for _, appt_start, duration in appointment_rows:
+        busy.append((appt_start, appt_start + timedelta(minutes=duration or 0)))
+
+    busy.extend(await schedule_cache.get_time_blocks(session, barber_id, range_start, range_end))
+
+    windows = []
+    for offset in range(total_days):
+        day = start_date + timedelta(days=offset)
+        window = business_window(day, hours_by_weekday.get(day.weekday()))
+        windows.append((day, window))
+        if window:
+            busy.extend(window[2])
+
+    sweeper = SlotSweeper(merge_intervals(busy))
+    duration = timedelta(minutes=service.duration_minutes)
+    now = datetime.utcnow()
+
+    days = []
+    for day, window in windows:
+        slots: List[datetime] = []
+
+        if window:
+            open_dt, close_dt, _ = window
+            slots = [
+                s for s in sweeper.free_slots(open_dt, close_dt, duration, SLOT_STEP)
+                if s >= now
+            ]
+
+        days.append({
+            "date": day.isoformat(),
+            "slots": [s.isoformat() for s in slots],
+        })
+
+    return {
+        "barber_id": barber_id,
+        "service_id": service_id,
+        "duration_minutes": service.duration_minutes,
+        "days": days,
+    }
 
 
 # =========================
@@ -78,78 +137,267 @@ def _get_business_hours_for_day(session: Session, barber_id: int, day: date):
 # =========================
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
-def create_appointment(
-    appointment: Appointment,
-    session: Session = Depends(get_session),
+async def create_appointment(
+    payload: AppointmentCreate,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
 
     if current_user.role != "client":
         raise HTTPException(status_code=403, detail="Apenas clientes podem agendar")
 
-    service = session.get(Service, appointment.service_id)
+    service = await session.get(Service, payload.service_id)
     if not service or not service.active:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
 
-    barber_id = service.barber_id
-    start_time = appointment.appointment_time
-    end_time = start_time + timedelta(minutes=service.duration_minutes)
+    await validate_slot(session, service, payload.appointment_time)
 
-    hours = _get_business_hours_for_day(session, barber_id, start_time.date())
-    if not hours or hours.is_closed or not hours.open_time or not hours.close_time:
-        raise HTTPException(status_code=400, detail="Barbearia fechada nesse dia")
+    appointment = new_appointment(current_user.id, service, payload.appointment_time)
 
-    day_start = datetime.combine(start_time.date(), hours.open_time)
-    day_end = datetime.combine(start_time.date(), hours.close_time)
+    session.add(appointment)
+    await apply_stats_change(session, None, appointment_snapshot(appointment))
+
+    try:
+        await session.flush()
+        await publish(session, appointment_event("created", appointment))
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        if not is_overlap_violation(exc):
+            raise
+        # constraint appointment_no_overlap: outra reserva venceu a corrida
+        raise HTTPException(status_code=409, detail="Horário acabou de ser reservado")
+
+    await session.refresh(appointment)
+    return appointment
 
-    if start_time < day_start or end_time > day_end:
-        raise HTTPException(status_code=400, detail="Fora do horário de funcionamento")
 
-    busy_intervals = _build_busy_intervals_for_day(session, barber_id, day_start, day_end)
+# =========================
+# AGENDAMENTO RECORRENTE
+# =========================
 
-    for b_start, b_end in busy_intervals:
-        if _overlaps(start_time, end_time, b_start, b_end):
-            raise HTTPException(status_code=400, detail="Horário indisponível")
+def _expand_recurrence(payload: AppointmentSeriesCreate) -> List[datetime]:
+    step = RECURRENCE_DAYS.get(payload.frequency)
+    if step is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"frequency deve ser um de: {', '.join(RECURRENCE_DAYS)}",
+        )
 
-    # 🔥 Dados forçados
-    appointment.client_id = current_user.id
-    appointment.barber_id = barber_id
-    appointment.status = "pending"
+    if (payload.count is None) == (payload.until is None):
+        raise HTTPException(status_code=400, detail="Informe count ou until (apenas um)")
 
-    # 🔥 Snapshot financeiro
-    appointment.service_name_snapshot = service.name
-    appointment.service_price_snapshot = service.price
-    appointment.service_duration_snapshot = service.duration_minutes
+    first = payload.first_appointment_time
 
-    appointment.payment_status = "unpaid"
+    if payload.count is not None:
+        if payload.count < 1 or payload.count > RECURRENCE_MAX_OCCURRENCES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"count deve ser entre 1 e {RECURRENCE_MAX_OCCURRENCES}",
+            )
+        total = payload.count
+    else:
+        if payload.until < first.date():
+            raise HTTPException(status_code=400, detail="until deve ser maior ou igual à primeira data")
+        total = (payload.until - first.date()).days // step + 1
+        if total > RECURRENCE_MAX_OCCURRENCES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Máximo de {RECURRENCE_MAX_OCCURRENCES} ocorrências",
+            )
 
-    session.add(appointment)
-    session.commit()
-    session.refresh(appointment)
-    return appointment
+    return [first + timedelta(days=step * i) for i in range(total)]
+
+
+@router.post("/recurring", status_code=status.HTTP_201_CREATED)
+async def create_recurring_appointments(
+    payload: AppointmentSeriesCreate,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cria uma série semanal/quinzenal do mesmo serviço no mesmo horário.
+
+    Todas as ocorrências são validadas contra expediente, almoço, bloqueios
+    e agendamentos com uma consulta por tabela para o período inteiro, e as
+    aceitas são inseridas numa única transação. As recusadas voltam em
+    `conflicts`; com skip_conflicts=false qualquer conflito cancela a série.
+    """
+
+    if current_user.role != "client":
+        raise HTTPException(status_code=403, detail="Apenas clientes podem agendar")
+
+    occurrences = _expand_recurrence(payload)
+
+    service = await session.get(Service, payload.service_id)
+    if not service or not service.active:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+
+    barber_id = service.barber_id
+    duration = timedelta(minutes=service.duration_minutes)
+
+    range_start = datetime.combine(occurrences[0].date(), datetime.min.time())
+    range_end = datetime.combine(occurrences[-1].date() + timedelta(days=1), datetime.min.time())
+
+    hours_by_weekday = await schedule_cache.get_business_hours(session, barber_id)
+
+    # mesmo lock da reserva avulsa; a leitura abaixo já vê o estado final
+    await lock_barber_schedule(session, barber_id)
+
+    busy: List[Interval] = [
+        (appt_start, appt_start + timedelta(minutes=appt_duration or 0))
+        for _, appt_start, appt_duration in (await session.exec(
+            busy_appointments_query([barber_id], range_start, range_end)
+        )).all()
+    ]
+    blocks = await load_blocks(session, [barber_id], range_start, range_end)
+    busy.extend(blocks[barber_id])
+
+    windows = []
+    for start_time in occurrences:
+        window = business_window(start_time.date(), hours_by_weekday.get(start_time.weekday()))
+        windows.append(window)
+        if window:
+            busy.extend(window[2])
+
+    # ocorrências em ordem crescente: uma varredura só sobre os ocupados
+    sweeper = SlotSweeper(merge_intervals(busy))
+
+    accepted: List[datetime] = []
+    conflicts = []
+
+    for start_time, window in zip(occurrences, windows):
+        end_time = start_time + duration
+
+        if not window:
+            reason = "Barbearia fechada nesse dia"
+        elif start_time < window[0] or end_time > window[1]:
+            reason = "Fora do horário de funcionamento"
+        elif not sweeper.is_free(start_time, end_time):
+            reason = "Horário indisponível"
+        else:
+            accepted.append(start_time)
+            continue
+
+        conflicts.append({"appointment_time": start_time.isoformat(), "reason": reason})
+
+    if conflicts and not payload.skip_conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Série com conflitos; nada foi criado", "conflicts": conflicts},
+        )
+
+    appointments = [new_appointment(current_user.id, service, start_time) for start_time in accepted]
+
+    if appointments:
+        session.add_all(appointments)
+        await apply_stats_changes(
+            session, [(None, appointment_snapshot(appt)) for appt in appointments]
+        )
+
+        try:
+            await session.flush()
+            await publish(session, *(appointment_event("created", appt) for appt in appointments))
+            await session.commit()
+        except IntegrityError as exc:
+            await session.rollback()
+            if not is_overlap_violation(exc):
+                raise
+            raise HTTPException(status_code=409, detail="Horário acabou de ser reservado")
+
+    return {
+        "frequency": payload.frequency,
+        "requested": len(occurrences),
+        "created": appointments,
+        "conflicts": conflicts,
+    }
 
 
 # =========================
 # LISTAR AGENDAMENTOS
 # =========================
 
+def _encode_cursor(appointment_time: datetime, appointment_id: int) -> str:
+    raw = f"{appointment_time.isoformat()}|{appointment_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_time, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(raw_time), int(raw_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+
+
 @router.get("/")
-def list_appointments(
-    session: Session = Depends(get_session),
+async def list_appointments(
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    payment_status: Optional[str] = None,
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Lista paginada por cursor (keyset em appointment_time, id).
+
+    Por padrão vêm só as colunas de AppointmentRead; fields escolhe outras
+    (separadas por vírgula; id e appointment_time sempre vêm, pois formam o
+    cursor). Passe next_cursor em `cursor` para a próxima página.
+    """
 
     if current_user.role == "client":
-        return session.exec(
-            select(Appointment).where(Appointment.client_id == current_user.id)
-        ).all()
+        owner_filter = Appointment.client_id == current_user.id
+    elif current_user.role == "barber":
+        owner_filter = Appointment.barber_id == current_user.id
+    else:
+        raise HTTPException(status_code=403, detail="Sem permissão")
+
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in LIST_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}")
+        columns = ["id", "appointment_time"] + [f for f in requested if f not in ("id", "appointment_time")]
+    else:
+        columns = list(AppointmentRead.model_fields)
+
+    query = select(*[getattr(Appointment, c) for c in columns]).where(owner_filter)
+
+    if date_from:
+        query = query.where(Appointment.appointment_time >= date_from)
+    if date_to:
+        query = query.where(Appointment.appointment_time < date_to)
+    if status_filter:
+        query = query.where(Appointment.status == status_filter)
+    if payment_status:
+        query = query.where(Appointment.payment_status == payment_status)
+
+    if cursor:
+        after_time, after_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(Appointment.appointment_time, Appointment.id) > tuple_(after_time, after_id)
+        )
 
-    if current_user.role == "barber":
-        return session.exec(
-            select(Appointment).where(Appointment.barber_id == current_user.id)
-        ).all()
+    # uma linha a mais só para saber se existe próxima página
+    rows = (await session.exec(
+        query.order_by(Appointment.appointment_time, Appointment.id).limit(limit + 1)
+    )).all()
 
-    raise HTTPException(status_code=403, detail="Sem permissão")
+    items = rows_to_dicts(columns, rows[:limit])
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = _encode_cursor(last["appointment_time"], last["id"])
+
+    # dicts crus direto para o orjson, sem jsonable_encoder
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
 
 
 # =========================
@@ -157,14 +405,16 @@ def list_appointments(
 # =========================
 
 @router.patch("/{appointment_id}/cancel")
-def cancel_appointment(
+async def cancel_appointment(
     appointment_id: int,
     reason: str = "Cancelado",
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
 
-    appt = session.get(Appointment, appointment_id)
+    # FOR UPDATE: transições concorrentes do mesmo agendamento esperam aqui,
+    # senão as duas calculam o delta do rollup a partir do mesmo estado
+    appt = await session.get(Appointment, appointment_id, with_for_update=True)
     if not appt:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
 
@@ -185,14 +435,21 @@ def cancel_appointment(
                 detail=f"Cancelamento permitido apenas até {CANCEL_MIN_HOURS_BEFORE}h antes",
             )
 
+    before = appointment_snapshot(appt)
+
     appt.status = "canceled"
     appt.canceled_at = datetime.utcnow()
     appt.canceled_by = "client" if is_client else "barber"
     appt.cancel_reason = reason
 
     session.add(appt)
-    session.commit()
-    session.refresh(appt)
+    await apply_stats_change(session, before, appointment_snapshot(appt))
+    await publish(session, appointment_event("canceled", appt))
+    await session.commit()
+    await session.refresh(appt)
+
+    # a vaga liberada vai para a lista de espera do barbeiro
+    await backfill_after_commit(appt.barber_id, appt.appointment_time, freed_by_client_id=appt.client_id)
     return appt
 
 
@@ -201,22 +458,25 @@ def cancel_appointment(
 # =========================
 
 @router.patch("/{appointment_id}/confirm")
-def confirm_appointment(
+async def confirm_appointment(
     appointment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
 
     if current_user.role != "barber":
         raise HTTPException(status_code=403, detail="Apenas barbeiro pode confirmar")
 
-    appt = session.get(Appointment, appointment_id)
+    appt = await session.get(Appointment, appointment_id, with_for_update=True)
     if not appt or appt.barber_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão")
 
+    before = appointment_snapshot(appt)
     appt.status = "confirmed"
-    session.commit()
-    session.refresh(appt)
+    await apply_stats_change(session, before, appointment_snapshot(appt))
+    await publish(session, appointment_event("confirmed", appt))
+    await session.commit()
+    await session.refresh(appt)
     return appt
 
 
@@ -225,22 +485,25 @@ def confirm_appointment(
 # =========================
 
 @router.patch("/{appointment_id}/complete")
-def complete_appointment(
+async def complete_appointment(
     appointment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
 
     if current_user.role != "barber":
         raise HTTPException(status_code=403, detail="Apenas barbeiro pode finalizar")
 
-    appt = session.get(Appointment, appointment_id)
+    appt = await session.get(Appointment, appointment_id, with_for_update=True)
     if not appt or appt.barber_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão")
 
+    before = appointment_snapshot(appt)
     appt.status = "completed"
-    session.commit()
-    session.refresh(appt)
+    await apply_stats_change(session, before, appointment_snapshot(appt))
+    await publish(session, appointment_event("completed", appt))
+    await session.commit()
+    await session.refresh(appt)
     return appt
 
 
@@ -249,24 +512,27 @@ def complete_appointment(
 # =========================
 
 @router.patch("/{appointment_id}/pay")
-def mark_as_paid(
+async def mark_as_paid(
     appointment_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
 
     if current_user.role != "barber":
         raise HTTPException(status_code=403, detail="Apenas barbeiro pode registrar pagamento")
 
-    appt = session.get(Appointment, appointment_id)
+    appt = await session.get(Appointment, appointment_id, with_for_update=True)
     if not appt or appt.barber_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão")
 
     if appt.payment_status == "paid":
         return appt
 
+    before = appointment_snapshot(appt)
     appt.payment_status = "paid"
+    await apply_stats_change(session, before, appointment_snapshot(appt))
+    await publish(session, appointment_event("paid", appt))
 
-    session.commit()
-    session.refresh(appt)
+    await session.commit()
+    await session.refresh(appt)
     return appt
@@ -1,24 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 
 from app.database import get_session
 from app.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import (
+    create_access_token,
+    get_current_barber,
+    invalidate_user_cache,
+    principal_cache,
+    verify_and_update_password_async,
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _get_user_by_email(session: Session, email: str):
+    return session.exec(
+        select(User).where(User.email == email)
+    ).first()
+
+
+def _save_password_hash(session: Session, user: User, password_hash: str):
+    user_id = user.id
+    user.password_hash = password_hash
+    session.add(user)
+    session.commit()
+    # tokens em cache guardam o hash antigo
+    invalidate_user_cache(user_id)
+
+
 @router.post("/login")
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     session: Session = Depends(get_session),
 ):
-    user = session.exec(
-        select(User).where(User.email == form_data.username)
-    ).first()
+    # banco no threadpool; bcrypt no pool dedicado de hashing
+    user = await run_in_threadpool(_get_user_by_email, session, form_data.username)
 
-    if not user or not verify_password(form_data.password, user.password_hash):
+    valid = False
+    new_hash = None
+    if user:
+        valid, new_hash = await verify_and_update_password_async(
+            form_data.password, user.password_hash
+        )
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha inválidos",
@@ -28,7 +56,15 @@ def login(
         data={"sub": user.email}
     )
 
+    if new_hash:
+        await run_in_threadpool(_save_password_hash, session, user, new_hash)
+
     return {
         "access_token": access_token,
         "token_type": "bearer"
     }
+
+
+@router.get("/cache-stats")
+def auth_cache_stats(current_barber: User = Depends(get_current_barber)):
+    return principal_cache.stats()
@@ -1,26 +1,32 @@
 from datetime import time
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session, select
 
 from app.database import get_session
-from app.models.business_hours import BusinessHours
+from app.models.business_hours import BusinessHours, BusinessHoursRead
 from app.models.user import User
+from app.core.responses import FastJSONResponse, projection, rows_to_dicts
 from app.core.security import get_current_barber
+from app.core.schedule_cache import schedule_cache
 
 router = APIRouter(prefix="/business-hours", tags=["business-hours"])
 
 
-@router.get("/")
+@router.get("/", response_model=List[BusinessHoursRead])
 def list_business_hours(
     session: Session = Depends(get_session),
     current_barber: User = Depends(get_current_barber),
 ):
-    return session.exec(
-        select(BusinessHours).where(BusinessHours.barber_id == current_barber.id)
+    rows = session.exec(
+        select(*projection(BusinessHoursRead, BusinessHours))
+        .where(BusinessHours.barber_id == current_barber.id)
+        .order_by(BusinessHours.weekday)
     ).all()
 
+    return FastJSONResponse(rows_to_dicts(BusinessHoursRead.model_fields, rows))
+
 
 @router.put("/{weekday}")
 def upsert_business_hours(
@@ -62,6 +68,7 @@ def upsert_business_hours(
         existing.lunch_end = payload.lunch_end
         session.add(existing)
         session.commit()
+        schedule_cache.invalidate(current_barber.id)
         session.refresh(existing)
         return existing
 
@@ -76,5 +83,6 @@ def upsert_business_hours(
     )
     session.add(new)
     session.commit()
+    schedule_cache.invalidate(current_barber.id)
     session.refresh(new)
     return new
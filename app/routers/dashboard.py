@@ -1,171 +1,210 @@
-from datetime import date, datetime, timedelta, time
-from collections import Counter
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-
-from app.database import get_session
+from app.database import get_async_read_session
 from app.core.security import get_current_barber
 from app.models.user import User
-from app.models.appointment import Appointment
-from app.models.service import Service
-from app.models.business_hours import BusinessHours
+from app.models.daily_stats import BarberDailyServiceStats, BarberDailyStats
+from app.core.intervals import business_window, capacity_minutes
+from app.core.schedule_cache import schedule_cache
+from app.core.stats import STATUS_COLUMNS
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 
-def _day_bounds(d: date):
-    start = datetime.combine(d, time(0, 0))
-    end = start + timedelta(days=1)
-    return start, end
-
 @router.get("/summary")
-def dashboard_summary(
+async def dashboard_summary(
     day: date,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
     current_barber: User = Depends(get_current_barber),
 ):
-    start, end = _day_bounds(day)
-
-    appts = session.exec(
-        select(Appointment).where(
-            Appointment.barber_id == current_barber.id,
-            Appointment.appointment_time >= start,
-            Appointment.appointment_time < end,
-        )
-    ).all()
-
-    total = len(appts)
-    by_status = Counter([a.status for a in appts])
-
-    revenue = 0.0
-    minutes_completed = 0
+    stats = await session.get(BarberDailyStats, (current_barber.id, day))
+    if not stats:
+        stats = BarberDailyStats(barber_id=current_barber.id, day=day)
+
+    by_status = {
+        col: getattr(stats, col)
+        for col in STATUS_COLUMNS
+        if getattr(stats, col)
+    }
 
-    for a in appts:
-        if a.status == "completed":
-            revenue += float(a.service_price_snapshot or 0)
-            minutes_completed += int(a.service_duration_snapshot or 0)
+    minutes_completed = stats.minutes_completed
 
     # ocupação
-    weekday = day.weekday()
-    bh = session.exec(
-        select(BusinessHours).where(
-            BusinessHours.barber_id == current_barber.id,
-            BusinessHours.weekday == weekday,
-        )
-    ).first()
+    hours_by_weekday = await schedule_cache.get_business_hours(session, current_barber.id)
+    bh = hours_by_weekday.get(day.weekday())
 
-    capacity_minutes = None
+    capacity = None
     occupancy = None
 
-    if bh and (not bh.is_closed) and bh.open_time and bh.close_time:
-        open_dt = datetime.combine(day, bh.open_time)
-        close_dt = datetime.combine(day, bh.close_time)
-        capacity_minutes = int((close_dt - open_dt).total_seconds() // 60)
-
-        if bh.lunch_start and bh.lunch_end:
-            ls = datetime.combine(day, bh.lunch_start)
-            le = datetime.combine(day, bh.lunch_end)
-            capacity_minutes -= int((le - ls).total_seconds() // 60)
+    window = business_window(day, bh)
+    if window:
+        capacity = capacity_minutes(window)
 
-        if capacity_minutes > 0:
-            occupancy = round((minutes_completed / capacity_minutes) * 100, 2)
+        if capacity > 0:
+            occupancy = round((minutes_completed / capacity) * 100, 2)
 
     # top serviços usando snapshot
-    service_counter = Counter(
-        [a.service_name_snapshot for a in appts if a.service_name_snapshot]
-    )
+    top_rows = (await session.exec(
+        select(BarberDailyServiceStats.service_name, BarberDailyServiceStats.total)
+        .where(
+            BarberDailyServiceStats.barber_id == current_barber.id,
+            BarberDailyServiceStats.day == day,
+            BarberDailyServiceStats.total > 0,
+        )
+        .order_by(BarberDailyServiceStats.total.desc())
+        .limit(5)
+    )).all()
 
-    top = [
-        {"name": name, "count": qty}
-        for name, qty in service_counter.most_common(5)
-    ]
+    top = [{"name": name, "count": qty} for name, qty in top_rows]
 
     return {
         "day": day.isoformat(),
         "barber_id": current_barber.id,
-        "total_appointments": total,
-        "status": dict(by_status),
-        "revenue_completed": round(revenue, 2),
+        "total_appointments": stats.total,
+        "status": by_status,
+        "revenue_completed": round(stats.revenue_completed, 2),
         "minutes_completed": minutes_completed,
-        "capacity_minutes": capacity_minutes,
+        "capacity_minutes": capacity,
         "occupancy_percent": occupancy,
         "top_services": top,
     }
 
+# =========================
+# AGREGAÇÕES POR PERÍODO
+# =========================
+
+GROUP_BY_FORMATS = {
+    "day": "YYYY-MM-DD",
+    "month": "YYYY-MM",
+}
+
+
+async def _period_report(
+    session: AsyncSession,
+    barber_id: int,
+    start: date,
+    end: date,
+    group_by: str = "day",
+) -> dict:
+    """
+    Totais do período [start, end] (inclusive) calculados no banco.
+
+    Cada bloco do relatório é uma única consulta agregada sobre o rollup
+    diário; nenhuma linha individual passa pelo Python.
+    """
+    in_period = (
+        BarberDailyStats.barber_id == barber_id,
+        BarberDailyStats.day >= start,
+        BarberDailyStats.day <= end,
+    )
+
+    totals = (await session.exec(
+        select(
+            func.coalesce(func.sum(BarberDailyStats.completed), 0),
+            func.coalesce(func.sum(BarberDailyStats.canceled), 0),
+            func.coalesce(func.sum(BarberDailyStats.revenue_completed), 0),
+            func.coalesce(func.sum(BarberDailyStats.paid_revenue), 0),
+            func.coalesce(func.sum(BarberDailyStats.unpaid_revenue), 0),
+        ).where(*in_period)
+    )).one()
+
+    total_completed, total_canceled, gross_revenue, paid_revenue, unpaid_revenue = totals
+
+    bucket = func.to_char(BarberDailyStats.day, GROUP_BY_FORMATS[group_by])
+    revenue_rows = (await session.exec(
+        select(bucket, func.sum(BarberDailyStats.revenue_completed))
+        .where(*in_period, BarberDailyStats.completed > 0)
+        .group_by(bucket)
+        .order_by(bucket)
+    )).all()
+
+    quantity = func.sum(BarberDailyServiceStats.completed)
+    top_rows = (await session.exec(
+        select(BarberDailyServiceStats.service_name, quantity)
+        .where(
+            BarberDailyServiceStats.barber_id == barber_id,
+            BarberDailyServiceStats.day >= start,
+            BarberDailyServiceStats.day <= end,
+            BarberDailyServiceStats.completed > 0,
+        )
+        .group_by(BarberDailyServiceStats.service_name)
+        .order_by(quantity.desc())
+        .limit(5)
+    )).all()
+
+    ticket_medio = (
+        round(gross_revenue / total_completed, 2)
+        if total_completed > 0
+        else 0
+    )
+
+    return {
+        "appointments_completed": int(total_completed),
+        "appointments_canceled": int(total_canceled),
+        "gross_revenue": round(gross_revenue, 2),
+        "paid_revenue": round(paid_revenue, 2),
+        "unpaid_revenue": round(unpaid_revenue, 2),
+        "ticket_average": ticket_medio,
+        "top_services": [
+            {"service": name, "quantity": int(qty)}
+            for name, qty in top_rows
+        ],
+        f"revenue_by_{group_by}": {key: value for key, value in revenue_rows},
+    }
+
+
 @router.get("/monthly")
-def monthly_dashboard(
+async def monthly_dashboard(
     year: int,
     month: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_read_session),
     current_barber: User = Depends(get_current_barber),
 ):
     from calendar import monthrange
 
     last_day = monthrange(year, month)[1]
 
-    start = datetime(year, month, 1, 0, 0)
-    end = datetime(year, month, last_day, 23, 59, 59)
-
-    appts = session.exec(
-        select(Appointment).where(
-            Appointment.barber_id == current_barber.id,
-            Appointment.appointment_time >= start,
-            Appointment.appointment_time <= end,
-        )
-    ).all()
-
-    total_completed = 0
-    total_canceled = 0
-    gross_revenue = 0.0
-    paid_revenue = 0.0
-    unpaid_revenue = 0.0
-
-    service_counter = Counter()
-    revenue_by_day = {}
-
-    for appt in appts:
+    start = date(year, month, 1)
+    end = date(year, month, last_day)
 
-        if appt.status == "completed":
-            total_completed += 1
-            price = float(appt.service_price_snapshot or 0)
-            gross_revenue += price
+    report = await _period_report(session, current_barber.id, start, end, group_by="day")
 
-            service_counter[appt.service_name_snapshot] += 1
-
-            day_key = appt.appointment_time.date().isoformat()
-            revenue_by_day.setdefault(day_key, 0)
-            revenue_by_day[day_key] += price
+    return {
+        "period": {
+            "year": year,
+            "month": month,
+        },
+        **report,
+    }
 
-            if appt.payment_status == "paid":
-                paid_revenue += price
-            else:
-                unpaid_revenue += price
 
-        if appt.status == "canceled":
-            total_canceled += 1
+@router.get("/range")
+async def range_dashboard(
+    start_date: date,
+    end_date: date,
+    group_by: str = "day",
+    session: AsyncSession = Depends(get_async_read_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """
+    Relatório de qualquer período (trimestre, ano...). group_by: day | month
+    """
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date deve ser maior ou igual a start_date")
 
-    ticket_medio = (
-        round(gross_revenue / total_completed, 2)
-        if total_completed > 0
-        else 0
-    )
+    if group_by not in GROUP_BY_FORMATS:
+        raise HTTPException(status_code=400, detail="group_by deve ser day ou month")
 
-    top_services = [
-        {"service": name, "quantity": qty}
-        for name, qty in service_counter.most_common(5)
-    ]
+    report = await _period_report(session, current_barber.id, start_date, end_date, group_by=group_by)
 
     return {
         "period": {
-            "year": year,
-            "month": month,
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "group_by": group_by,
         },
-        "appointments_completed": total_completed,
-        "appointments_canceled": total_canceled,
-        "gross_revenue": round(gross_revenue, 2),
-        "paid_revenue": round(paid_revenue, 2),
-        "unpaid_revenue": round(unpaid_revenue, 2),
-        "ticket_average": ticket_medio,
-        "top_services": top_services,
-        "revenue_by_day": revenue_by_day,
+        **report,
     }
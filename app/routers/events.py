@@ -0,0 +1,89 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session
+from app.models.user import User
+from app.core.events import Topic, broker
+from app.core.security import get_current_barber, get_current_client
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# comentário SSE periódico: mantém proxies abertos e detecta cliente que caiu
+HEARTBEAT_SECONDS = 15
+
+
+def _sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {orjson.dumps(event).decode()}\n\n"
+
+
+def _event_stream(topic: Topic, ready: dict) -> StreamingResponse:
+
+    async def stream():
+        # só assina quando o corpo começa a ser enviado: cliente que desconecta
+        # antes disso não deixa fila órfã no broker (o finally nunca rodaria)
+        queue = broker.subscribe(topic)
+        try:
+            yield "retry: 3000\n" + _sse(ready)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(event)
+        finally:
+            broker.unsubscribe(topic, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/schedule")
+async def schedule_events(
+    session: AsyncSession = Depends(get_async_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """
+    Server-sent events com as mudanças na agenda do barbeiro: substitui o
+    polling de GET /appointments/ na tela da recepção.
+
+    Eventos: appointment.created | canceled | confirmed | completed | paid,
+    time_block.created | deleted, time_blocks.changed (lote, importação,
+    recorrentes) e resync (eventos perdidos: recarregar a listagem). O
+    primeiro evento é "ready"; a cada (re)conexão a tela deve recarregar a
+    listagem uma vez e depois só aplicar os eventos.
+    """
+    barber_id = current_barber.id
+
+    # a conexão aberta pela autenticação não fica presa durante o stream
+    await session.close()
+
+    return _event_stream(("barber", barber_id), {"type": "ready", "barber_id": barber_id})
+
+
+@router.get("/waitlist")
+async def waitlist_events(
+    session: AsyncSession = Depends(get_async_session),
+    current_client: User = Depends(get_current_client),
+):
+    """
+    Server-sent events da lista de espera do cliente, para não precisar
+    fazer polling de GET /waitlist/ enquanto espera vaga.
+
+    Eventos: waitlist.offered (vaga oferecida: offered_time e
+    offer_expires_at; aceitar em POST /waitlist/{id}/accept),
+    waitlist.booked (agendamento criado, com appointment_id) e resync.
+    """
+    client_id = current_client.id
+
+    await session.close()
+
+    return _event_stream(("client", client_id), {"type": "ready", "client_id": client_id})
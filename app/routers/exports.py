@@ -0,0 +1,155 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+from typing import AsyncIterator, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import async_read_engine
+from app.models.appointment import Appointment
+from app.models.payment import Payment
+from app.models.user import User
+from app.core.responses import dump_json
+from app.core.security import get_current_barber, get_current_user
+
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+# linhas buscadas do cursor do servidor por vez (e por pedaço da resposta)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+APPOINTMENT_EXPORT_COLUMNS = tuple(Appointment.__table__.columns.keys())
+
+PAYMENT_EXPORT_COLUMNS = (
+    ("id", Payment.id),
+    ("appointment_id", Payment.appointment_id),
+    ("provider", Payment.provider),
+    ("external_id", Payment.external_id),
+    ("amount", Payment.amount),
+    ("status", Payment.status),
+    ("created_at", Payment.created_at),
+    ("paid_at", Payment.paid_at),
+    ("client_id", Appointment.client_id),
+    ("appointment_time", Appointment.appointment_time),
+    ("service_name", Appointment.service_name_snapshot),
+)
+
+
+def _period(start_date: date, end_date: date):
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date deve ser maior ou igual a start_date")
+
+    return (
+        datetime.combine(start_date, datetime.min.time()),
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+    )
+
+
+def _csv_chunk(rows: Sequence[Sequence]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([v.isoformat() if isinstance(v, datetime) else v for v in row])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunk(names: Sequence[str], rows: Sequence[Sequence]) -> bytes:
+    return b"".join(dump_json(dict(zip(names, row))) + b"\n" for row in rows)
+
+
+async def _stream_export(query, names: Sequence[str], fmt: str) -> AsyncIterator[bytes]:
+    """
+    Gera a resposta em pedaços de EXPORT_BATCH_SIZE linhas.
+
+    A sessão é aberta aqui dentro (e não por Depends) para viver enquanto a
+    resposta é enviada. session.stream usa cursor no servidor: só um lote
+    fica em memória por vez, não importa o tamanho do período.
+    """
+    if fmt == "csv":
+        yield _csv_chunk([names])
+
+    async with AsyncSession(async_read_engine, expire_on_commit=False) as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        async for rows in result.partitions():
+            yield _csv_chunk(rows) if fmt == "csv" else _ndjson_chunk(names, rows)
+
+
+def _streaming_response(query, names: Sequence[str], fmt: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_export(query, names, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+@router.get("/appointments")
+async def export_appointments(
+    start_date: date,
+    end_date: date,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_user: User = Depends(get_current_user),
+):
+    """Agendamentos com appointment_time entre start_date e end_date (inclusive)."""
+    if current_user.role == "client":
+        owner_filter = Appointment.client_id == current_user.id
+    elif current_user.role == "barber":
+        owner_filter = Appointment.barber_id == current_user.id
+    else:
+        raise HTTPException(status_code=403, detail="Sem permissão")
+
+    range_start, range_end = _period(start_date, end_date)
+
+    query = (
+        select(*[getattr(Appointment, c) for c in APPOINTMENT_EXPORT_COLUMNS])
+        .where(
+            owner_filter,
+            Appointment.appointment_time >= range_start,
+            Appointment.appointment_time < range_end,
+        )
+        .order_by(Appointment.appointment_time, Appointment.id)
+    )
+
+    return _streaming_response(
+        query,
+        APPOINTMENT_EXPORT_COLUMNS,
+        format,
+        f"appointments_{start_date}_{end_date}",
+    )
+
+
+@router.get("/payments")
+async def export_payments(
+    start_date: date,
+    end_date: date,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    current_barber: User = Depends(get_current_barber),
+):
+    """Pagamentos dos agendamentos do barbeiro criados entre start_date e end_date (inclusive)."""
+    range_start, range_end = _period(start_date, end_date)
+
+    query = (
+        select(*[column for _, column in PAYMENT_EXPORT_COLUMNS])
+        .join(Appointment, Appointment.id == Payment.appointment_id)
+        .where(
+            Appointment.barber_id == current_barber.id,
+            Payment.created_at >= range_start,
+            Payment.created_at < range_end,
+        )
+        .order_by(Payment.created_at, Payment.id)
+    )
+
+    return _streaming_response(
+        query,
+        [name for name, _ in PAYMENT_EXPORT_COLUMNS],
+        format,
+        f"payments_{start_date}_{end_date}",
+    )
@@ -1,78 +1,176 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from typing import Optional
 
-from app.database import get_session
-from app.models.payment import Payment
+from fastapi import APIRouter, Depends, Header, HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session
+from app.models.payment import Payment, PaymentBatchConfirm
 from app.models.appointment import Appointment
 from app.models.user import User
-from app.core.security import get_current_user
+from app.core.security import get_current_barber, get_current_user
+from app.core.payments import confirm_payments
 
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
+BATCH_CONFIRM_MAX = 500
+
+
+async def _payment_by_key(session: AsyncSession, client_id: int, key: str) -> Optional[Payment]:
+    return (await session.exec(
+        select(Payment).where(Payment.client_id == client_id, Payment.idempotency_key == key)
+    )).first()
+
+
+async def _pending_payment(session: AsyncSession, appointment_id: int) -> Optional[Payment]:
+    return (await session.exec(
+        select(Payment).where(
+            Payment.appointment_id == appointment_id,
+            Payment.status == "pending",
+        )
+    )).first()
+
 
 # =========================
 # CRIAR PAGAMENTO (simulado)
 # =========================
 @router.post("/create/{appointment_id}")
-def create_payment(
+async def create_payment(
     appointment_id: int,
-    session: Session = Depends(get_session),
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    session: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user),
 ):
+    """
+    Abre o pagamento do agendamento.
+
+    Idempotente: repetir a chamada (com ou sem o header Idempotency-Key)
+    devolve o pagamento pendente já existente em vez de criar outro. A chave
+    é do cliente: só é consultada depois de conferir o dono do agendamento.
+    """
 
-    appt = session.get(Appointment, appointment_id)
+    appt = await session.get(Appointment, appointment_id)
     if not appt:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
 
     if appt.client_id != current_user.id:
         raise HTTPException(status_code=403, detail="Sem permissão")
 
+    if idempotency_key:
+        existing = await _payment_by_key(session, current_user.id, idempotency_key)
+        if existing:
+            if existing.appointment_id != appointment_id:
+                raise HTTPException(status_code=409, detail="Idempotency-Key já usada em outro pagamento")
+            return existing
+
     if appt.status != "completed":
         raise HTTPException(status_code=400, detail="Só é possível pagar após conclusão")
 
+    if appt.payment_status == "paid":
+        raise HTTPException(status_code=409, detail="Agendamento já está pago")
+
+    pending = await _pending_payment(session, appointment_id)
+    if pending:
+        return pending
+
     payment = Payment(
         appointment_id=appointment_id,
+        client_id=current_user.id,
         provider="manual",
         amount=appt.service_price_snapshot or 0,
         status="pending",
+        idempotency_key=idempotency_key,
     )
 
     session.add(payment)
-    session.commit()
-    session.refresh(payment)
+    try:
+        await session.commit()
+    except IntegrityError:
+        # retry concorrente venceu (mesma chave ou pagamento pendente já aberto)
+        await session.rollback()
+        winner = await _pending_payment(session, appointment_id)
+        if idempotency_key:
+            winner = await _payment_by_key(session, current_user.id, idempotency_key) or winner
+        if not winner or winner.appointment_id != appointment_id:
+            raise HTTPException(status_code=409, detail="Idempotency-Key já usada em outro pagamento")
+        return winner
+
+    await session.refresh(payment)
 
     return payment
 
 
 # =========================
-# CONFIRMAR PAGAMENTO (simulado)
+# CONFIRMAÇÃO
 # =========================
+
 @router.patch("/{payment_id}/confirm")
-def confirm_payment(
+async def confirm_payment(
     payment_id: int,
-    session: Session = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    current_barber: User = Depends(get_current_barber),
 ):
+    """Idempotente: confirmar de novo um pagamento pago só devolve o estado atual."""
 
-    payment = session.get(Payment, payment_id)
+    payment = await session.get(Payment, payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Pagamento não encontrado")
 
-    appt = session.get(Appointment, payment.appointment_id)
+    appt = await session.get(Appointment, payment.appointment_id)
+    if not appt or appt.barber_id != current_barber.id:
+        raise HTTPException(status_code=403, detail="Sem permissão")
 
-    if current_user.role != "barber":
-        raise HTTPException(status_code=403, detail="Apenas barbeiro pode confirmar pagamento")
+    if payment.status == "paid":
+        return payment
 
-    payment.status = "paid"
-    payment.paid_at = datetime.utcnow()
+    if payment.status != "pending":
+        raise HTTPException(status_code=400, detail=f"Pagamento {payment.status} não pode ser confirmado")
 
-    # Atualiza appointment também
-    appt.payment_status = "paid"
-
-    session.add(payment)
-    session.add(appt)
-    session.commit()
+    await confirm_payments(session, [payment_id], barber_id=current_barber.id)
+    await session.commit()
 
+    await session.refresh(payment)
     return payment
+
+
+@router.post("/confirm-batch")
+async def confirm_payments_batch(
+    payload: PaymentBatchConfirm,
+    session: AsyncSession = Depends(get_async_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """
+    Conciliação de caixa: confirma vários pagamentos numa única transação.
+
+    Pode ser repetida sem efeito duplicado. Devolve os ids confirmados agora,
+    os que já estavam pagos e os ignorados (inexistentes, de outro barbeiro
+    ou em outro status).
+    """
+    ids = sorted(set(payload.payment_ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="Lista vazia")
+    if len(ids) > BATCH_CONFIRM_MAX:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BATCH_CONFIRM_MAX} pagamentos por chamada")
+
+    confirmed = await confirm_payments(session, ids, barber_id=current_barber.id)
+
+    already_paid = (await session.exec(
+        select(Payment.id).where(
+            Payment.id.in_(set(ids) - set(confirmed)),
+            Payment.status == "paid",
+            Payment.appointment_id == Appointment.id,
+            Appointment.barber_id == current_barber.id,
+        )
+    )).all()
+
+    await session.commit()
+
+    skipped = sorted(set(ids) - set(confirmed) - set(already_paid))
+
+    return {
+        "confirmed": sorted(confirmed),
+        "already_paid": sorted(already_paid),
+        "skipped": skipped,
+    }
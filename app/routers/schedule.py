@@ -0,0 +1,178 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_read_session
+from app.models.business_hours import BusinessHours
+from app.models.user import User
+from app.core.security import get_current_user
+from app.core.intervals import (
+    Interval,
+    SlotSweeper,
+    busy_appointments_query,
+    business_window,
+    load_blocks,
+    merge_intervals,
+)
+
+
+router = APIRouter(prefix="/schedule", tags=["schedule"])
+
+GRID_SLOT_STEP = timedelta(minutes=15)
+GRID_MAX_DAYS = 31
+GRID_MAX_BARBERS = 50
+
+
+def _parse_barber_ids(raw: str) -> List[int]:
+    try:
+        ids = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="barber_ids deve ser uma lista de inteiros separados por vírgula")
+
+    if not ids:
+        raise HTTPException(status_code=400, detail="Informe ao menos um barber_id")
+    if len(ids) > GRID_MAX_BARBERS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {GRID_MAX_BARBERS} barbeiros")
+    return ids
+
+
+def _minutes_since(moment: datetime, day_start: datetime) -> int:
+    return int((moment - day_start).total_seconds() // 60)
+
+
+def _minute_pairs_by_day(
+    intervals: List[Interval],
+    range_start: datetime,
+    total_days: int,
+) -> List[List[List[int]]]:
+    """
+    Intervalos (ordenados) recortados por dia, em minutos desde 00:00:
+    o item i tem os pedaços do dia range_start + i. Uma passada só pela
+    lista; um intervalo que atravessa a meia-noite entra nos dois dias.
+    """
+    by_day: List[List[List[int]]] = [[] for _ in range(total_days)]
+
+    for start, end in intervals:
+        offset = max((start - range_start).days, 0)
+
+        while offset < total_days:
+            day_start = range_start + timedelta(days=offset)
+            day_end = day_start + timedelta(days=1)
+            if day_start >= end:
+                break
+
+            clipped_start, clipped_end = max(start, day_start), min(end, day_end)
+            if clipped_end > clipped_start:
+                by_day[offset].append([
+                    _minutes_since(clipped_start, day_start),
+                    _minutes_since(clipped_end, day_start),
+                ])
+            offset += 1
+
+    return by_day
+
+
+@router.get("/grid")
+async def schedule_grid(
+    barber_ids: str,
+    start_date: date,
+    end_date: date,
+    duration_minutes: int = Query(30, ge=5, le=480),
+    session: AsyncSession = Depends(get_async_read_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Grade da agenda de vários barbeiros entre start_date e end_date (inclusive).
+
+    barber_ids: ids separados por vírgula. Horários em minutos desde 00:00
+    do dia: days[i] é start_date + i; open = [abertura, fechamento] ou null;
+    busy = agendamentos; blocks = bloqueios (avulsos e recorrentes) e
+    almoço; free = inícios livres (passo de 15 min) para um atendimento de
+    duration_minutes.
+    """
+    ids = _parse_barber_ids(barber_ids)
+
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date deve ser maior ou igual a start_date")
+
+    total_days = (end_date - start_date).days + 1
+    if total_days > GRID_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Período máximo de {GRID_MAX_DAYS} dias")
+
+    range_start = datetime.combine(start_date, datetime.min.time())
+    range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+    # uma consulta por tabela para todos os barbeiros e o período inteiro
+    # (bloqueios recorrentes: as regras, expandidas só dentro do período)
+    hours: Dict[int, Dict[int, BusinessHours]] = defaultdict(dict)
+    for bh in (await session.exec(
+        select(BusinessHours).where(BusinessHours.barber_id.in_(ids))
+    )).all():
+        hours[bh.barber_id][bh.weekday] = bh
+
+    appointments: Dict[int, List[Interval]] = defaultdict(list)
+    for barber_id, appt_start, duration in (await session.exec(
+        busy_appointments_query(ids, range_start, range_end)
+    )).all():
+        appointments[barber_id].append((appt_start, appt_start + timedelta(minutes=duration or 0)))
+
+    blocks = await load_blocks(session, ids, range_start, range_end)
+
+    duration = timedelta(minutes=duration_minutes)
+    now = datetime.utcnow()
+
+    barbers = []
+    for barber_id in ids:
+        windows = []
+        fixed: List[Interval] = []
+        for offset in range(total_days):
+            day = start_date + timedelta(days=offset)
+            window = business_window(day, hours[barber_id].get(day.weekday()))
+            windows.append((day, window))
+            if window:
+                fixed.extend(window[2])
+
+        busy = merge_intervals(appointments[barber_id])
+        unavailable = merge_intervals(blocks[barber_id] + fixed)
+
+        # dias em ordem crescente: o sweeper percorre o período uma vez só
+        sweeper = SlotSweeper(merge_intervals(busy + unavailable))
+
+        busy_by_day = _minute_pairs_by_day(busy, range_start, total_days)
+        unavailable_by_day = _minute_pairs_by_day(unavailable, range_start, total_days)
+
+        days = []
+        for offset, (day, window) in enumerate(windows):
+            day_start = datetime.combine(day, datetime.min.time())
+
+            if not window:
+                days.append({"open": None, "busy": [], "blocks": [], "free": []})
+                continue
+
+            open_dt, close_dt, _ = window
+            free = [
+                _minutes_since(s, day_start)
+                for s in sweeper.free_slots(open_dt, close_dt, duration, GRID_SLOT_STEP)
+                if s >= now
+            ]
+
+            days.append({
+                "open": [_minutes_since(open_dt, day_start), _minutes_since(close_dt, day_start)],
+                "busy": busy_by_day[offset],
+                "blocks": unavailable_by_day[offset],
+                "free": free,
+            })
+
+        barbers.append({"barber_id": barber_id, "days": days})
+
+    return {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "slot_step_minutes": int(GRID_SLOT_STEP.total_seconds() // 60),
+        "duration_minutes": duration_minutes,
+        "barbers": barbers,
+    }
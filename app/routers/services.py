@@ -1,9 +1,13 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
 from app.database import get_session
-from app.models.service import Service
+from app.models.service import Service, ServiceRead
 from app.models.user import User
+from app.core.responses import FastJSONResponse, projection, rows_to_dicts
 from app.core.security import get_current_barber
 
 
@@ -22,19 +26,23 @@ def create_service(
     service.barber_id = current_barber.id
 
     session.add(service)
-    session.commit()
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Já existe um serviço com esse nome")
     session.refresh(service)
 
     return service
 
 
-@router.get("/")
+@router.get("/", response_model=List[ServiceRead])
 def list_my_services(
     session: Session = Depends(get_session),
     current_barber: User = Depends(get_current_barber),
 ):
-    services = session.exec(
-        select(Service).where(Service.barber_id == current_barber.id)
+    rows = session.exec(
+        select(*projection(ServiceRead, Service)).where(Service.barber_id == current_barber.id)
     ).all()
 
-    return services
+    return FastJSONResponse(rows_to_dicts(ServiceRead.model_fields, rows))
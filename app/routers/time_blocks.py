@@ -1,22 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlmodel import Session, select
 
 from app.database import get_session
-from app.models.time_block import TimeBlock
+from app.models.time_block import (
+    RecurringTimeBlock,
+    RecurringTimeBlockCreate,
+    TimeBlock,
+    TimeBlockCreate,
+    TimeBlockRead,
+)
 from app.models.user import User
+from app.core.responses import FastJSONResponse, projection, rows_to_dicts
+from app.core.ical import ICalError, parse_events, weekly_rule
 from app.core.security import get_current_barber
+from app.core.schedule_cache import schedule_cache
+from app.core.events import publish_sync
 
 router = APIRouter(prefix="/time-blocks", tags=["time-blocks"])
 
+BULK_MAX_BLOCKS = 500
+IMPORT_MAX_BYTES = 1024 * 1024
+RECURRING_MAX_INTERVAL_WEEKS = 52
+
+
+def _block_event(kind: str, block: TimeBlock) -> dict:
+    return {
+        "type": f"time_block.{kind}",
+        "barber_id": block.barber_id,
+        "id": block.id,
+        "start_time": block.start_time.isoformat(),
+        "end_time": block.end_time.isoformat(),
+    }
+
+
+def _blocks_changed(barber_id: int) -> dict:
+    # lote, importação e recorrentes: a tela recarrega os bloqueios
+    return {"type": "time_blocks.changed", "barber_id": barber_id}
 
-@router.get("/")
+
+@router.get("/", response_model=List[TimeBlockRead])
 def list_time_blocks(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
     session: Session = Depends(get_session),
     current_barber: User = Depends(get_current_barber),
 ):
-    return session.exec(
-        select(TimeBlock).where(TimeBlock.barber_id == current_barber.id)
-    ).all()
+    """
+    Bloqueios avulsos que tocam [date_from, date_to).
+    Sem date_from, lista a partir de agora (bloqueios já encerrados ficam de fora).
+    """
+    if date_from is None:
+        date_from = datetime.utcnow()
+
+    query = select(*projection(TimeBlockRead, TimeBlock)).where(
+        TimeBlock.barber_id == current_barber.id,
+        TimeBlock.end_time > date_from,
+    )
+    if date_to:
+        query = query.where(TimeBlock.start_time < date_to)
+
+    rows = session.exec(query.order_by(TimeBlock.start_time)).all()
+    return FastJSONResponse(rows_to_dicts(TimeBlockRead.model_fields, rows))
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -32,11 +79,220 @@ def create_time_block(
     block.barber_id = current_barber.id
 
     session.add(block)
+    session.flush()
+    # corpo chega sem conversão de tipos (modelo de tabela): relê do banco
+    session.refresh(block)
+    publish_sync(session, _block_event("created", block))
     session.commit()
+    schedule_cache.invalidate(current_barber.id)
     session.refresh(block)
     return block
 
 
+# =========================
+# EM LOTE
+# =========================
+
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+def create_time_blocks_bulk(
+    blocks: List[TimeBlockCreate],
+    session: Session = Depends(get_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """Vários bloqueios numa única transação (tudo ou nada)."""
+    if not blocks:
+        raise HTTPException(status_code=400, detail="Lista vazia")
+    if len(blocks) > BULK_MAX_BLOCKS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BULK_MAX_BLOCKS} bloqueios por chamada")
+
+    invalid = [i for i, b in enumerate(blocks) if b.end_time <= b.start_time]
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end_time deve ser maior que start_time (itens {invalid})",
+        )
+
+    rows = [
+        TimeBlock(
+            barber_id=current_barber.id,
+            start_time=b.start_time,
+            end_time=b.end_time,
+            reason=b.reason,
+        )
+        for b in blocks
+    ]
+
+    session.add_all(rows)
+    session.flush()
+    # ids lidos antes do commit: depois dele cada row.id seria um SELECT
+    ids = [row.id for row in rows]
+    publish_sync(session, _blocks_changed(current_barber.id))
+    session.commit()
+    schedule_cache.invalidate(current_barber.id)
+
+    return {"created": len(rows), "ids": ids}
+
+
+@router.post("/import", status_code=status.HTTP_201_CREATED)
+def import_time_blocks(
+    file: UploadFile = File(...),
+    session: Session = Depends(get_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """
+    Importa um arquivo iCalendar (.ics), por exemplo um calendário de férias.
+
+    Eventos simples viram bloqueios; eventos com RRULE semanal de um dia
+    viram bloqueios recorrentes. Eventos que não dá para representar voltam
+    em `skipped` (inclusive séries com EXDATE). Horários em UTC (sufixo Z)
+    ou com TZID são gravados em UTC; os flutuantes, como estão no arquivo.
+    """
+    raw = file.file.read(IMPORT_MAX_BYTES + 1)
+    if len(raw) > IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=400, detail="Arquivo maior que 1 MB")
+
+    try:
+        events = parse_events(raw.decode("utf-8-sig"))
+    except (ICalError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Arquivo iCalendar inválido: {exc}")
+
+    blocks: List[TimeBlock] = []
+    rules: List[RecurringTimeBlock] = []
+    skipped = []
+
+    for event in events:
+        reason = event.summary or "Bloqueio"
+
+        if event.rrule:
+            if event.has_exdate:
+                skipped.append({"summary": event.summary, "reason": "Recorrência com exceções (EXDATE) não suportada"})
+                continue
+            fields = weekly_rule(event)
+            if fields is None:
+                skipped.append({"summary": event.summary, "reason": "Recorrência não suportada"})
+                continue
+            try:
+                rules.append(_new_rule(current_barber.id, RecurringTimeBlockCreate(**fields, reason=reason)))
+            except HTTPException as exc:
+                skipped.append({"summary": event.summary, "reason": exc.detail})
+            continue
+
+        if event.end <= event.start:
+            skipped.append({"summary": event.summary, "reason": "Evento sem duração"})
+            continue
+
+        blocks.append(TimeBlock(
+            barber_id=current_barber.id,
+            start_time=event.start,
+            end_time=event.end,
+            reason=reason,
+        ))
+
+    if len(blocks) + len(rules) > BULK_MAX_BLOCKS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {BULK_MAX_BLOCKS} eventos por arquivo")
+
+    session.add_all(blocks)
+    session.add_all(rules)
+    if blocks or rules:
+        publish_sync(session, _blocks_changed(current_barber.id))
+    session.commit()
+    schedule_cache.invalidate(current_barber.id)
+
+    return {
+        "blocks_created": len(blocks),
+        "recurring_created": len(rules),
+        "skipped": skipped,
+    }
+
+
+# =========================
+# RECORRENTES
+# =========================
+
+def _new_rule(barber_id: int, payload: RecurringTimeBlockCreate) -> RecurringTimeBlock:
+    if payload.weekday < 0 or payload.weekday > 6:
+        raise HTTPException(status_code=400, detail="weekday deve ser 0..6")
+
+    if payload.end_time <= payload.start_time:
+        raise HTTPException(status_code=400, detail="end_time deve ser maior que start_time")
+
+    if payload.interval_weeks < 1 or payload.interval_weeks > RECURRING_MAX_INTERVAL_WEEKS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval_weeks deve ser entre 1 e {RECURRING_MAX_INTERVAL_WEEKS}",
+        )
+
+    # starts_on é sempre a primeira ocorrência (cai no weekday da regra)
+    starts_on = payload.starts_on or date.today()
+    starts_on += timedelta(days=(payload.weekday - starts_on.weekday()) % 7)
+
+    if payload.ends_on and payload.ends_on < starts_on:
+        raise HTTPException(status_code=400, detail="ends_on deve ser depois da primeira ocorrência")
+
+    return RecurringTimeBlock(
+        barber_id=barber_id,
+        weekday=payload.weekday,
+        start_time=payload.start_time,
+        end_time=payload.end_time,
+        interval_weeks=payload.interval_weeks,
+        starts_on=starts_on,
+        ends_on=payload.ends_on,
+        reason=payload.reason,
+    )
+
+
+@router.get("/recurring")
+def list_recurring_time_blocks(
+    session: Session = Depends(get_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    return session.exec(
+        select(RecurringTimeBlock)
+        .where(RecurringTimeBlock.barber_id == current_barber.id)
+        .order_by(RecurringTimeBlock.weekday, RecurringTimeBlock.start_time)
+    ).all()
+
+
+@router.post("/recurring", status_code=status.HTTP_201_CREATED)
+def create_recurring_time_block(
+    payload: RecurringTimeBlockCreate,
+    session: Session = Depends(get_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    """
+    Bloqueio semanal (ou a cada interval_weeks semanas) em weekday,
+    das start_time às end_time, de starts_on até ends_on (opcional).
+    """
+    rule = _new_rule(current_barber.id, payload)
+
+    session.add(rule)
+    publish_sync(session, _blocks_changed(current_barber.id))
+    session.commit()
+    schedule_cache.invalidate(current_barber.id)
+    session.refresh(rule)
+    return rule
+
+
+@router.delete("/recurring/{rule_id}")
+def delete_recurring_time_block(
+    rule_id: int,
+    session: Session = Depends(get_session),
+    current_barber: User = Depends(get_current_barber),
+):
+    rule = session.get(RecurringTimeBlock, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Bloqueio recorrente não encontrado")
+
+    if rule.barber_id != current_barber.id:
+        raise HTTPException(status_code=403, detail="Sem permissão")
+
+    session.delete(rule)
+    publish_sync(session, _blocks_changed(current_barber.id))
+    session.commit()
+    schedule_cache.invalidate(current_barber.id)
+    return {"message": "Bloqueio recorrente removido"}
+
+
 @router.delete("/{block_id}")
 def delete_time_block(
     block_id: int,
@@ -50,6 +306,8 @@ def delete_time_block(
     if block.barber_id != current_barber.id:
         raise HTTPException(status_code=403, detail="Sem permissão")
 
+    publish_sync(session, _block_event("deleted", block))
     session.delete(block)
     session.commit()
+    schedule_cache.invalidate(current_barber.id)
     return {"message": "Bloqueio removido"}
@@ -1,22 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 from app.database import get_session
 from app.models.user import User, UserCreate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.post("/")
-def create_user(user: UserCreate, session: Session = Depends(get_session)):
 
-    existing_user = session.exec(
-        select(User).where(User.email == user.email)
-    ).first()
+def _email_exists(session: Session, email: str) -> bool:
+    return session.exec(
+        select(User).where(User.email == email)
+    ).first() is not None
+
+
+def _insert_user(session: Session, db_user: User) -> User:
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+    return db_user
+
 
-    if existing_user:
+@router.post("/")
+async def create_user(user: UserCreate, session: Session = Depends(get_session)):
+
+    if await run_in_threadpool(_email_exists, session, user.email):
         raise HTTPException(status_code=400, detail="Email já cadastrado")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     db_user = User(
         name=user.name,
@@ -25,13 +36,10 @@ def create_user(user: UserCreate, session: Session = Depends(get_session)):
         role=user.role
     )
 
-    session.add(db_user)
-    session.commit()
-    session.refresh(db_user)
+    db_user = await run_in_threadpool(_insert_user, session, db_user)
 
     return {
     "id": db_user.id,
     "name": db_user.name,
     "email": db_user.email
 }
-
@@ -0,0 +1,203 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session
+from app.models.service import Service
+from app.models.user import User
+from app.models.waitlist import WaitlistCreate, WaitlistEntry
+from app.core.security import get_current_user
+from app.core.waitlist import backfill_after_commit, book_entry
+
+
+router = APIRouter(prefix="/waitlist", tags=["waitlist"])
+
+# entradas ativas (waiting/offered) por cliente
+WAITLIST_MAX_ACTIVE_PER_CLIENT = int(os.getenv("WAITLIST_MAX_ACTIVE_PER_CLIENT", "10"))
+# janela máxima de uma entrada
+WAITLIST_MAX_WINDOW_DAYS = 31
+
+ACTIVE_STATUSES = ("waiting", "offered")
+
+
+def _back_to_queue(entry: WaitlistEntry):
+    entry.status = "waiting"
+    entry.offered_time = None
+    entry.offer_expires_at = None
+
+
+# =========================
+# ENTRAR NA FILA
+# =========================
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def join_waitlist(
+    payload: WaitlistCreate,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+
+    if current_user.role != "client":
+        raise HTTPException(status_code=403, detail="Apenas clientes podem entrar na lista de espera")
+
+    service = await session.get(Service, payload.service_id)
+    if not service or not service.active:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+
+    if payload.window_end <= payload.window_start:
+        raise HTTPException(status_code=400, detail="window_end deve ser maior que window_start")
+
+    if payload.window_end <= datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Janela já passou")
+
+    if payload.window_end - payload.window_start > timedelta(days=WAITLIST_MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Janela máxima de {WAITLIST_MAX_WINDOW_DAYS} dias")
+
+    if payload.window_end - payload.window_start < timedelta(minutes=service.duration_minutes):
+        raise HTTPException(status_code=400, detail="Janela menor que a duração do serviço")
+
+    active = (await session.exec(
+        select(func.count())
+        .select_from(WaitlistEntry)
+        .where(
+            WaitlistEntry.client_id == current_user.id,
+            WaitlistEntry.status.in_(ACTIVE_STATUSES),
+        )
+    )).one()
+    if active >= WAITLIST_MAX_ACTIVE_PER_CLIENT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {WAITLIST_MAX_ACTIVE_PER_CLIENT} entradas ativas na lista de espera",
+        )
+
+    entry = WaitlistEntry(
+        client_id=current_user.id,
+        barber_id=service.barber_id,
+        service_id=service.id,
+        window_start=payload.window_start,
+        window_end=payload.window_end,
+        auto_book=payload.auto_book,
+    )
+
+    session.add(entry)
+    await session.commit()
+    await session.refresh(entry)
+    return entry
+
+
+# =========================
+# LISTAR
+# =========================
+
+@router.get("/")
+async def list_waitlist(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Cliente: as próprias entradas. Barbeiro: quem está esperando vaga com ele
+    (por padrão só waiting/offered, na ordem da fila).
+    """
+    query = select(WaitlistEntry)
+
+    if current_user.role == "barber":
+        query = query.where(WaitlistEntry.barber_id == current_user.id)
+        if status_filter is None:
+            query = query.where(WaitlistEntry.status.in_(ACTIVE_STATUSES))
+        query = query.order_by(WaitlistEntry.created_at, WaitlistEntry.id)
+    else:
+        query = query.where(WaitlistEntry.client_id == current_user.id)
+        query = query.order_by(WaitlistEntry.created_at.desc(), WaitlistEntry.id.desc())
+
+    if status_filter is not None:
+        query = query.where(WaitlistEntry.status == status_filter)
+
+    return (await session.exec(query)).all()
+
+
+# =========================
+# SAIR DA FILA
+# =========================
+
+@router.delete("/{entry_id}")
+async def leave_waitlist(
+    entry_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+
+    entry = await session.get(WaitlistEntry, entry_id)
+    if not entry or entry.client_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Entrada não encontrada")
+
+    if entry.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Entrada já está {entry.status}")
+
+    entry.status = "canceled"
+    entry.offered_time = None
+    entry.offer_expires_at = None
+
+    session.add(entry)
+    await session.commit()
+    await session.refresh(entry)
+    return entry
+
+
+# =========================
+# ACEITAR OFERTA
+# =========================
+
+@router.post("/{entry_id}/accept", status_code=status.HTTP_201_CREATED)
+async def accept_offer(
+    entry_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Reserva a vaga oferecida. Se a oferta venceu ou o horário já foi tomado,
+    a entrada volta para a fila e o horário é repassado ao próximo da fila.
+    """
+    entry = await session.get(WaitlistEntry, entry_id, with_for_update=True)
+    if not entry or entry.client_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Entrada não encontrada")
+
+    if entry.status != "offered":
+        raise HTTPException(status_code=400, detail="Não há oferta para esta entrada")
+
+    barber_id = entry.barber_id
+    start_time = entry.offered_time
+
+    if entry.offer_expires_at < datetime.utcnow():
+        _back_to_queue(entry)
+        session.add(entry)
+        await session.commit()
+        await backfill_after_commit(barber_id, start_time, exclude_entry_id=entry_id)
+        raise HTTPException(status_code=410, detail="Oferta expirou")
+
+    service = await session.get(Service, entry.service_id)
+    if not service or not service.active:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+
+    try:
+        appointment = await book_entry(session, entry, service, start_time)
+        await session.commit()
+    except (HTTPException, IntegrityError):
+        await session.rollback()
+        entry = await session.get(WaitlistEntry, entry_id, with_for_update=True)
+        if entry.status == "offered":
+            _back_to_queue(entry)
+            session.add(entry)
+        await session.commit()
+        # o horário pode ainda servir para outra entrada (ex.: serviço diferente)
+        await backfill_after_commit(barber_id, start_time, exclude_entry_id=entry_id)
+        raise HTTPException(status_code=409, detail="Horário oferecido não está mais disponível")
+
+    await session.refresh(appointment)
+    return appointment
@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import get_async_session
+from app.models.payment import PaymentEvent
+from app.core.webhooks import verify_signature, webhook_secret
+
+
+router = APIRouter(prefix="/webhooks", tags=["webhooks"])
+
+PAYMENT_EVENT_TYPES = ("payment.succeeded", "payment.failed", "payment.refunded")
+
+
+# =========================
+# WEBHOOK DE PAGAMENTO
+# =========================
+
+@router.post("/payments/{provider}")
+async def receive_payment_event(
+    provider: str,
+    request: Request,
+    x_signature: str = Header(None),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Recebe um evento do provedor de pagamento.
+
+    Só confere a assinatura e grava o evento na fila (payment_event); quem
+    atualiza pagamento e agendamento é o worker. Assim a resposta sai rápido
+    e reenvios do provedor (mesmo id de evento) não são processados duas vezes.
+
+    Corpo: {"id": "...", "type": "payment.succeeded|payment.failed|payment.refunded",
+            "data": {"payment_id": 1, "external_id": "..."}}
+    """
+    secret = webhook_secret(provider)
+    if not secret:
+        raise HTTPException(status_code=404, detail="Provedor não configurado")
+
+    body = await request.body()
+    if not verify_signature(secret, body, x_signature):
+        raise HTTPException(status_code=400, detail="Assinatura inválida")
+
+    try:
+        event = json.loads(body)
+        event_id = str(event["id"])
+        event_type = event["type"]
+        data = event.get("data") or {}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise HTTPException(status_code=400, detail="Evento inválido")
+
+    if event_type not in PAYMENT_EVENT_TYPES:
+        # tipos que não nos interessam são aceitos e descartados
+        return {"received": True, "ignored": True}
+
+    if not isinstance(data, dict) or not (data.get("payment_id") or data.get("external_id")):
+        raise HTTPException(status_code=400, detail="Evento sem payment_id ou external_id")
+
+    inserted = (await session.exec(
+        insert(PaymentEvent)
+        .values(
+            provider=provider,
+            event_id=event_id,
+            event_type=event_type,
+            payload=event,
+            received_at=datetime.utcnow(),
+            attempts=0,
+        )
+        .on_conflict_do_nothing(index_elements=["provider", "event_id"])
+        .returning(PaymentEvent.id)
+    )).first()
+    await session.commit()
+
+    return {"received": True, "duplicate": inserted is None}
@@ -0,0 +1,76 @@
+"""
+Benchmark de login: logins/s e latência em diferentes níveis de concorrência.
+
+Roda contra um servidor já no ar (uvicorn app.main:app). Cria o usuário de
+teste se ele ainda não existir.
+
+Uso: python -m app.scripts.bench_login [base_url] [logins_por_nivel]
+"""
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench123"
+CONCURRENCY_LEVELS = (1, 4, 16, 64)
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+async def _run_level(client: httpx.AsyncClient, concurrency: int, total: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_login():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/auth/login", data={"username": EMAIL, "password": PASSWORD}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "logins_per_sec": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "errors": errors,
+    }
+
+
+async def main(base_url: str = "http://localhost:8000", total: int = 200):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await client.post(
+            "/users/",
+            json={"name": "bench", "email": EMAIL, "password": PASSWORD, "role": "client"},
+        )
+
+        print(f"{'concorrência':>12} {'logins/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'erros':>6}")
+        for concurrency in CONCURRENCY_LEVELS:
+            result = await _run_level(client, concurrency, total)
+            print(
+                f"{result['concurrency']:>12} {result['logins_per_sec']:>10} "
+                f"{result['p50_ms']:>9} {result['p99_ms']:>9} {result['errors']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    base_url = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(base_url, total))
@@ -0,0 +1,117 @@
+"""
+Microbenchmark de serialização das listagens (sem banco, sem HTTP).
+
+Para cada listagem monta N linhas em memória e mede o custo por linha de
+transformá-las no corpo da resposta:
+
+- antes:  objetos da tabela (SQLModel) -> jsonable_encoder -> JSONResponse
+- schema: linhas da projeção -> validação no schema de leitura -> FastJSONResponse
+- depois: linhas da projeção -> dicts -> FastJSONResponse (o que os endpoints fazem)
+
+Uso: python -m app.scripts.bench_serialization [linhas] [repetições]
+"""
+import sys
+import time
+from datetime import datetime, time as dtime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse, orjson, rows_to_dicts
+from app.models.appointment import Appointment, AppointmentRead
+from app.models.business_hours import BusinessHours, BusinessHoursRead
+from app.models.service import Service, ServiceRead
+from app.models.time_block import TimeBlock, TimeBlockRead
+
+
+BASE = datetime(2030, 1, 7, 8, 0)
+
+
+def _appointment(i: int) -> Appointment:
+    return Appointment(
+        id=i,
+        client_id=1000 + i % 50,
+        barber_id=1,
+        service_id=1 + i % 5,
+        appointment_time=BASE + timedelta(minutes=30 * i),
+        service_name_snapshot="Corte",
+        service_price_snapshot=40.0,
+        service_duration_snapshot=30,
+        status="pending",
+        payment_status="unpaid",
+        created_at=BASE,
+    )
+
+
+def _time_block(i: int) -> TimeBlock:
+    start = BASE + timedelta(hours=i)
+    return TimeBlock(id=i, barber_id=1, start_time=start, end_time=start + timedelta(minutes=45), reason="Bloqueio")
+
+
+def _business_hours(i: int) -> BusinessHours:
+    return BusinessHours(
+        id=i,
+        barber_id=1,
+        weekday=i % 7,
+        is_closed=False,
+        open_time=dtime(8),
+        close_time=dtime(18),
+        lunch_start=dtime(12),
+        lunch_end=dtime(13),
+    )
+
+
+def _service(i: int) -> Service:
+    return Service(id=i, name=f"Serviço {i}", duration_minutes=30, price=40.0, active=True, barber_id=1)
+
+
+CASES = (
+    ("appointments", _appointment, AppointmentRead),
+    ("time_blocks", _time_block, TimeBlockRead),
+    ("business_hours", _business_hours, BusinessHoursRead),
+    ("services", _service, ServiceRead),
+)
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(rows: int, repeat: int):
+    print(f"{rows} linhas, melhor de {repeat}; orjson: {'sim' if orjson else 'não (fallback json)'}")
+    print(f"{'listagem':<16} {'antes µs/linha':>15} {'schema µs/linha':>16} {'depois µs/linha':>16} {'ganho':>7}")
+
+    for name, factory, schema in CASES:
+        objects = [factory(i) for i in range(rows)]
+        names = list(schema.model_fields)
+        # o que a consulta com projeção devolve: tuplas só com as colunas do schema
+        projected = [tuple(getattr(obj, col) for col in names) for obj in objects]
+        adapter = TypeAdapter(List[schema])
+
+        before = _best_of(lambda: JSONResponse(jsonable_encoder(objects)).body, repeat)
+        validated = _best_of(
+            lambda: FastJSONResponse(
+                adapter.dump_python(adapter.validate_python(rows_to_dicts(names, projected)), mode="json")
+            ).body,
+            repeat,
+        )
+        after = _best_of(lambda: FastJSONResponse(rows_to_dicts(names, projected)).body, repeat)
+
+        per_row = lambda seconds: seconds / rows * 1e6
+        print(
+            f"{name:<16} {per_row(before):>15.2f} {per_row(validated):>16.2f} "
+            f"{per_row(after):>16.2f} {before / after:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main(total_rows, repetitions)
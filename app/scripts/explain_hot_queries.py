@@ -0,0 +1,118 @@
+"""
+Verifica com EXPLAIN que as consultas quentes usam os índices compostos.
+
+Com seq scan desabilitado na sessão, o planner escolhe um índice sempre
+que algum serve para a consulta; o script confere se é o índice esperado.
+Sai com código 1 se alguma consulta não usar o índice.
+
+É a checagem de regressão dos índices: o projeto não tem suíte de testes,
+então rode à mão (ou no CI) contra um banco migrado sempre que mudar uma
+consulta quente ou um índice.
+
+Uso: alembic upgrade head && python -m app.scripts.explain_hot_queries
+"""
+import json
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from app.core.intervals import blocks_query, busy_appointments_query, conflict_query
+from app.database import engine
+from app.models.appointment import Appointment
+from app.models.business_hours import BusinessHours
+from app.models.daily_stats import BarberDailyStats
+
+
+BARBER_ID = 1
+START = datetime(2030, 1, 7, 9, 0)
+END = START + timedelta(minutes=30)
+DAY_START = datetime(2030, 1, 7, 8, 0)
+
+
+def _hot_queries():
+    yield (
+        "conflito de reserva",
+        conflict_query(BARBER_ID, START, END, not_before=DAY_START),
+        {"ix_appointment_barber_time_active"},
+    )
+    yield (
+        "disponibilidade: agendamentos",
+        busy_appointments_query([BARBER_ID], DAY_START, DAY_START + timedelta(days=14)),
+        {"ix_appointment_barber_time_active"},
+    )
+    yield (
+        "disponibilidade: bloqueios",
+        blocks_query([BARBER_ID], DAY_START, DAY_START + timedelta(days=14)),
+        {"ix_timeblock_barber_end_start"},
+    )
+    yield (
+        "listagem paginada",
+        select(Appointment.id, Appointment.appointment_time)
+        .where(
+            Appointment.barber_id == BARBER_ID,
+            tuple_(Appointment.appointment_time, Appointment.id) > tuple_(START, 10),
+        )
+        .order_by(Appointment.appointment_time, Appointment.id)
+        .limit(51),
+        {"ix_appointment_barber_time_id"},
+    )
+    yield (
+        "horário do dia",
+        select(BusinessHours).where(
+            BusinessHours.barber_id == BARBER_ID,
+            BusinessHours.weekday == START.weekday(),
+        ),
+        {"uq_businesshours_barber_weekday"},
+    )
+    yield (
+        "dashboard mensal",
+        select(BarberDailyStats).where(
+            BarberDailyStats.barber_id == BARBER_ID,
+            BarberDailyStats.day >= START.date(),
+            BarberDailyStats.day <= (START + timedelta(days=30)).date(),
+        ),
+        {"barber_daily_stats_pkey"},
+    )
+
+
+def _index_names(plan) -> set:
+    names = set()
+    if isinstance(plan, dict):
+        if "Index Name" in plan:
+            names.add(plan["Index Name"])
+        for value in plan.values():
+            names |= _index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            names |= _index_names(item)
+    return names
+
+
+def main() -> int:
+    failures = 0
+
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+
+        for name, query, expected in _hot_queries():
+            sql = str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+            raw_plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+            plan = raw_plan if isinstance(raw_plan, list) else json.loads(raw_plan)
+
+            used = _index_names(plan)
+            missing = expected - used
+
+            if missing:
+                failures += 1
+                print(f"❌ {name}: esperava {sorted(missing)}, usou {sorted(used) or 'nenhum índice'}")
+            else:
+                print(f"✅ {name}: {sorted(used)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Provedor de pagamento de mentira para testar o webhook e o worker.
+
+Cria agendamentos concluídos com pagamento pendente pela API, depois manda
+os eventos payment.succeeded assinados como um provedor real faria: em
+rajada, fora de ordem e com reenvios do mesmo evento. Mede a latência do
+webhook e espera o worker deixar todos os agendamentos como pagos.
+
+A API precisa estar no ar com o mesmo segredo, por exemplo:
+
+    PAYMENT_WEBHOOK_SECRET=teste uvicorn app.main:app
+    PAYMENT_WEBHOOK_SECRET=teste python -m app.scripts.fake_payment_provider
+
+Opções: --payments N, --duplicates D (envios de cada evento),
+--concurrency C, --provider nome, --timeout segundos
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from app.core.webhooks import sign_payload, webhook_secret
+from app.scripts.load_test import Fixture, percentile
+
+
+async def _pending_payments(fx: Fixture, total: int, concurrency: int):
+    """Agenda, conclui e abre o pagamento de `total` atendimentos."""
+    semaphore = asyncio.Semaphore(concurrency)
+    first_day = date.today() + timedelta(days=random.randint(400, 4000))
+
+    async def one(i: int) -> int:
+        async with semaphore:
+            slot = datetime.combine(first_day + timedelta(days=i // 20), datetime.min.time())
+            slot += timedelta(hours=8, minutes=30 * (i % 20))
+            response = await fx.client.post(
+                "/appointments/",
+                json={"service_id": fx.service_id, "appointment_time": slot.isoformat()},
+                headers=fx.client_headers,
+            )
+            response.raise_for_status()
+            appointment_id = response.json()["id"]
+
+            response = await fx.client.patch(
+                f"/appointments/{appointment_id}/complete", headers=fx.barber_headers
+            )
+            response.raise_for_status()
+
+            response = await fx.client.post(
+                f"/payments/create/{appointment_id}", headers=fx.client_headers
+            )
+            response.raise_for_status()
+            return response.json()["id"]
+
+    return await asyncio.gather(*(one(i) for i in range(total)))
+
+
+async def _paid_count(fx: Fixture) -> int:
+    total, cursor = 0, None
+    while True:
+        params = {"payment_status": "paid", "fields": "payment_status", "limit": 200}
+        if cursor:
+            params["cursor"] = cursor
+        response = await fx.client.get("/appointments/", params=params, headers=fx.barber_headers)
+        response.raise_for_status()
+        page = response.json()
+        total += len(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return total
+
+
+async def main(base_url: str, provider: str, total: int, duplicates: int, concurrency: int, timeout: float):
+    secret = webhook_secret(provider)
+    if not secret:
+        raise SystemExit("Defina PAYMENT_WEBHOOK_SECRET (o mesmo da API)")
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        fx = Fixture(client)
+        await fx.setup()
+
+        payment_ids = await _pending_payments(fx, total, concurrency)
+        print(f"{len(payment_ids)} pagamentos pendentes criados")
+
+        events = [
+            json.dumps({
+                "id": f"evt_{uuid.uuid4().hex}",
+                "type": "payment.succeeded",
+                "data": {"payment_id": payment_id, "external_id": f"{provider}_{uuid.uuid4().hex[:12]}"},
+            }).encode()
+            for payment_id in payment_ids
+        ]
+        # reenvios do provedor chegam embaralhados com os originais
+        deliveries = events * duplicates
+        random.shuffle(deliveries)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+        statuses = Counter()
+
+        async def deliver(body: bytes):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/webhooks/payments/{provider}",
+                    content=body,
+                    headers={"Content-Type": "application/json", "X-Signature": sign_payload(secret, body)},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code == 200:
+                    statuses["duplicate" if response.json().get("duplicate") else "queued"] += 1
+                else:
+                    statuses[response.status_code] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(deliver(body) for body in deliveries))
+        elapsed = time.perf_counter() - started
+
+        forged = await client.post(
+            f"/webhooks/payments/{provider}",
+            content=events[0],
+            headers={"Content-Type": "application/json", "X-Signature": sign_payload("errado", events[0])},
+        )
+
+        print(
+            f"webhook: {len(deliveries)} envios em {elapsed:.2f}s ({len(deliveries) / elapsed:.0f}/s), "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms"
+        )
+        print(f"respostas: {dict(statuses)}; assinatura falsa -> {forged.status_code}")
+
+        deadline = time.perf_counter() + timeout
+        paid = 0
+        while time.perf_counter() < deadline:
+            paid = await _paid_count(fx)
+            if paid >= total:
+                break
+            await asyncio.sleep(0.5)
+
+        drained = time.perf_counter() - started
+        print(f"pagos: {paid}/{total} ({drained:.2f}s desde o primeiro envio)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", nargs="?", default="http://localhost:8000")
+    parser.add_argument("--provider", default="fakepay")
+    parser.add_argument("--payments", type=int, default=200)
+    parser.add_argument("--duplicates", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.target, args.provider, args.payments, args.duplicates, args.concurrency, args.timeout))
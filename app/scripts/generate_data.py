@@ -0,0 +1,392 @@
+"""
+Gerador de dados sintéticos para benchmark e teste de carga.
+
+Cria N barbeiros e M clientes com horários, serviços, bloqueios e anos de
+histórico de agendamentos e pagamentos, com distribuições parecidas com as
+reais: sexta e sábado mais cheios, serviços com pesos diferentes, poucos
+clientes fiéis concentrando boa parte das visitas, cancelamentos e faltas.
+
+Tudo vai para o banco em lotes de insert() (sem session.add por linha) e,
+no fim, o rollup do dashboard é recalculado. O mesmo --seed gera os mesmos
+dados (relativos à data de hoje); os e-mails levam o seed, então rode outro
+seed para somar mais dados.
+
+Todos os usuários têm a senha PASSWORD abaixo; o primeiro barbeiro e o
+primeiro cliente são synth<seed>-barber-0@example.com e
+synth<seed>-client-0@example.com.
+
+Uso: python -m app.scripts.generate_data --barbers 20 --clients 5000 --years 3
+"""
+import argparse
+import math
+import random
+import time
+from bisect import bisect_left
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, select
+
+from app.core.security import get_password_hash
+from app.database import engine
+from app.models.appointment import Appointment
+from app.models.business_hours import BusinessHours
+from app.models.payment import Payment
+from app.models.service import Service
+from app.models.time_block import TimeBlock
+from app.models.user import User
+from app.scripts import rebuild_daily_stats
+
+
+PASSWORD = "synth123"
+BATCH_SIZE = 5000
+
+# nome, duração (min), preço, peso na escolha
+SERVICE_CATALOG = (
+    ("Corte", 30, 40.0, 10),
+    ("Barba", 20, 30.0, 5),
+    ("Corte + Barba", 50, 65.0, 6),
+    ("Pezinho", 15, 15.0, 2),
+    ("Sobrancelha", 15, 20.0, 2),
+    ("Pigmentação", 60, 80.0, 1),
+)
+
+# movimento relativo por dia da semana (0=segunda)
+WEEKDAY_LOAD = (0.6, 0.7, 0.8, 0.9, 1.2, 1.4, 0.0)
+
+OPEN_TIME = dtime(8, 0)
+CLOSE_TIME = dtime(20, 0)
+LUNCH = (dtime(12, 0), dtime(13, 0))
+
+
+def _minutes(t: dtime) -> int:
+    return t.hour * 60 + t.minute
+
+
+def _insert_batches(conn, model, rows: List[dict], returning=None) -> list:
+    """
+    INSERT em lotes de BATCH_SIZE linhas. Passar a lista como parâmetros (e
+    não em .values(lista)) usa o "insertmanyvalues" do SQLAlchemy: o SQL é
+    compilado uma vez e vira INSERT ... VALUES de várias linhas, com
+    RETURNING na ordem das linhas enviadas.
+    """
+    if not rows:
+        return []
+    statement = insert(model)
+    if returning is not None:
+        statement = statement.returning(*returning, sort_by_parameter_order=True)
+    result = []
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = conn.execute(statement, rows[start:start + BATCH_SIZE])
+        if returning is not None:
+            result.extend(batch.all())
+    return result
+
+
+class Generator:
+    def __init__(self, seed: int, barbers: int, clients: int, years: float, per_day: float, future_days: int):
+        self.rng = random.Random(seed)
+        self.tag = f"synth{seed}"
+        self.barbers = barbers
+        self.clients = clients
+        self.per_day = per_day
+        self.today = date.today()
+        self.first_day = self.today - timedelta(days=int(years * 365))
+        self.last_day = self.today + timedelta(days=future_days)
+        self.counts: Dict[str, int] = {}
+
+    # =========================
+    # CADASTROS
+    # =========================
+
+    def users(self, conn) -> Tuple[List[int], List[int]]:
+        taken = conn.execute(
+            select(User.id).where(User.email == f"{self.tag}-barber-0@example.com")
+        ).first()
+        if taken:
+            raise SystemExit(f"Dados do seed já existem ({self.tag}); use outro --seed")
+
+        # um hash só: bcrypt por usuário levaria minutos
+        password_hash = get_password_hash(PASSWORD)
+        rows = [
+            {"name": f"Barbeiro {i}", "email": f"{self.tag}-barber-{i}@example.com",
+             "role": "barber", "password_hash": password_hash}
+            for i in range(self.barbers)
+        ] + [
+            {"name": f"Cliente {i}", "email": f"{self.tag}-client-{i}@example.com",
+             "role": "client", "password_hash": password_hash}
+            for i in range(self.clients)
+        ]
+        ids = {email: user_id for user_id, email in _insert_batches(conn, User, rows, (User.id, User.email))}
+        self.counts["users"] = len(ids)
+        return (
+            [ids[row["email"]] for row in rows[:self.barbers]],
+            [ids[row["email"]] for row in rows[self.barbers:]],
+        )
+
+    def business_hours(self, conn, barber_ids: List[int]) -> Dict[int, set]:
+        """Horários de cada barbeiro; devolve os dias da semana fechados."""
+        rows, closed = [], {}
+        for barber_id in barber_ids:
+            # domingo sempre fechado; alguns também folgam na segunda
+            closed[barber_id] = {6} | ({0} if self.rng.random() < 0.3 else set())
+            for weekday in range(7):
+                is_closed = weekday in closed[barber_id]
+                rows.append({
+                    "barber_id": barber_id,
+                    "weekday": weekday,
+                    "is_closed": is_closed,
+                    "open_time": None if is_closed else OPEN_TIME,
+                    "close_time": None if is_closed else CLOSE_TIME,
+                    "lunch_start": None if is_closed else LUNCH[0],
+                    "lunch_end": None if is_closed else LUNCH[1],
+                })
+        _insert_batches(conn, BusinessHours, rows)
+        self.counts["business_hours"] = len(rows)
+        return closed
+
+    def services(self, conn, barber_ids: List[int]) -> Dict[int, list]:
+        rows = []
+        for barber_id in barber_ids:
+            offered = [SERVICE_CATALOG[0]] + self.rng.sample(SERVICE_CATALOG[1:], self.rng.randint(2, 5))
+            for name, duration, price, _ in offered:
+                rows.append({
+                    "barber_id": barber_id,
+                    "name": name,
+                    "duration_minutes": duration,
+                    # cada barbeiro cobra um pouco diferente
+                    "price": round(price * self.rng.uniform(0.85, 1.25), 2),
+                    "active": True,
+                })
+
+        inserted = _insert_batches(
+            conn, Service, rows,
+            (Service.id, Service.barber_id, Service.name, Service.duration_minutes, Service.price),
+        )
+        weights = {name: weight for name, _, _, weight in SERVICE_CATALOG}
+        by_barber: Dict[int, list] = {}
+        for service_id, barber_id, name, duration, price in inserted:
+            by_barber.setdefault(barber_id, []).append((service_id, name, duration, price, weights[name]))
+        self.counts["services"] = len(rows)
+        return by_barber
+
+    # =========================
+    # AGENDA
+    # =========================
+
+    def _day_blocks(self, day: date) -> List[Tuple[int, int]]:
+        """Bloqueios pontuais do dia, em minutos desde meia-noite."""
+        if self.rng.random() >= 0.05:
+            return []
+        start = self.rng.randrange(_minutes(OPEN_TIME), _minutes(CLOSE_TIME) - 60, 30)
+        return [(start, start + self.rng.choice((30, 60, 90, 120)))]
+
+    def _vacations(self) -> List[Tuple[date, date]]:
+        """Uma ou duas semanas de folga por ano."""
+        periods = []
+        year = self.first_day.year
+        while year <= self.last_day.year:
+            start = date(year, 1, 1) + timedelta(days=self.rng.randrange(0, 350))
+            periods.append((start, start + timedelta(days=self.rng.choice((7, 14)))))
+            year += 1
+        return periods
+
+    def schedule(self, conn, barber_ids: List[int], client_ids: List[int], closed, services) -> None:
+        # poucos clientes fiéis concentram as visitas (pareto)
+        client_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(client_ids))]
+        client_cum = list(_cumulative(client_weights))
+        now = datetime.now()
+
+        totals = {"appointments": 0, "payments": 0, "time_blocks": 0}
+
+        for barber_id in barber_ids:
+            appointments, blocks = [], []
+            barber_services = services[barber_id]
+            service_cum = list(_cumulative([s[4] for s in barber_services]))
+            vacations = self._vacations()
+            # barbeiros com mais e menos movimento
+            barber_load = self.rng.uniform(0.6, 1.4)
+
+            for start, end in vacations:
+                blocks.append({
+                    "barber_id": barber_id,
+                    "start_time": datetime.combine(start, dtime.min),
+                    "end_time": datetime.combine(end, dtime.min),
+                    "reason": "Férias",
+                })
+
+            day = self.first_day
+            while day <= self.last_day:
+                if day.weekday() in closed[barber_id] or any(s <= day < e for s, e in vacations):
+                    day += timedelta(days=1)
+                    continue
+
+                busy = [(_minutes(LUNCH[0]), _minutes(LUNCH[1]))]
+                for start, end in self._day_blocks(day):
+                    busy.append((start, end))
+                    blocks.append({
+                        "barber_id": barber_id,
+                        "start_time": datetime.combine(day, dtime.min) + timedelta(minutes=start),
+                        "end_time": datetime.combine(day, dtime.min) + timedelta(minutes=end),
+                        "reason": self.rng.choice(("Consulta médica", "Curso", "Compromisso")),
+                    })
+
+                wanted = _poisson(self.rng, self.per_day * WEEKDAY_LOAD[day.weekday()] * barber_load)
+                cursor = _minutes(OPEN_TIME)
+                for _ in range(wanted):
+                    service = barber_services[_weighted_index(self.rng, service_cum)]
+                    cursor += self.rng.choice((0, 0, 0, 10, 15, 30))
+                    cursor = _skip_busy(cursor, service[2], busy)
+                    if cursor + service[2] > _minutes(CLOSE_TIME):
+                        break
+                    when = datetime.combine(day, dtime.min) + timedelta(minutes=cursor)
+                    appointments.append(self._appointment(
+                        barber_id, client_ids[_weighted_index(self.rng, client_cum)], service, when, now
+                    ))
+                    cursor += service[2]
+
+                day += timedelta(days=1)
+
+            _insert_batches(conn, TimeBlock, blocks)
+            inserted = _insert_batches(
+                conn, Appointment, appointments,
+                (Appointment.id, Appointment.client_id, Appointment.appointment_time, Appointment.status,
+                 Appointment.payment_status, Appointment.service_price_snapshot),
+            )
+            payments = self._payments(inserted)
+            _insert_batches(conn, Payment, payments)
+
+            totals["appointments"] += len(appointments)
+            totals["payments"] += len(payments)
+            totals["time_blocks"] += len(blocks)
+
+        self.counts.update(totals)
+
+    def _appointment(self, barber_id: int, client_id: int, service, when: datetime, now: datetime) -> dict:
+        service_id, name, duration, price, _ = service
+        roll = self.rng.random()
+
+        canceled_at = None
+        if when < now:
+            status = "completed" if roll < 0.82 else "canceled" if roll < 0.94 else "no_show"
+        else:
+            status = "confirmed" if roll < 0.5 else "pending" if roll < 0.92 else "canceled"
+
+        if status == "canceled":
+            canceled_at = when - timedelta(hours=self.rng.randint(1, 72))
+
+        payment_status = "unpaid"
+        if status == "completed":
+            payment_status = "paid" if self.rng.random() < 0.93 else "unpaid"
+
+        return {
+            "client_id": client_id,
+            "barber_id": barber_id,
+            "service_id": service_id,
+            "appointment_time": when,
+            "service_name_snapshot": name,
+            "service_price_snapshot": price,
+            "service_duration_snapshot": duration,
+            "status": status,
+            "payment_status": payment_status,
+            "created_at": when - timedelta(days=self.rng.randint(0, 21), minutes=self.rng.randint(0, 600)),
+            "canceled_at": canceled_at,
+            "canceled_by": "client" if canceled_at else None,
+            "cancel_reason": "Cancelado" if canceled_at else None,
+        }
+
+    def _payments(self, appointments) -> List[dict]:
+        rows = []
+        for appointment_id, client_id, when, status, payment_status, price in appointments:
+            if status != "completed":
+                continue
+            provider = self.rng.choice(("manual", "manual", "stripe", "mercadopago"))
+            # algumas tentativas recusadas antes do pagamento
+            if self.rng.random() < 0.03:
+                rows.append({
+                    "appointment_id": appointment_id, "client_id": client_id,
+                    "provider": provider, "external_id": None,
+                    "amount": price, "status": "failed", "created_at": when, "paid_at": None,
+                })
+            paid = payment_status == "paid"
+            rows.append({
+                "appointment_id": appointment_id,
+                "client_id": client_id,
+                "provider": provider,
+                "external_id": f"{provider}_{appointment_id}" if paid and provider != "manual" else None,
+                "amount": price,
+                "status": "paid" if paid else "pending",
+                "created_at": when + timedelta(minutes=30),
+                "paid_at": when + timedelta(minutes=31) if paid else None,
+            })
+        return rows
+
+
+def _cumulative(weights):
+    total = 0.0
+    for weight in weights:
+        total += weight
+        yield total
+
+
+def _weighted_index(rng: random.Random, cumulative: List[float]) -> int:
+    # random.choices recalcularia os acumulados a cada chamada
+    return min(bisect_left(cumulative, rng.random() * cumulative[-1]), len(cumulative) - 1)
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    # Knuth; médias por dia são pequenas (< 30)
+    if mean <= 0:
+        return 0
+    limit, k, p = math.exp(-mean), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def _skip_busy(start: int, duration: int, busy: List[Tuple[int, int]]) -> int:
+    moved = True
+    while moved:
+        moved = False
+        for busy_start, busy_end in busy:
+            if start < busy_end and start + duration > busy_start:
+                start = busy_end
+                moved = True
+    return start
+
+
+def main(seed: int, barbers: int, clients: int, years: float, per_day: float, future_days: int, rebuild: bool):
+    generator = Generator(seed, barbers, clients, years, per_day, future_days)
+    started = time.perf_counter()
+
+    with engine.begin() as conn:
+        barber_ids, client_ids = generator.users(conn)
+        closed = generator.business_hours(conn, barber_ids)
+        services = generator.services(conn, barber_ids)
+        generator.schedule(conn, barber_ids, client_ids, closed, services)
+
+    elapsed = time.perf_counter() - started
+    rows = sum(generator.counts.values())
+    print(f"✅ {rows} linhas em {elapsed:.1f}s ({rows / elapsed:.0f} linhas/s)")
+    for table, count in generator.counts.items():
+        print(f"   {table:<15} {count}")
+    print(f"Login: {generator.tag}-barber-0@example.com / {PASSWORD}")
+
+    if rebuild:
+        rebuild_daily_stats.main()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--barbers", type=int, default=10)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--years", type=float, default=2)
+    parser.add_argument("--per-day", type=float, default=10, help="média de atendimentos por barbeiro por dia")
+    parser.add_argument("--future-days", type=int, default=30)
+    parser.add_argument("--no-rebuild", action="store_true", help="não recalcular o rollup do dashboard")
+    args = parser.parse_args()
+
+    main(args.seed, args.barbers, args.clients, args.years, args.per_day, args.future_days, not args.no_rebuild)
@@ -0,0 +1,341 @@
+"""
+Teste de carga HTTP com cenários da API.
+
+Roda contra um ou mais servidores já no ar e imprime throughput e latência
+(p50/p99) por cenário, lado a lado. Para comparar a stack async com a sync,
+suba as duas versões em portas diferentes, por exemplo:
+
+    git worktree add ../agendamento-sync <commit-sync>
+    (cd ../agendamento-sync && uvicorn app.main:app --port 8001)
+    uvicorn app.main:app --port 8000
+
+    python -m app.scripts.load_test http://localhost:8001 http://localhost:8000
+
+Opções: --requests N (por cenário), --concurrency C, --scenarios a,b,c,
+--warmup N (requisições descartadas antes de medir)
+
+Por padrão cada execução cria um barbeiro e um cliente novos, com agenda
+vazia. Para medir com volume real, gere dados com app.scripts.generate_data
+e use os usuários gerados:
+
+    python -m app.scripts.generate_data --seed 1 --barbers 20 --clients 5000 --years 3
+    python -m app.scripts.load_test --barber-email synth1-barber-0@example.com \
+        --client-email synth1-client-0@example.com --password synth123
+
+Para pegar regressões, salve uma execução de referência e compare as
+seguintes com ela (sai com código 1 se p99 ou req/s piorarem além do limite):
+
+    python -m app.scripts.load_test --save baseline.json
+    python -m app.scripts.load_test --baseline baseline.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import statistics
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+import httpx
+
+
+PASSWORD = "load123"
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class Fixture:
+    """Usuários, serviço e horário de funcionamento criados para o teste."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.barber_headers = {}
+        self.client_headers = {}
+        self.barber_id = None
+        self.service_id = None
+        self.client_credentials = {}
+
+    async def login(self, email: str, password: str) -> dict:
+        response = await self.client.post(
+            "/auth/login", data={"username": email, "password": password}
+        )
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def _user(self, role: str) -> dict:
+        email = f"load-{role}-{uuid.uuid4().hex[:8]}@example.com"
+        await self.client.post(
+            "/users/",
+            json={"name": f"load {role}", "email": email, "password": PASSWORD, "role": role},
+        )
+        if role == "client":
+            self.client_credentials = {"username": email, "password": PASSWORD}
+        return await self.login(email, PASSWORD)
+
+    async def attach(self, barber_email: str, client_email: str, password: str):
+        """Usa usuários que já existem (ex.: os do generate_data) em vez de criar novos."""
+        self.barber_headers = await self.login(barber_email, password)
+        self.client_headers = await self.login(client_email, password)
+        self.client_credentials = {"username": client_email, "password": password}
+
+        response = await self.client.get("/services/", headers=self.barber_headers)
+        response.raise_for_status()
+        self.service_id = response.json()[0]["id"]
+
+        response = await self.client.get(
+            "/appointments/", params={"limit": 1, "fields": "barber_id"}, headers=self.barber_headers
+        )
+        response.raise_for_status()
+        items = response.json()["items"]
+        if not items:
+            raise SystemExit(f"{barber_email} não tem agendamentos; rode generate_data antes")
+        self.barber_id = items[0]["barber_id"]
+
+    async def setup(self):
+        self.barber_headers = await self._user("barber")
+        self.client_headers = await self._user("client")
+
+        for weekday in range(7):
+            await self.client.put(
+                f"/business-hours/{weekday}",
+                json={
+                    "barber_id": 0,
+                    "weekday": weekday,
+                    "is_closed": False,
+                    "open_time": "08:00:00",
+                    "close_time": "20:00:00",
+                },
+                headers=self.barber_headers,
+            )
+
+        response = await self.client.post(
+            "/services/",
+            json={"name": "Corte", "duration_minutes": 30, "price": 40.0, "barber_id": 0},
+            headers=self.barber_headers,
+        )
+        response.raise_for_status()
+        service = response.json()
+        self.service_id = service["id"]
+        self.barber_id = service["barber_id"]
+
+
+# =========================
+# CENÁRIOS
+# =========================
+
+def _random_future_slot() -> str:
+    day = date.today() + timedelta(days=random.randint(30, 3000))
+    minutes = random.randrange(0, 12 * 60 - 30, 15)
+    return (datetime.combine(day, datetime.min.time()) + timedelta(hours=8, minutes=minutes)).isoformat()
+
+
+async def scenario_booking(fx: Fixture) -> httpx.Response:
+    return await fx.client.post(
+        "/appointments/",
+        json={"service_id": fx.service_id, "appointment_time": _random_future_slot()},
+        headers=fx.client_headers,
+    )
+
+
+async def scenario_availability(fx: Fixture) -> httpx.Response:
+    start = date.today() + timedelta(days=1)
+    return await fx.client.get(
+        "/appointments/availability",
+        params={
+            "barber_id": fx.barber_id,
+            "service_id": fx.service_id,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=13)).isoformat(),
+        },
+        headers=fx.client_headers,
+    )
+
+
+async def scenario_list(fx: Fixture) -> httpx.Response:
+    return await fx.client.get("/appointments/", headers=fx.barber_headers)
+
+
+async def scenario_dashboard(fx: Fixture) -> httpx.Response:
+    today = date.today()
+    return await fx.client.get(
+        "/dashboard/monthly",
+        params={"year": today.year, "month": today.month},
+        headers=fx.barber_headers,
+    )
+
+
+async def scenario_dashboard_range(fx: Fixture) -> httpx.Response:
+    today = date.today()
+    return await fx.client.get(
+        "/dashboard/range",
+        params={
+            "start_date": (today - timedelta(days=365)).isoformat(),
+            "end_date": today.isoformat(),
+            "group_by": "month",
+        },
+        headers=fx.barber_headers,
+    )
+
+
+async def scenario_grid(fx: Fixture) -> httpx.Response:
+    start = date.today()
+    return await fx.client.get(
+        "/schedule/grid",
+        params={
+            "barber_ids": str(fx.barber_id),
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=6)).isoformat(),
+        },
+        headers=fx.client_headers,
+    )
+
+
+async def scenario_login(fx: Fixture) -> httpx.Response:
+    return await fx.client.post("/auth/login", data=fx.client_credentials)
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "booking": scenario_booking,
+    "availability": scenario_availability,
+    "grid": scenario_grid,
+    "list": scenario_list,
+    "dashboard": scenario_dashboard,
+    "dashboard_range": scenario_dashboard_range,
+}
+
+
+async def run_scenario(fx: Fixture, scenario, total: int, concurrency: int, warmup: int = 0) -> dict:
+    # aquece pool de conexões, caches e JIT de planos antes de medir
+    for _ in range(warmup):
+        try:
+            await scenario(fx)
+        except httpx.HTTPError:
+            pass
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = Counter()
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await scenario(fx)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "statuses": dict(statuses),
+    }
+
+
+async def run_target(base_url: str, scenarios, total: int, concurrency: int, warmup: int, users=None) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        fx = Fixture(client)
+        if users:
+            await fx.attach(*users)
+        else:
+            await fx.setup()
+        return {
+            name: await run_scenario(fx, SCENARIOS[name], total, concurrency, warmup)
+            for name in scenarios
+        }
+
+
+def _print_report(results: dict, scenarios):
+    print(f"{'cenário':<16} {'servidor':<28} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}  status")
+    for name in scenarios:
+        for base_url, by_scenario in results.items():
+            r = by_scenario[name]
+            print(
+                f"{name:<16} {base_url:<28} {r['rps']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8}  {r['statuses']}"
+            )
+
+
+def compare_with_baseline(results: dict, baseline: dict, max_regression: float) -> bool:
+    """
+    Compara cada servidor/cenário com a execução de referência. Regressão:
+    p99 maior ou req/s menor que a referência em mais de max_regression.
+    """
+    ok = True
+    print(f"\ncomparação com a referência (limite {max_regression:.0%})")
+    for base_url, by_scenario in results.items():
+        reference = baseline.get(base_url) or next(iter(baseline.values()), {})
+        for name, r in by_scenario.items():
+            ref = reference.get(name)
+            if not ref:
+                continue
+            p99_change = r["p99_ms"] / ref["p99_ms"] - 1 if ref["p99_ms"] else 0.0
+            rps_change = r["rps"] / ref["rps"] - 1 if ref["rps"] else 0.0
+            regressed = p99_change > max_regression or rps_change < -max_regression
+            ok = ok and not regressed
+            print(
+                f"{'❌' if regressed else '✅'} {name:<16} p99 {ref['p99_ms']} -> {r['p99_ms']} ms ({p99_change:+.0%}), "
+                f"req/s {ref['rps']} -> {r['rps']} ({rps_change:+.0%})"
+            )
+    return ok
+
+
+async def main(targets, scenarios, total: int, concurrency: int, warmup: int = 0, users=None):
+    results = {}
+    for base_url in targets:
+        results[base_url] = await run_target(base_url, scenarios, total, concurrency, warmup, users)
+    _print_report(results, scenarios)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=["http://localhost:8000"])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--barber-email")
+    parser.add_argument("--client-email")
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--save", help="grava o resultado em JSON")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior (--save) para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    users = None
+    if args.barber_email or args.client_email:
+        if not (args.barber_email and args.client_email):
+            parser.error("--barber-email e --client-email vão juntos")
+        users = (args.barber_email, args.client_email, args.password)
+
+    scenario_names = args.scenarios.split(",")
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"cenários desconhecidos: {', '.join(unknown)}")
+
+    results = asyncio.run(main(args.targets, scenario_names, args.requests, args.concurrency, args.warmup, users))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare_with_baseline(results, baseline, args.max_regression):
+            sys.exit(1)
@@ -0,0 +1,34 @@
+"""
+Worker da fila de webhooks de pagamento fora da API.
+
+Útil quando a API roda com PAYMENT_WORKER_ENABLED=false (por exemplo, com
+vários processos uvicorn e um worker dedicado). Pode rodar mais de um:
+os lotes usam FOR UPDATE SKIP LOCKED.
+
+Uso: python -m app.scripts.payment_worker [--once]
+"""
+import asyncio
+import logging
+import sys
+
+from app.core.payment_worker import PaymentEventWorker
+
+
+async def main(once: bool):
+    worker = PaymentEventWorker()
+    if once:
+        total = 0
+        while True:
+            done = await worker.run_once()
+            total += done
+            if done < worker.batch_size:
+                break
+        print(f"{total} eventos processados")
+        return
+
+    await worker.run_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main("--once" in sys.argv[1:]))
@@ -0,0 +1,458 @@
+"""
+Provisionamento de barbearias (franquias) a partir de um arquivo de spec.
+
+Lê um YAML ou JSON com barbeiros, horários, serviços e bloqueios e aplica
+tudo com INSERT ... ON CONFLICT DO UPDATE: um comando por tabela, não
+importa quantos barbeiros. Rodar de novo com a mesma spec não grava nada
+(linhas iguais são puladas no próprio ON CONFLICT).
+
+Uso:
+    python -m app.scripts.provision franquia.yaml --dry-run   # só mostra o diff
+    python -m app.scripts.provision franquia.yaml
+    python -m app.scripts.provision franquia.yaml --prune     # desativa serviços fora da spec
+
+Spec:
+
+    password: troque123          # senha dos barbeiros criados agora
+    defaults:                    # valem para todos os barbeiros
+      hours:
+        mon: {open: "08:00", close: "20:00", lunch: ["12:00", "13:00"]}
+        sat: {open: "08:00", close: "14:00"}
+        sun: closed
+      services:
+        - {name: Corte, duration_minutes: 30, price: 40}
+    barbers:
+      - email: joao@franquia.com
+        name: João
+        hours:                   # sobrescreve o dia inteiro
+          sat: closed
+        services:                # mesmo nome: sobrescreve campos do default
+          - {name: Corte, price: 45}
+          - {name: Barba, duration_minutes: 20, price: 30}
+        blocks:
+          - {start: "2026-12-24T00:00", end: "2026-12-26T00:00", reason: Natal}
+
+Dias: mon..sun, seg..dom ou 0..6 (0 = segunda). Dias que não aparecem
+nem no default nem no barbeiro não são alterados. Bloqueios não têm chave
+natural: são criados se ainda não existir um igual (mesmo início e fim).
+
+Cache de agenda: o script invalida os barbeiros alterados, mas sem
+REDIS_URL a invalidação só vale para este processo. A API em execução
+continua com horários e bloqueios antigos até vencer
+SCHEDULE_CACHE_TTL_SECONDS (padrão 300s); rode com o mesmo REDIS_URL da
+API para a mudança valer na hora.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.schedule_cache import SCHEDULE_CACHE_TTL_SECONDS, schedule_cache
+from app.core.security import get_password_hash
+from app.database import engine
+from app.models.business_hours import BusinessHours
+from app.models.service import Service
+from app.models.time_block import TimeBlock
+from app.models.user import User
+
+
+WEEKDAYS = {
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6,
+    "seg": 0, "ter": 1, "qua": 2, "qui": 3, "sex": 4, "sab": 5, "sáb": 5, "dom": 6,
+}
+WEEKDAY_NAMES = ("seg", "ter", "qua", "qui", "sex", "sáb", "dom")
+
+HOURS_FIELDS = ("is_closed", "open_time", "close_time", "lunch_start", "lunch_end")
+SERVICE_FIELDS = ("duration_minutes", "price", "active")
+
+
+class ProvisionError(ValueError):
+    pass
+
+
+# =========================
+# SPEC
+# =========================
+
+def load_spec(path: str) -> Dict[str, Any]:
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith((".yaml", ".yml")):
+        import yaml  # só necessário para specs em YAML
+
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+def _weekday(key) -> int:
+    if isinstance(key, int) and 0 <= key <= 6:
+        return key
+    if isinstance(key, str) and key.strip().lower() in WEEKDAYS:
+        return WEEKDAYS[key.strip().lower()]
+    raise ProvisionError(f"Dia da semana inválido: {key!r}")
+
+
+def _time(value) -> time:
+    # YAML 1.1 lê 08:00 sem aspas como sexagesimal (480 minutos)
+    if isinstance(value, int):
+        return time(value // 60, value % 60)
+    try:
+        return time.fromisoformat(str(value))
+    except ValueError:
+        raise ProvisionError(f"Horário inválido: {value!r}")
+
+
+def _datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ProvisionError(f"Data/hora inválida: {value!r}")
+
+
+def _day_hours(value) -> Dict[str, Any]:
+    if value == "closed" or value is None:
+        return {"is_closed": True, "open_time": None, "close_time": None, "lunch_start": None, "lunch_end": None}
+
+    if not isinstance(value, dict) or "open" not in value or "close" not in value:
+        raise ProvisionError(f"Horário do dia precisa de open e close (ou 'closed'): {value!r}")
+
+    open_time, close_time = _time(value["open"]), _time(value["close"])
+    if open_time >= close_time:
+        raise ProvisionError(f"open deve ser antes de close: {value!r}")
+
+    lunch_start = lunch_end = None
+    if value.get("lunch"):
+        if not isinstance(value["lunch"], (list, tuple)) or len(value["lunch"]) != 2:
+            raise ProvisionError(f"lunch deve ser [início, fim]: {value!r}")
+        lunch_start, lunch_end = (_time(t) for t in value["lunch"])
+        if not (open_time <= lunch_start < lunch_end <= close_time):
+            raise ProvisionError(f"Almoço fora do expediente: {value!r}")
+
+    return {
+        "is_closed": False,
+        "open_time": open_time,
+        "close_time": close_time,
+        "lunch_start": lunch_start,
+        "lunch_end": lunch_end,
+    }
+
+
+def _services(entries, base: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    merged = {name: dict(fields) for name, fields in (base or {}).items()}
+    for entry in entries or []:
+        if not isinstance(entry, dict) or not entry.get("name"):
+            raise ProvisionError(f"Serviço sem name: {entry!r}")
+        fields = merged.setdefault(str(entry["name"]), {"active": True})
+        fields.update({key: entry[key] for key in SERVICE_FIELDS if key in entry})
+
+    for name, fields in merged.items():
+        if "duration_minutes" not in fields or "price" not in fields:
+            raise ProvisionError(f"Serviço {name!r} precisa de duration_minutes e price")
+        try:
+            fields["duration_minutes"] = int(fields["duration_minutes"])
+            fields["price"] = float(fields["price"])
+        except (TypeError, ValueError):
+            raise ProvisionError(f"Serviço {name!r} com duração ou preço inválido")
+        fields["active"] = bool(fields["active"])
+        if fields["duration_minutes"] <= 0 or fields["price"] < 0:
+            raise ProvisionError(f"Serviço {name!r} com duração ou preço inválido")
+    return merged
+
+
+def normalize_spec(spec: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    email -> {"name", "hours": {weekday: campos}, "services": {nome: campos},
+    "blocks": {(início, fim): motivo}} com os defaults já aplicados.
+    """
+    defaults = spec.get("defaults") or {}
+    default_hours = {_weekday(k): _day_hours(v) for k, v in (defaults.get("hours") or {}).items()}
+    default_services = _services(defaults.get("services"))
+
+    barbers: Dict[str, Dict[str, Any]] = {}
+    for entry in spec.get("barbers") or []:
+        email = str(entry.get("email") or "").strip().lower()
+        if not email:
+            raise ProvisionError(f"Barbeiro sem email: {entry!r}")
+        if email in barbers:
+            raise ProvisionError(f"Barbeiro repetido na spec: {email}")
+
+        hours = dict(default_hours)
+        hours.update({_weekday(k): _day_hours(v) for k, v in (entry.get("hours") or {}).items()})
+
+        blocks = {}
+        for block in entry.get("blocks") or []:
+            start, end = _datetime(block.get("start")), _datetime(block.get("end"))
+            if start >= end:
+                raise ProvisionError(f"Bloqueio com início depois do fim: {block!r}")
+            blocks[(start, end)] = block.get("reason") or "Bloqueio"
+
+        barbers[email] = {
+            # sem name: barbeiro existente mantém o nome; novo usa o início do email
+            "name": entry.get("name"),
+            "hours": hours,
+            "services": _services(entry.get("services"), default_services),
+            "blocks": blocks,
+        }
+
+    if not barbers:
+        raise ProvisionError("Spec sem barbeiros")
+    return barbers
+
+
+# =========================
+# DIFF
+# =========================
+
+def _fmt_hours(fields: Dict[str, Any]) -> str:
+    if fields["is_closed"]:
+        return "fechado"
+    text = f"{fields['open_time']:%H:%M}-{fields['close_time']:%H:%M}"
+    if fields["lunch_start"]:
+        text += f" almoço {fields['lunch_start']:%H:%M}-{fields['lunch_end']:%H:%M}"
+    return text
+
+
+def _changes(current: Dict[str, Any], desired: Dict[str, Any], fields) -> List[str]:
+    return [f"{f}: {current[f]} -> {desired[f]}" for f in fields if current[f] != desired[f]]
+
+
+class Plan:
+    """Estado atual dos barbeiros da spec (4 SELECTs) e o que muda."""
+
+    def __init__(self, conn, barbers: Dict[str, Dict[str, Any]], prune: bool):
+        self.barbers = barbers
+        self.lines: List[str] = []
+        self.created = self.updated = self.unchanged = 0
+
+        users = conn.execute(
+            select(User.email, User.id, User.name, User.role).where(User.email.in_(list(barbers)))
+        ).all()
+        self.user_ids = {}
+        names = {}
+        for email, user_id, name, role in users:
+            if role != "barber":
+                raise ProvisionError(f"{email} já existe e não é barbeiro (role={role})")
+            self.user_ids[email] = user_id
+            names[email] = name
+
+        for email, barber in barbers.items():
+            if not barber["name"]:
+                barber["name"] = names.get(email) or email.split("@")[0]
+        self.new_barbers = [email for email in barbers if email not in self.user_ids]
+
+        ids = list(self.user_ids.values())
+        hours = {
+            (row.barber_id, row.weekday): row._asdict()
+            for row in conn.execute(
+                select(BusinessHours.barber_id, BusinessHours.weekday, *[getattr(BusinessHours, f) for f in HOURS_FIELDS])
+                .where(BusinessHours.barber_id.in_(ids))
+            )
+        }
+        services = {
+            (row.barber_id, row.name): row._asdict()
+            for row in conn.execute(
+                select(Service.barber_id, Service.name, *[getattr(Service, f) for f in SERVICE_FIELDS])
+                .where(Service.barber_id.in_(ids))
+            )
+        }
+        wanted_blocks = [
+            (self.user_ids[email], start, end)
+            for email, barber in barbers.items() if email in self.user_ids
+            for start, end in barber["blocks"]
+        ]
+        existing_blocks = set()
+        if wanted_blocks:
+            existing_blocks = set(conn.execute(
+                select(TimeBlock.barber_id, TimeBlock.start_time, TimeBlock.end_time)
+                .where(tuple_(TimeBlock.barber_id, TimeBlock.start_time, TimeBlock.end_time).in_(wanted_blocks))
+            ).all())
+
+        self.missing_blocks: List[Tuple[str, datetime, datetime, str]] = []
+        self.pruned: List[Tuple[int, str]] = []
+        self.changed_barbers = set()
+
+        for email, barber in barbers.items():
+            user_id = self.user_ids.get(email)
+            if user_id is None:
+                self._created(email, f"barbeiro {barber['name']}")
+            elif names[email] != barber["name"]:
+                self._updated(email, f"barbeiro nome: {names[email]} -> {barber['name']}")
+            else:
+                self.unchanged += 1
+
+            for weekday, fields in sorted(barber["hours"].items()):
+                current = hours.get((user_id, weekday))
+                label = f"horário {WEEKDAY_NAMES[weekday]}"
+                if current is None:
+                    self._created(email, f"{label} {_fmt_hours(fields)}", changed=True)
+                elif _changes(current, fields, HOURS_FIELDS):
+                    self._updated(email, f"{label}: {_fmt_hours(current)} -> {_fmt_hours(fields)}", changed=True)
+                else:
+                    self.unchanged += 1
+
+            for name, fields in barber["services"].items():
+                current = services.get((user_id, name))
+                if current is None:
+                    self._created(email, f"serviço {name} ({fields['duration_minutes']} min, R$ {fields['price']:.2f})")
+                elif _changes(current, fields, SERVICE_FIELDS):
+                    self._updated(email, f"serviço {name}: {', '.join(_changes(current, fields, SERVICE_FIELDS))}")
+                else:
+                    self.unchanged += 1
+
+            if prune and user_id is not None:
+                for (barber_id, name), current in services.items():
+                    if barber_id == user_id and name not in barber["services"] and current["active"]:
+                        self.pruned.append((barber_id, name))
+                        self._updated(email, f"serviço {name}: desativado (fora da spec)", sign="-")
+
+            for (start, end), reason in barber["blocks"].items():
+                if (user_id, start, end) in existing_blocks:
+                    self.unchanged += 1
+                else:
+                    self.missing_blocks.append((email, start, end, reason))
+                    self._created(email, f"bloqueio {start:%Y-%m-%d %H:%M} -> {end:%Y-%m-%d %H:%M} ({reason})", changed=True)
+
+    def _created(self, email: str, text: str, changed: bool = False):
+        self.created += 1
+        self.lines.append(f"+ {email}: {text}")
+        if changed:
+            self.changed_barbers.add(email)
+
+    def _updated(self, email: str, text: str, changed: bool = False, sign: str = "~"):
+        self.updated += 1
+        self.lines.append(f"{sign} {email}: {text}")
+        if changed:
+            self.changed_barbers.add(email)
+
+    @property
+    def summary(self) -> str:
+        return f"{self.created} a criar, {self.updated} a alterar, {self.unchanged} sem mudança"
+
+
+# =========================
+# APLICAR
+# =========================
+
+def _changed(table, excluded, fields):
+    # ON CONFLICT ... WHERE: linha igual à da spec não é reescrita
+    return tuple_(*[table.c[f] for f in fields]).is_distinct_from(tuple_(*[excluded[f] for f in fields]))
+
+
+def _apply(conn, plan: Plan, password: Optional[str]):
+    barbers = plan.barbers
+
+    if plan.new_barbers and not password:
+        raise ProvisionError(
+            f"Barbeiros novos sem senha ({', '.join(plan.new_barbers)}): defina password na spec ou use --password"
+        )
+    password_hash = get_password_hash(password) if plan.new_barbers else None
+
+    users = User.__table__
+    statement = insert(users).values([
+        {"email": email, "name": barber["name"], "role": "barber", "password_hash": password_hash or ""}
+        for email, barber in barbers.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["email"],
+        set_={"name": statement.excluded.name},
+        where=(users.c.role == "barber") & _changed(users, statement.excluded, ["name"]),
+    ).returning(users.c.email, users.c.id)
+    user_ids = dict(plan.user_ids)
+    user_ids.update(dict(conn.execute(statement).all()))
+
+    hours_rows = [
+        {"barber_id": user_ids[email], "weekday": weekday, **fields}
+        for email, barber in barbers.items()
+        for weekday, fields in barber["hours"].items()
+    ]
+    if hours_rows:
+        table = BusinessHours.__table__
+        statement = insert(table).values(hours_rows)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=["barber_id", "weekday"],
+            set_={f: statement.excluded[f] for f in HOURS_FIELDS},
+            where=_changed(table, statement.excluded, HOURS_FIELDS),
+        ))
+
+    service_rows = [
+        {"barber_id": user_ids[email], "name": name, **fields}
+        for email, barber in barbers.items()
+        for name, fields in barber["services"].items()
+    ]
+    if service_rows:
+        table = Service.__table__
+        statement = insert(table).values(service_rows)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=["barber_id", "name"],
+            set_={f: statement.excluded[f] for f in SERVICE_FIELDS},
+            where=_changed(table, statement.excluded, SERVICE_FIELDS),
+        ))
+
+    if plan.pruned:
+        conn.execute(
+            update(Service)
+            .where(tuple_(Service.barber_id, Service.name).in_(plan.pruned))
+            .values(active=False)
+        )
+
+    if plan.missing_blocks:
+        conn.execute(insert(TimeBlock.__table__).values([
+            {"barber_id": user_ids[email], "start_time": start, "end_time": end, "reason": reason}
+            for email, start, end, reason in plan.missing_blocks
+        ]))
+
+    return [user_ids[email] for email in plan.changed_barbers if email in user_ids]
+
+
+def provision(spec: Dict[str, Any], dry_run: bool = False, prune: bool = False, password: Optional[str] = None) -> Plan:
+    barbers = normalize_spec(spec)
+    password = password or spec.get("password")
+
+    with engine.begin() as conn:
+        plan = Plan(conn, barbers, prune)
+        if dry_run or not (plan.created or plan.updated):
+            conn.rollback()
+            return plan
+        changed = _apply(conn, plan, password)
+
+    # horários e bloqueios mudaram: disponibilidade não pode vir do cache antigo
+    for barber_id in changed:
+        schedule_cache.invalidate(barber_id)
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("spec", help="arquivo .yaml/.yml ou .json")
+    parser.add_argument("--dry-run", action="store_true", help="só mostra o que mudaria")
+    parser.add_argument("--prune", action="store_true", help="desativa serviços que não estão na spec")
+    parser.add_argument("--password", help="senha dos barbeiros novos (sobrepõe a da spec)")
+    parser.add_argument("--quiet", action="store_true", help="só o resumo, sem o diff linha a linha")
+    args = parser.parse_args(argv)
+
+    try:
+        plan = provision(load_spec(args.spec), dry_run=args.dry_run, prune=args.prune, password=args.password)
+    except ProvisionError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+
+    if not args.quiet:
+        for line in plan.lines:
+            print(line)
+    print(("🔎 dry-run: " if args.dry_run else "✅ ") + plan.summary)
+
+    if not args.dry_run and (plan.created or plan.updated) and schedule_cache.stats()["backend"] == "local":
+        print(
+            "⚠️  sem REDIS_URL: a API em execução só enxerga os novos horários e "
+            f"bloqueios quando o cache vencer ({SCHEDULE_CACHE_TTL_SECONDS:.0f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Recalcula do zero as tabelas de rollup do dashboard a partir de appointment.
+
+Necessário uma vez para popular o histórico existente (o rollup só é
+mantido incrementalmente para mudanças feitas depois do deploy) ou para
+corrigir divergências.
+
+Uso: python -m app.scripts.rebuild_daily_stats
+"""
+from sqlalchemy import text
+
+from app.database import engine
+
+
+REBUILD_DAILY = """
+INSERT INTO barber_daily_stats (
+    barber_id, day, total, pending, confirmed, completed, canceled, no_show,
+    revenue_completed, paid_revenue, unpaid_revenue, minutes_completed
+)
+SELECT
+    barber_id,
+    appointment_time::date,
+    count(*),
+    count(*) FILTER (WHERE status = 'pending'),
+    count(*) FILTER (WHERE status = 'confirmed'),
+    count(*) FILTER (WHERE status = 'completed'),
+    count(*) FILTER (WHERE status = 'canceled'),
+    count(*) FILTER (WHERE status = 'no_show'),
+    coalesce(sum(service_price_snapshot) FILTER (WHERE status = 'completed'), 0),
+    coalesce(sum(service_price_snapshot) FILTER (
+        WHERE status = 'completed' AND payment_status = 'paid'), 0),
+    coalesce(sum(service_price_snapshot) FILTER (
+        WHERE status = 'completed' AND payment_status <> 'paid'), 0),
+    coalesce(sum(service_duration_snapshot) FILTER (WHERE status = 'completed'), 0)
+FROM appointment
+GROUP BY barber_id, appointment_time::date
+"""
+
+REBUILD_SERVICES = """
+INSERT INTO barber_daily_service_stats (barber_id, day, service_name, total, completed)
+SELECT
+    barber_id,
+    appointment_time::date,
+    service_name_snapshot,
+    count(*),
+    count(*) FILTER (WHERE status = 'completed')
+FROM appointment
+WHERE service_name_snapshot IS NOT NULL AND service_name_snapshot <> ''
+GROUP BY barber_id, appointment_time::date, service_name_snapshot
+"""
+
+
+def main():
+    with engine.begin() as conn:
+        # trava escritas em appointment durante o recálculo
+        conn.execute(text("LOCK TABLE appointment IN SHARE MODE"))
+        conn.execute(text("DELETE FROM barber_daily_service_stats"))
+        conn.execute(text("DELETE FROM barber_daily_stats"))
+        conn.execute(text(REBUILD_DAILY))
+        conn.execute(text(REBUILD_SERVICES))
+
+    print("✅ Rollup do dashboard recalculado")
+
+
+if __name__ == "__main__":
+    main()
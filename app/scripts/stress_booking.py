@@ -0,0 +1,148 @@
+"""
+Teste de estresse de reservas concorrentes.
+
+Dispara várias threads reservando os mesmos horários (e horários que se
+sobrepõem parcialmente) e verifica no banco que nenhum par de agendamentos
+ativos do barbeiro se sobrepõe.
+
+Uso: python -m app.scripts.stress_booking [threads] [tentativas_por_thread]
+"""
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.security import get_password_hash
+from app.database import engine
+from app.main import app
+from app.models.business_hours import BusinessHours
+from app.models.service import Service
+from app.models.user import User
+
+
+BARBER_EMAIL = "stress-barber@example.com"
+CLIENT_EMAIL = "stress-client@example.com"
+PASSWORD = "stress123"
+
+
+def _get_or_create_user(session: Session, email: str, role: str) -> User:
+    user = session.exec(select(User).where(User.email == email)).first()
+    if user:
+        return user
+
+    user = User(name=email.split("@")[0], email=email, role=role, password_hash=get_password_hash(PASSWORD))
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+    return user
+
+
+def _setup():
+    with Session(engine) as session:
+        barber = _get_or_create_user(session, BARBER_EMAIL, "barber")
+        _get_or_create_user(session, CLIENT_EMAIL, "client")
+
+        # (barber_id, weekday) é único: reaproveita as linhas de execuções anteriores
+        existing = {
+            row.weekday: row
+            for row in session.exec(
+                select(BusinessHours).where(BusinessHours.barber_id == barber.id)
+            ).all()
+        }
+
+        for weekday in range(7):
+            hours = existing.get(weekday) or BusinessHours(barber_id=barber.id, weekday=weekday)
+            hours.is_closed = False
+            hours.open_time = time(0, 0)
+            hours.close_time = time(23, 59)
+            hours.lunch_start = None
+            hours.lunch_end = None
+            session.add(hours)
+
+        # idem para (barber_id, name)
+        service = session.exec(
+            select(Service).where(Service.barber_id == barber.id, Service.name == "Stress")
+        ).first()
+        if service is None:
+            service = Service(name="Stress", duration_minutes=30, price=10.0, barber_id=barber.id)
+        service.duration_minutes = 30
+        service.active = True
+        session.add(service)
+        session.commit()
+        session.refresh(service)
+
+        return barber.id, service.id
+
+
+def _overlapping_pairs(barber_id: int) -> int:
+    with Session(engine) as session:
+        return session.exec(
+            text(
+                """
+                SELECT count(*)
+                FROM appointment a
+                JOIN appointment b
+                  ON a.barber_id = b.barber_id
+                 AND a.id < b.id
+                 AND a.appointment_time
+                     < b.appointment_time + make_interval(mins => b.service_duration_snapshot)
+                 AND b.appointment_time
+                     < a.appointment_time + make_interval(mins => a.service_duration_snapshot)
+                WHERE a.barber_id = :barber_id
+                  AND a.status <> 'canceled'
+                  AND b.status <> 'canceled'
+                """
+            ).bindparams(barber_id=barber_id)
+        ).one()[0]
+
+
+def main(threads: int = 32, attempts: int = 20):
+    barber_id, service_id = _setup()
+
+    # dia futuro exclusivo desta execução, para não colidir com execuções anteriores
+    base = datetime.combine(datetime.utcnow().date() + timedelta(days=365), time(8, 0))
+    base += timedelta(days=datetime.utcnow().microsecond % 1000)
+
+    with TestClient(app) as client:
+        token = client.post(
+            "/auth/login", data={"username": CLIENT_EMAIL, "password": PASSWORD}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def worker(worker_id: int) -> Counter:
+            results = Counter()
+            for attempt in range(attempts):
+                # slots de 15 em 15 min com serviço de 30 min: vizinhos se sobrepõem
+                start = base + timedelta(minutes=15 * ((worker_id + attempt) % 16))
+                response = client.post(
+                    "/appointments/",
+                    json={"service_id": service_id, "appointment_time": start.isoformat()},
+                    headers=headers,
+                )
+                results[response.status_code] += 1
+            return results
+
+        totals = Counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for result in pool.map(worker, range(threads)):
+                totals.update(result)
+
+    overlaps = _overlapping_pairs(barber_id)
+
+    print(f"Requisições: {sum(totals.values())} -> {dict(totals)}")
+    print(f"Pares sobrepostos no banco: {overlaps}")
+
+    if overlaps:
+        print("❌ Encontradas reservas duplicadas")
+        sys.exit(1)
+
+    print("✅ Nenhuma sobreposição")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,56 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlmodel import SQLModel
+
+from app.database import engine
+# registra todas as tabelas no metadata (usado pelo --autogenerate)
+from app.models import (  # noqa: F401
+    appointment,
+    business_hours,
+    daily_stats,
+    payment,
+    service,
+    time_block,
+    user,
+    waitlist,
+)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+
+def run_migrations_offline():
+    context.configure(
+        url=str(engine.url.render_as_string(hide_password=False)),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # cada revisão na sua transação: permite autocommit_block
+            # (CREATE INDEX CONCURRENTLY) entre revisões
+            transaction_per_migration=True,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,131 @@
+"""baseline: tabelas originais
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+
+Bancos criados antes das migrations (create_all na inicialização) devem ser
+marcados com `alembic stamp 0001` e então atualizados com `alembic upgrade head`;
+as revisões seguintes usam IF NOT EXISTS e são seguras nesses bancos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("role", sa.String(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    op.create_table(
+        "service",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_table(
+        "businesshours",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("weekday", sa.Integer(), nullable=False),
+        sa.Column("is_closed", sa.Boolean(), nullable=False),
+        sa.Column("open_time", sa.Time(), nullable=True),
+        sa.Column("close_time", sa.Time(), nullable=True),
+        sa.Column("lunch_start", sa.Time(), nullable=True),
+        sa.Column("lunch_end", sa.Time(), nullable=True),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_businesshours_barber_id", "businesshours", ["barber_id"])
+    op.create_index("ix_businesshours_weekday", "businesshours", ["weekday"])
+
+    op.create_table(
+        "timeblock",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("start_time", sa.DateTime(), nullable=False),
+        sa.Column("end_time", sa.DateTime(), nullable=False),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_timeblock_barber_id", "timeblock", ["barber_id"])
+    op.create_index("ix_timeblock_start_time", "timeblock", ["start_time"])
+    op.create_index("ix_timeblock_end_time", "timeblock", ["end_time"])
+
+    op.create_table(
+        "appointment",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("service_id", sa.Integer(), nullable=False),
+        sa.Column("appointment_time", sa.DateTime(), nullable=False),
+        sa.Column("service_name_snapshot", sa.String(), nullable=False),
+        sa.Column("service_price_snapshot", sa.Float(), nullable=False),
+        sa.Column("service_duration_snapshot", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("payment_status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("canceled_at", sa.DateTime(), nullable=True),
+        sa.Column("canceled_by", sa.String(), nullable=True),
+        sa.Column("cancel_reason", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["client_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["service_id"], ["service.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for column in (
+        "client_id",
+        "barber_id",
+        "service_id",
+        "appointment_time",
+        "status",
+        "payment_status",
+        "created_at",
+        "canceled_at",
+    ):
+        op.create_index(f"ix_appointment_{column}", "appointment", [column])
+
+    op.create_table(
+        "payment",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("appointment_id", sa.Integer(), nullable=False),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("external_id", sa.String(), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("paid_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["appointment_id"], ["appointment.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_payment_appointment_id", "payment", ["appointment_id"])
+    op.create_index("ix_payment_status", "payment", ["status"])
+
+
+def downgrade():
+    op.drop_table("payment")
+    op.drop_table("appointment")
+    op.drop_table("timeblock")
+    op.drop_table("businesshours")
+    op.drop_table("service")
+    op.drop_table("user")
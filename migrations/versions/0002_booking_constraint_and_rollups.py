@@ -0,0 +1,145 @@
+"""constraint anti-sobreposição e rollup diário do dashboard
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+Antes da constraint, agendamentos ativos sobrepostos do mesmo barbeiro são
+resolvidos: fica o que começa primeiro (empate: menor id) e os seguintes
+que batem com ele viram 'canceled' com cancel_reason, ids no log.
+"""
+import logging
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+logger = logging.getLogger("alembic.0002")
+
+OVERLAP_CANCEL_REASON = "Sobreposição removida na migration 0002"
+
+
+def _cancel_overlaps():
+    bind = op.get_bind()
+
+    rows = bind.execute(sa.text(
+        """
+        SELECT a.id, a.barber_id, a.appointment_time, a.service_duration_snapshot
+        FROM appointment a
+        WHERE a.status <> 'canceled'
+          AND EXISTS (
+              SELECT 1 FROM appointment o
+              WHERE o.barber_id = a.barber_id
+                AND o.id <> a.id
+                AND o.status <> 'canceled'
+                AND o.appointment_time < a.appointment_time
+                    + make_interval(mins => a.service_duration_snapshot)
+                AND o.appointment_time
+                    + make_interval(mins => o.service_duration_snapshot) > a.appointment_time
+          )
+        ORDER BY a.barber_id, a.appointment_time, a.id
+        """
+    )).all()
+
+    # guloso por barbeiro: o mantido com maior fim é o único que pode bater
+    # com o próximo, porque os mantidos não se sobrepõem entre si
+    to_cancel = []
+    kept_barber, kept_end = None, None
+    for appointment_id, barber_id, start, duration in rows:
+        end = start + timedelta(minutes=duration)
+        if end <= start:
+            # intervalo vazio não entra na constraint
+            continue
+        if barber_id == kept_barber and start < kept_end:
+            to_cancel.append(appointment_id)
+        else:
+            kept_barber, kept_end = barber_id, end
+
+    if not to_cancel:
+        return
+
+    bind.execute(
+        sa.text(
+            """
+            UPDATE appointment
+            SET status = 'canceled', canceled_at = now() at time zone 'utc',
+                canceled_by = 'system', cancel_reason = :reason
+            WHERE id = ANY(:ids)
+            """
+        ),
+        {"reason": OVERLAP_CANCEL_REASON, "ids": to_cancel},
+    )
+    logger.warning(
+        "%d agendamentos sobrepostos cancelados antes da constraint: %s",
+        len(to_cancel), to_cancel,
+    )
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    _cancel_overlaps()
+
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'appointment_no_overlap'
+            ) THEN
+                ALTER TABLE appointment ADD CONSTRAINT appointment_no_overlap
+                EXCLUDE USING gist (
+                    barber_id WITH =,
+                    tsrange(
+                        appointment_time,
+                        appointment_time + make_interval(mins => service_duration_snapshot)
+                    ) WITH &&
+                ) WHERE (status <> 'canceled');
+            END IF;
+        END $$;
+        """
+    )
+
+    op.create_table(
+        "barber_daily_stats",
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("pending", sa.Integer(), nullable=False),
+        sa.Column("confirmed", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.Column("canceled", sa.Integer(), nullable=False),
+        sa.Column("no_show", sa.Integer(), nullable=False),
+        sa.Column("revenue_completed", sa.Float(), nullable=False),
+        sa.Column("paid_revenue", sa.Float(), nullable=False),
+        sa.Column("unpaid_revenue", sa.Float(), nullable=False),
+        sa.Column("minutes_completed", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("barber_id", "day"),
+        if_not_exists=True,
+    )
+
+    op.create_table(
+        "barber_daily_service_stats",
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("service_name", sa.String(), nullable=False),
+        sa.Column("total", sa.Integer(), nullable=False),
+        sa.Column("completed", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("barber_id", "day", "service_name"),
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_table("barber_daily_service_stats")
+    op.drop_table("barber_daily_stats")
+    op.execute("ALTER TABLE appointment DROP CONSTRAINT IF EXISTS appointment_no_overlap")
@@ -0,0 +1,59 @@
+"""índices compostos das consultas quentes (online)
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+Criados com CREATE INDEX CONCURRENTLY: não bloqueiam escritas em produção.
+CONCURRENTLY não roda dentro de transação, por isso o autocommit_block.
+Se um build concorrente falhar, o índice fica INVALID: remova-o com
+DROP INDEX CONCURRENTLY e rode a migration de novo.
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    (
+        "ix_appointment_barber_time_active",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointment_barber_time_active "
+        "ON appointment (barber_id, appointment_time) WHERE status <> 'canceled'",
+    ),
+    (
+        "ix_appointment_barber_time_id",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointment_barber_time_id "
+        "ON appointment (barber_id, appointment_time, id)",
+    ),
+    (
+        "ix_appointment_client_time_id",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appointment_client_time_id "
+        "ON appointment (client_id, appointment_time, id)",
+    ),
+    (
+        "uq_businesshours_barber_weekday",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_businesshours_barber_weekday "
+        "ON businesshours (barber_id, weekday)",
+    ),
+    (
+        "ix_timeblock_barber_end_start",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_timeblock_barber_end_start "
+        "ON timeblock (barber_id, end_time, start_time)",
+    ),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for _, statement in INDEXES:
+            op.execute(statement)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,41 @@
+"""bloqueios recorrentes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "recurringtimeblock",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("weekday", sa.Integer(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("end_time", sa.Time(), nullable=False),
+        sa.Column("interval_weeks", sa.Integer(), nullable=False),
+        sa.Column("starts_on", sa.Date(), nullable=False),
+        sa.Column("ends_on", sa.Date(), nullable=True),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_recurringtimeblock_barber_weekday",
+        "recurringtimeblock",
+        ["barber_id", "weekday"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_recurringtimeblock_barber_weekday", table_name="recurringtimeblock")
+    op.drop_table("recurringtimeblock")
@@ -0,0 +1,61 @@
+"""idempotência de pagamentos
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+
+Antes do índice único de pagamento em aberto, pagamentos pendentes
+duplicados do mesmo agendamento viram 'failed': fica o mais antigo, ou
+nenhum se o agendamento já tem pagamento confirmado.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    (
+        "uq_payment_idempotency_key",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_payment_idempotency_key "
+        "ON payment (idempotency_key)",
+    ),
+    (
+        "uq_payment_appointment_pending",
+        "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_payment_appointment_pending "
+        "ON payment (appointment_id) WHERE status = 'pending'",
+    ),
+)
+
+
+def upgrade():
+    op.add_column("payment", sa.Column("idempotency_key", sa.String(length=255), nullable=True))
+
+    op.execute(
+        """
+        UPDATE payment p SET status = 'failed'
+        WHERE p.status = 'pending'
+          AND EXISTS (
+              SELECT 1 FROM payment o
+              WHERE o.appointment_id = p.appointment_id
+                AND o.id <> p.id
+                AND (o.status = 'paid' OR (o.status = 'pending' AND o.id < p.id))
+          )
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        for _, statement in INDEXES:
+            op.execute(statement)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    op.drop_column("payment", "idempotency_key")
@@ -0,0 +1,39 @@
+"""nome de serviço único por barbeiro
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16
+
+Serviços repetidos do mesmo barbeiro (mesmo nome) não são apagados, pois
+agendamentos apontam para eles: os mais novos ganham o sufixo " #<id>".
+"""
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        UPDATE service s SET name = s.name || ' #' || s.id
+        WHERE EXISTS (
+            SELECT 1 FROM service o
+            WHERE o.barber_id = s.barber_id AND o.name = s.name AND o.id < s.id
+        )
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_service_barber_name "
+            "ON service (barber_id, name)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_service_barber_name")
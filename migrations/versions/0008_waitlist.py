@@ -0,0 +1,59 @@
+"""lista de espera
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "waitlist_entry",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("barber_id", sa.Integer(), nullable=False),
+        sa.Column("service_id", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.DateTime(), nullable=False),
+        sa.Column("window_end", sa.DateTime(), nullable=False),
+        sa.Column("auto_book", sa.Boolean(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("offered_time", sa.DateTime(), nullable=True),
+        sa.Column("offer_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("appointment_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["client_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["barber_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["service_id"], ["service.id"]),
+        sa.ForeignKeyConstraint(["appointment_id"], ["appointment.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # btree_gist já criado na 0002 (constraint appointment_no_overlap)
+    op.create_index(
+        "ix_waitlist_barber_window",
+        "waitlist_entry",
+        ["barber_id", sa.text("tsrange(window_start, window_end)")],
+        postgresql_using="gist",
+        postgresql_where=sa.text("status = 'waiting'"),
+    )
+    op.create_index("ix_waitlist_client_created", "waitlist_entry", ["client_id", "created_at"])
+    op.create_index(
+        "ix_waitlist_barber_offered",
+        "waitlist_entry",
+        ["barber_id"],
+        postgresql_where=sa.text("status = 'offered'"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_waitlist_barber_offered", table_name="waitlist_entry")
+    op.drop_index("ix_waitlist_client_created", table_name="waitlist_entry")
+    op.drop_index("ix_waitlist_barber_window", table_name="waitlist_entry")
+    op.drop_table("waitlist_entry")
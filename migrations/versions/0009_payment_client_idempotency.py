@@ -0,0 +1,61 @@
+"""Idempotency-Key por cliente
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16
+
+payment ganha client_id (dono do agendamento, preenchido a partir dele) e
+a chave de idempotência passa a ser única por cliente em vez de global.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("payment", sa.Column("client_id", sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE payment p SET client_id = a.client_id
+        FROM appointment a
+        WHERE a.id = p.appointment_id
+        """
+    )
+    op.alter_column("payment", "client_id", nullable=False)
+    op.create_foreign_key("payment_client_id_fkey", "payment", "user", ["client_id"], ["id"])
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_payment_client_idempotency_key "
+            "ON payment (client_id, idempotency_key)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_payment_idempotency_key")
+
+
+def downgrade():
+    # chave repetida entre clientes: só o pagamento mais antigo fica com ela
+    op.execute(
+        """
+        UPDATE payment p SET idempotency_key = NULL
+        WHERE p.idempotency_key IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM payment o
+              WHERE o.idempotency_key = p.idempotency_key AND o.id < p.id
+          )
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_payment_idempotency_key "
+            "ON payment (idempotency_key)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_payment_client_idempotency_key")
+
+    op.drop_constraint("payment_client_id_fkey", "payment", type_="foreignkey")
+    op.drop_column("payment", "client_id")